@@ -49,6 +49,15 @@ const devices = new Map();
 const requestMap = new Map();
 // Map deviceId -> latest model result { ts, payload }
 const modelResults = new Map();
+// Map deviceName -> Set of browser socket ids watching its live view
+const liveViewers = new Map();
+
+// Tell a device how many browsers watch its live view; it streams only while this is > 0
+function notifyLiveViewers(device) {
+  const dest = devices.get(device);
+  const viewers = liveViewers.has(device) ? liveViewers.get(device).size : 0;
+  if (dest) io.to(dest).emit('live_view', { viewers });
+}
 
 app.set('io', io);
 app.set('devices', devices);
@@ -155,7 +164,10 @@ io.on('connection', (socket) => {
   // notify admin clients
   io.emit('device-registered', { name, socketId: socket.id });
   // let device know registration succeeded
-  try { socket.emit('register_success', { name }); } catch (e) { /* ignore */ }
+  // binary_frames: devices may send iot-photo images as binary attachments ({ image, mime, bytes })
+  try { socket.emit('register_success', { name, binary_frames: true }); } catch (e) { /* ignore */ }
+  // a (re)connecting device picks up viewers that subscribed while it was away
+  notifyLiveViewers(name);
     } catch (err) {
       console.error('register_device error', err);
     }
@@ -166,8 +178,12 @@ io.on('connection', (socket) => {
     try {
       // Log approximate size for debugging large payload disconnects
       try {
-        const size = payload && (payload.image_b64 ? String(payload.image_b64).length : (payload.frame ? String(payload.frame).length : null));
-        console.log('iot-photo received. approx payload size chars:', size);
+        if (payload && Buffer.isBuffer(payload.image)) {
+          console.log('iot-photo received. binary image bytes:', payload.image.length, payload.mime || '');
+        } else {
+          const size = payload && (payload.image_b64 ? String(payload.image_b64).length : (payload.frame ? String(payload.frame).length : null));
+          console.log('iot-photo received. approx payload size chars:', size);
+        }
       } catch (e) { /* ignore logging errors */ }
     } catch (e) {}
     try {
@@ -188,9 +204,10 @@ io.on('connection', (socket) => {
       // frames map so the `/api/frame/latest_frame` endpoint can return it.
       try {
         const framesMap = app.get('frames');
-        // payload may include different keys: `frame`, `image_b64` or `photo`
+        // payload may include different keys: `frame`, `image_b64`, `photo` or a binary `image`
         const device = payload && (payload.device || payload.device_id || payload.deviceId || payload.name || null);
-        const frameB64 = payload && (payload.frame || payload.image_b64 || payload.photo || null);
+        const frameB64 = payload && (Buffer.isBuffer(payload.image) ? payload.image.toString('base64')
+          : (payload.frame || payload.image_b64 || payload.photo || null));
         if (device && frameB64 && framesMap) {
           framesMap.set(device, { frame: frameB64, ts: Date.now() });
         }
@@ -198,6 +215,35 @@ io.on('connection', (socket) => {
     } catch (err) { console.error('iot-photo relay error', err); }
   });
 
+  // Live view: browsers subscribe to a device with { device }; the device streams while anyone watches
+  socket.on('live-view-subscribe', (data) => {
+    const device = data && data.device;
+    if (!device) return;
+    if (!liveViewers.has(device)) liveViewers.set(device, new Set());
+    liveViewers.get(device).add(socket.id);
+    socket.join(`live:${device}`);
+    notifyLiveViewers(device);
+  });
+
+  socket.on('live-view-unsubscribe', (data) => {
+    const device = data && data.device;
+    if (!device || !liveViewers.has(device)) return;
+    liveViewers.get(device).delete(socket.id);
+    if (liveViewers.get(device).size === 0) liveViewers.delete(device);
+    socket.leave(`live:${device}`);
+    notifyLiveViewers(device);
+  });
+
+  // Relay live frames to the device's viewers. Volatile: a viewer that can't keep up
+  // misses frames rather than buffering them. The ack tells the device the frame is
+  // through and how many viewers are left; it sends its next frame only after it.
+  socket.on('iot-live-frame', (payload, ack) => {
+    const device = payload && payload.device;
+    const viewers = device && liveViewers.has(device) ? liveViewers.get(device).size : 0;
+    if (viewers) io.to(`live:${device}`).volatile.emit('iot-live-frame', payload);
+    if (typeof ack === 'function') ack({ viewers });
+  });
+
   socket.on('iot-model-result', (payload) => {
     try {
       const rid = payload && payload.requestId;
@@ -231,6 +277,13 @@ io.on('connection', (socket) => {
         io.emit('device-disconnected', { name });
       }
     }
+    // drop this socket from any live view it was watching
+    for (const [device, viewers] of liveViewers.entries()) {
+      if (viewers.delete(socket.id)) {
+        if (viewers.size === 0) liveViewers.delete(device);
+        notifyLiveViewers(device);
+      }
+    }
   });
 });
 
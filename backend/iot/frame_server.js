@@ -1,5 +1,6 @@
 import express from 'express';
 import cors from 'cors';
+import multer from 'multer';
 import path from 'path';
 import fs from 'fs';
 import os from 'os';
@@ -12,6 +13,10 @@ const router = express.Router();
 router.use(cors());
 router.use(express.json({ limit: '60mb' })); // allow larger frames if needed
 
+// Frames may also arrive as raw image bodies or multipart uploads (field `frame`)
+const rawFrame = express.raw({ type: ['image/jpeg', 'image/png', 'application/octet-stream'], limit: '60mb' });
+const multipartFrame = multer({ storage: multer.memoryStorage(), limits: { fileSize: 60 * 1024 * 1024 } }).single('frame');
+
 // In-memory store for latest frame per device:
 // deviceId -> { frame: '<base64>', ts: 12345, filepath?: '/tmp/..' }
 const frames = new Map();
@@ -30,22 +35,38 @@ function verifyDeviceToken(req) {
 
 router.get('/health', (req, res) => res.json({ ok: true }));
 
-// POST /upload_frame
-// body: { device_id: 'raspi-1', frame: '<base64-jpeg-or-png>' }
-router.post('/upload_frame', async (req, res) => {
+// POST /upload_frame, one of:
+// - JSON { device_id: 'raspi-1', frame: '<base64-jpeg-or-png>' }
+// - raw body (Content-Type: image/jpeg), device id in ?device_id= or the X-Device-Id header
+// - multipart/form-data with a `frame` file and a `device_id` field
+router.post('/upload_frame', rawFrame, multipartFrame, async (req, res) => {
   try {
     if (!verifyDeviceToken(req)) return res.status(403).json({ error: 'missing_or_invalid_device_token' });
-    const { device_id, frame } = req.body || {};
+    let buf = null;
+    let device_id;
+    let frame;
+    if (Buffer.isBuffer(req.body)) {
+      buf = req.body.length ? req.body : null;
+      device_id = req.query.device_id || req.headers['x-device-id'];
+    } else if (req.file) {
+      buf = req.file.buffer;
+      device_id = (req.body && req.body.device_id) || req.query.device_id || req.headers['x-device-id'];
+    } else {
+      ({ device_id, frame } = req.body || {});
+    }
     if (!device_id) return res.status(400).json({ error: 'device_id_required' });
-    if (!frame) return res.status(400).json({ error: 'frame_required' });
+    if (!buf && !frame) return res.status(400).json({ error: 'frame_required' });
+    // latest_frame serves base64; storage backends take the bytes
+    if (buf) frame = buf.toString('base64');
+    else buf = Buffer.from(frame, 'base64');
 
     const ts = Date.now();
-    const entry = { frame, ts };
+    const requestId = req.headers['x-request-id'] || (req.body && req.body.requestId) || null;
+    const entry = { frame, ts, requestId };
 
     // Optionally save to disk for debugging / later processing
     if ((process.env.SAVE_FRAMES || '').toLowerCase() === 'true') {
       try {
-        const buf = Buffer.from(frame, 'base64');
         const filename = `${device_id}-${ts}.jpg`;
         const dir = path.join(os.tmpdir(), 'ew-frames');
         if (!fs.existsSync(dir)) fs.mkdirSync(dir, { recursive: true });
@@ -74,7 +95,6 @@ router.post('/upload_frame', async (req, res) => {
               global.__ew_gridfs = new GridFSBucket(global.__ew_db, { bucketName: process.env.GRIDFS_BUCKET || 'frames' });
             }
             const bucket = global.__ew_gridfs;
-            const buf = Buffer.from(frame, 'base64');
             const filename = `${device_id}-${ts}.jpg`;
             const uploadStream = bucket.openUploadStream(filename, { metadata: { device_id, ts }, contentType: 'image/jpeg' });
             uploadStream.end(buf, () => {
@@ -95,7 +115,6 @@ router.post('/upload_frame', async (req, res) => {
           try {
             // Initialize S3 client with optional region & credentials from env
             const s3 = new S3Client({ region: process.env.S3_REGION || undefined, credentials: (process.env.S3_KEY && process.env.S3_SECRET) ? { accessKeyId: process.env.S3_KEY, secretAccessKey: process.env.S3_SECRET } : undefined });
-            const buf = Buffer.from(frame, 'base64');
             const key = `frames/${device_id}/${ts}.jpg`;
             const cmd = new PutObjectCommand({ Bucket: S3_BUCKET, Key: key, Body: buf, ContentType: 'image/jpeg' });
             // Fire-and-forget upload but await result to ensure availability
@@ -130,7 +149,7 @@ router.post('/upload_frame', async (req, res) => {
       }
     }
 
-    console.log(`Frame received from ${device_id} (size ~${String(frame).length} chars)`);
+    console.log(`Frame received from ${device_id} (${buf.length} bytes) requestId=${requestId || '-'}`);
     return res.json({ status: 'ok', ts });
   } catch (err) {
     console.error('upload_frame error', err);
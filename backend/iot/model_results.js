@@ -36,16 +36,18 @@ router.post('/model_result', async (req, res) => {
     const deviceId = body.device_id || body.device || body.deviceId;
     const result = body.result || body;
     if (!deviceId || !result) return res.status(400).json({ error: 'device_id_and_result_required' });
+    const requestId = req.headers['x-request-id'] || body.requestId || null;
+    if (requestId) console.log(`model_result from ${deviceId} requestId=${requestId}`);
 
     // persist latest model result in memory for quick retrieval by clients
     const modelResults = req.app.get('modelResults');
-    if (modelResults) modelResults.set(String(deviceId), { ts: Date.now(), payload: result });
+    if (modelResults) modelResults.set(String(deviceId), { ts: Date.now(), payload: result, requestId });
 
     // Emit the model result to connected clients via socket.io so the web UI updates in real-time
     try {
       const io = req.app.get('io');
       if (io) {
-        io.emit('iot-model-result', { device_id: deviceId, result });
+        io.emit('iot-model-result', { device_id: deviceId, requestId, result });
       }
     } catch (e) {
       console.warn('Failed to emit iot-model-result via socket.io', e);
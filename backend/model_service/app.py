@@ -1,17 +1,26 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, UploadFile, File, HTTPException, Header, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from pathlib import Path
+from contextlib import contextmanager
+from typing import Optional
+import asyncio
 import base64
+import time
 from io import BytesIO
 from PIL import Image
 import torch
 from torchvision import transforms
 import os
 import requests
-import shutil
 from urllib.parse import urlparse
 import hashlib
+import threading
+
+import autotune
+from model_backends import BACKENDS, load_backend, warm_up
+from worker_pool import InferenceWorkerPool
 
 try:
     import boto3
@@ -27,35 +36,65 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "OPTIONS"],
     allow_headers=["*"],
+    # let browser clients read per-request stage timings
+    expose_headers=["Server-Timing", "X-Request-Id"],
 )
 
 
-# Attempt to download and load the model at startup so the download appears in deploy logs
+# Download, load and warm the model in a background thread so the server binds
+# its port immediately (Render/Fly cold starts otherwise hit port-binding
+# timeouts while a ~100 MB model downloads). Progress is exposed via /health.
 @app.on_event('startup')
 async def startup_load_model():
-    try:
-        print('Startup: checking model file and attempting download/load if needed...')
-        # download_model_if_needed will return True if download succeeded or file exists
-        ok = download_model_if_needed(MODEL_PATH)
-        if ok:
-            try:
-                # load model and store in the global `model` so service reports loaded=True
-                global model
-                model = load_model(MODEL_PATH)
-                app.state.load_error = None
-                print(f'Model loaded successfully from {MODEL_PATH}')
-            except Exception as e:
-                app.state.load_error = str(e)
-                print('Model load failed at startup:', e)
-        else:
-            print(f'Model not present and download did not run or failed (MODEL_DOWNLOAD_URL={MODEL_DOWNLOAD_URL})')
-    except Exception as e:
-        app.state.load_error = str(e)
-        print('Startup model load encountered an error:', e)
+    if os.environ.get('MODEL_BACKGROUND_LOAD', '1') in ('0', 'false', 'False'):
+        print('Startup: MODEL_BACKGROUND_LOAD disabled; model will be loaded on first request')
+        return
+    print('Startup: scheduling background model download/load/warm-up...')
+    threading.Thread(target=background_load_model, name='model-loader', daemon=True).start()
 
 
 class InferRequest(BaseModel):
     image_b64: str
+    # optional trace id; the X-Request-Id header takes precedence when both are sent
+    request_id: Optional[str] = None
+
+
+class StageTimer:
+    """Collects per-stage durations for one request.
+
+    Stages are rendered as a `Server-Timing` header (`decode;dur=3.1, ...`)
+    and logged on one line keyed by the caller's request id so a slow sort
+    can be matched against the Pi-side span log.
+    """
+
+    def __init__(self, request_id: Optional[str] = None):
+        self.request_id = request_id
+        self.stages = []
+        self._t0 = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str):
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages.append((name, (time.perf_counter() - t) * 1000.0))
+
+    def add(self, name: str, ms: float):
+        """Record a stage measured elsewhere (e.g. inside a worker process)."""
+        self.stages.append((name, float(ms)))
+
+    def server_timing(self) -> str:
+        parts = [f"{name};dur={ms:.1f}" for name, ms in self.stages]
+        parts.append(f"total;dur={(time.perf_counter() - self._t0) * 1000.0:.1f}")
+        return ", ".join(parts)
+
+    def apply(self, response: Response):
+        header = self.server_timing()
+        response.headers["Server-Timing"] = header
+        if self.request_id:
+            response.headers["X-Request-Id"] = self.request_id
+        print(f"[infer] requestId={self.request_id or '-'} {header}")
 
 
 DEFAULT_MODEL = Path(__file__).resolve().parents[2] / 'Model' / 'Model' / 'resnet50_ewaste_traced.pt'
@@ -70,6 +109,32 @@ MODEL_PATH = os.environ.get('MODEL_PATH') or (
 )
 MODEL_DOWNLOAD_URL = os.environ.get('MODEL_DOWNLOAD_URL') or os.environ.get('MODEL_S3_URL')
 DEVICE = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+# Execution backend (see model_backends.py): `torchscript` loads the traced .pt;
+# `inductor` compiles the eager ResNet-50 from a .pth checkpoint, so MODEL_PATH
+# (and MODEL_DOWNLOAD_URL) must then point at the checkpoint.
+MODEL_BACKEND = os.environ.get('MODEL_BACKEND', 'torchscript').lower()
+if MODEL_BACKEND not in BACKENDS:
+    print(f'Unknown MODEL_BACKEND={MODEL_BACKEND!r}; falling back to torchscript')
+    MODEL_BACKEND = 'torchscript'
+
+# Process-pool inference: INFERENCE_WORKERS=N (>0) serves requests from N
+# worker processes, each with INFERENCE_THREADS_PER_WORKER torch threads and
+# pinned to its own cores (see worker_pool.py). 0 keeps in-process inference.
+INFERENCE_WORKERS = int(os.environ.get('INFERENCE_WORKERS', '0'))
+INFERENCE_THREADS_PER_WORKER = int(os.environ.get('INFERENCE_THREADS_PER_WORKER', '0')) or max(
+    1, (os.cpu_count() or 1) // max(1, INFERENCE_WORKERS))
+INFERENCE_INTEROP_THREADS = int(os.environ.get('INFERENCE_INTEROP_THREADS', '1'))
+INFERENCE_MAX_BATCH = int(os.environ.get('INFERENCE_MAX_BATCH', '1'))
+INFERENCE_PIN_CORES = os.environ.get('INFERENCE_PIN_CORES', '1') not in ('0', 'false', 'False')
+INFERENCE_TIMEOUT_S = float(os.environ.get('INFERENCE_TIMEOUT_S', '30'))
+
+# Autotuning: a config saved by `python autotune.py` (or by AUTOTUNE=1 at
+# startup) for this host/model is applied before the model loads. Explicitly
+# set env vars (INFERENCE_*, TORCH_NUM_THREADS, TORCH_INTEROP_THREADS) win.
+AUTOTUNE_CONFIG = os.environ.get('AUTOTUNE_CONFIG') or str(autotune.DEFAULT_CONFIG_PATH)
+AUTOTUNE_ON_START = os.environ.get('AUTOTUNE', '0') in ('1', 'true', 'True')
+AUTOTUNE_WORKERS = os.environ.get('AUTOTUNE_WORKERS', '1') not in ('0', 'false', 'False')
+AUTOTUNE_DURATION_S = float(os.environ.get('AUTOTUNE_DURATION_S', '1.0'))
 
 # If the configured MODEL_PATH points to a repo-local `pi_model/...` path that
 # doesn't exist in the deployment (common when large models were removed from
@@ -96,16 +161,16 @@ except Exception as _e:
 
 
 def load_model(path: str):
-    if not Path(path).exists():
-        raise FileNotFoundError(f"Model not found at: {path}")
-    model = torch.jit.load(path, map_location=DEVICE)
-    model.eval()
-    return model
+    return load_backend(MODEL_BACKEND, path, DEVICE, warm=False)
 
 
-def download_model_if_needed(target_path: str):
+def download_model_if_needed(target_path: str, progress=None):
     """If model file is missing and MODEL_DOWNLOAD_URL provided, download it.
     Supports HTTP(S) direct downloads or s3://bucket/key with boto3 (if installed).
+
+    `progress(done_bytes, total_bytes_or_None)` is called as data arrives.
+    Downloads go to a `.part` file that is renamed into place when complete,
+    so an interrupted download is never mistaken for a usable model.
     """
     p = Path(target_path)
     if p.exists():
@@ -121,8 +186,18 @@ def download_model_if_needed(target_path: str):
             resp = requests.get(url, stream=True, timeout=60)
             resp.raise_for_status()
             p.parent.mkdir(parents=True, exist_ok=True)
-            with open(p, 'wb') as f:
-                shutil.copyfileobj(resp.raw, f)
+            total = int(resp.headers.get('Content-Length') or 0) or None
+            part = p.with_name(p.name + '.part')
+            done = 0
+            with open(part, 'wb') as f:
+                for chunk in resp.iter_content(chunk_size=1024 * 1024):
+                    if not chunk:
+                        continue
+                    f.write(chunk)
+                    done += len(chunk)
+                    if progress:
+                        progress(done, total)
+            part.replace(p)
             print('Downloaded model via HTTP(S)')
             return True
         elif parsed.scheme == 's3':
@@ -134,7 +209,20 @@ def download_model_if_needed(target_path: str):
             key = parsed.path.lstrip('/')
             s3 = boto3.client('s3')
             p.parent.mkdir(parents=True, exist_ok=True)
-            s3.download_file(bucket, key, str(p))
+            part = p.with_name(p.name + '.part')
+            total = None
+            try:
+                total = int(s3.head_object(Bucket=bucket, Key=key).get('ContentLength') or 0) or None
+            except Exception:
+                total = None
+            seen = [0]
+
+            def _s3_progress(n):
+                seen[0] += n
+                if progress:
+                    progress(seen[0], total)
+            s3.download_file(bucket, key, str(part), Callback=_s3_progress)
+            part.replace(p)
             print('Downloaded model from S3')
             return True
         else:
@@ -146,25 +234,194 @@ def download_model_if_needed(target_path: str):
 
 # lazy model (will be loaded on first inference to make startup robust)
 model = None
+# set instead of `model` when INFERENCE_WORKERS > 0
+worker_pool = None
 app.state.load_error = None
 
-def ensure_model_loaded():
-    """Load the model on-demand. Sets app.state.load_error on failure and returns the model or raises HTTPException."""
+# Model lifecycle: idle -> downloading -> [tuning] -> loading -> warming -> ready (or failed).
+LOAD_STATES = ('idle', 'downloading', 'tuning', 'loading', 'warming', 'ready', 'failed')
+load_status = {
+    'state': 'idle',
+    'progress': {'bytes_done': 0, 'bytes_total': None, 'fraction': None},
+    'timings': {},
+    'error': None,
+    'started_at': None,
+    'updated_at': None,
+}
+_load_lock = threading.Lock()
+# what autotuning chose and applied (reported by /model-info)
+autotune_info = None
+
+
+def _set_load_state(state: str, error: Optional[str] = None):
+    load_status['state'] = state
+    load_status['error'] = error
+    load_status['updated_at'] = time.time()
+    print(f'Model state -> {state}' + (f' ({error})' if error else ''))
+
+
+def _download_progress(done: int, total: Optional[int]):
+    prog = load_status['progress']
+    prog['bytes_done'] = done
+    prog['bytes_total'] = total
+    prog['fraction'] = round(done / total, 4) if total else None
+
+
+def _apply_autotune():
+    """Apply a saved (or freshly measured) autotune config to torch and the pool settings."""
+    global autotune_info, INFERENCE_WORKERS, INFERENCE_THREADS_PER_WORKER, INFERENCE_INTEROP_THREADS, INFERENCE_MAX_BATCH
+    config = autotune.load_config(AUTOTUNE_CONFIG, MODEL_PATH, MODEL_BACKEND)
+    source = 'file'
+    if config is None and AUTOTUNE_ON_START:
+        _set_load_state('tuning')
+        t = time.perf_counter()
+        config = autotune.run_autotune(MODEL_PATH, AUTOTUNE_CONFIG, backend=MODEL_BACKEND, include_workers=AUTOTUNE_WORKERS,
+                                       duration=AUTOTUNE_DURATION_S)
+        load_status['timings']['tune_s'] = round(time.perf_counter() - t, 3)
+        source = 'startup'
+
+    applied = {}
+    tuned = (config or {}).get('settings', {})
+    num_threads = os.environ.get('TORCH_NUM_THREADS') or tuned.get('num_threads')
+    interop = os.environ.get('TORCH_INTEROP_THREADS') or tuned.get('interop_threads')
+    if interop:
+        try:
+            torch.set_num_interop_threads(int(interop))
+        except RuntimeError as e:
+            # only settable before the first inter-op parallel work in this process
+            print('Could not set inter-op threads:', e)
+        applied['interop_threads'] = torch.get_num_interop_threads()
+    if num_threads:
+        torch.set_num_threads(int(num_threads))
+        applied['num_threads'] = torch.get_num_threads()
+
+    if tuned:
+        if 'INFERENCE_WORKERS' not in os.environ:
+            INFERENCE_WORKERS = int(tuned.get('workers') or 0)
+        if 'INFERENCE_THREADS_PER_WORKER' not in os.environ:
+            INFERENCE_THREADS_PER_WORKER = int(tuned.get('threads_per_worker') or 0) or max(
+                1, (os.cpu_count() or 1) // max(1, INFERENCE_WORKERS))
+        if 'INFERENCE_MAX_BATCH' not in os.environ:
+            INFERENCE_MAX_BATCH = int(tuned.get('max_batch') or 1)
+        if 'INFERENCE_INTEROP_THREADS' not in os.environ and tuned.get('interop_threads'):
+            INFERENCE_INTEROP_THREADS = int(tuned['interop_threads'])
+    applied.update(workers=INFERENCE_WORKERS, threads_per_worker=INFERENCE_THREADS_PER_WORKER if INFERENCE_WORKERS else None,
+                   max_batch=INFERENCE_MAX_BATCH if INFERENCE_WORKERS else 1)
+
+    best = (config or {}).get('best', {})
+    autotune_info = {
+        'source': source if config else None,
+        'config_path': AUTOTUNE_CONFIG,
+        'tuned_at': (config or {}).get('created_at'),
+        'settings': tuned or None,
+        'applied': applied,
+        'throughput_ips': best.get('throughput_ips'),
+        'latency_ms_p50': best.get('latency_ms_p50'),
+    }
+    if config:
+        print(f'Autotune ({source}): applied {applied}; measured {best.get("throughput_ips")} img/s')
+
+
+def model_ready() -> bool:
+    return model is not None or worker_pool is not None
+
+
+def _start_worker_pool():
+    """Spawn the inference workers; each loads and warms its own model copy."""
+    global worker_pool
+    _set_load_state('loading')
+    t = time.perf_counter()
+    pool = InferenceWorkerPool(
+        MODEL_PATH,
+        num_workers=INFERENCE_WORKERS,
+        threads_per_worker=INFERENCE_THREADS_PER_WORKER,
+        interop_threads=INFERENCE_INTEROP_THREADS,
+        num_classes=len(CLASSES),
+        max_batch=INFERENCE_MAX_BATCH,
+        pin_cores=INFERENCE_PIN_CORES,
+        backend=MODEL_BACKEND,
+    )
+    pool.start()
+    load_status['timings']['pool_start_s'] = round(time.perf_counter() - t, 3)
+    worker_pool = pool
+    return pool
+
+
+def _load_pipeline():
+    """Download (if needed), load and warm the model, recording each state.
+
+    Must be called with `_load_lock` held. Returns the loaded model or raises.
+    """
     global model
-    if model is not None:
-        return model
+    if model_ready():
+        return model if model is not None else worker_pool
+    load_status['started_at'] = time.time()
+    load_status['timings'] = {}
     try:
-        # If model file missing, try to download it from MODEL_DOWNLOAD_URL / MODEL_S3_URL
         if not Path(MODEL_PATH).exists():
-            ok = download_model_if_needed(MODEL_PATH)
+            _set_load_state('downloading')
+            t = time.perf_counter()
+            ok = download_model_if_needed(MODEL_PATH, progress=_download_progress)
+            load_status['timings']['download_s'] = round(time.perf_counter() - t, 3)
             if not ok:
                 raise FileNotFoundError(f"Model not found at: {MODEL_PATH} and no download succeeded (MODEL_DOWNLOAD_URL={MODEL_DOWNLOAD_URL})")
-        model = load_model(MODEL_PATH)
+
+        _apply_autotune()
+
+        if INFERENCE_WORKERS > 0:
+            loaded = _start_worker_pool()
+        else:
+            _set_load_state('loading')
+            t = time.perf_counter()
+            m = load_model(MODEL_PATH)
+            load_status['timings']['load_s'] = round(time.perf_counter() - t, 3)
+
+            _set_load_state('warming')
+            t = time.perf_counter()
+            warm_up(m, DEVICE)
+            load_status['timings']['warmup_s'] = round(time.perf_counter() - t, 3)
+
+            model = loaded = m
         app.state.load_error = None
-        return model
+        load_status['timings']['total_s'] = round(time.time() - load_status['started_at'], 3)
+        _set_load_state('ready')
+        print(f'Model loaded successfully from {MODEL_PATH}')
+        return loaded
     except Exception as e:
         app.state.load_error = str(e)
+        _set_load_state('failed', str(e))
+        raise
+
+
+def background_load_model():
+    """Startup task: run the load pipeline off the event loop."""
+    with _load_lock:
+        try:
+            _load_pipeline()
+        except Exception as e:
+            print('Background model load failed:', e)
+
+
+def ensure_model_loaded():
+    """Load the model on-demand. Sets app.state.load_error on failure and returns the model or raises HTTPException.
+
+    While the background loader is still working this returns 503 with a
+    Retry-After hint instead of starting a second download.
+    """
+    if model_ready():
+        return model if model is not None else worker_pool
+    if not _load_lock.acquire(blocking=False):
+        raise HTTPException(
+            status_code=503,
+            detail=f"Model not ready (state={load_status['state']})",
+            headers={'Retry-After': '5'},
+        )
+    try:
+        return _load_pipeline()
+    except Exception as e:
         raise HTTPException(status_code=500, detail=f"Model not loaded: {e}")
+    finally:
+        _load_lock.release()
 
 
 preprocess = transforms.Compose([
@@ -198,16 +455,33 @@ def image_from_b64(b64: str) -> Image.Image:
         raise HTTPException(status_code=400, detail=f"Invalid base64 image: {e}")
 
 
-@app.post('/infer')
-async def infer(req: InferRequest):
-    """Accepts JSON with `image_b64` and returns { label, confidence }"""
-    # ensure model is available (lazy-load if necessary)
-    ensure_model_loaded()
-    img = image_from_b64(req.image_b64)
-    input_tensor = preprocess(img).unsqueeze(0).to(DEVICE)
-
-    with torch.no_grad():
-        outputs = model(input_tensor)
+async def run_inference(img: Image.Image, timer: StageTimer) -> dict:
+    """Preprocess a decoded image and run the model, recording each stage on `timer`."""
+    if worker_pool is not None:
+        # keep the event loop free: preprocess and the shared-memory copy run
+        # in the threadpool, the forward pass in a worker process
+        with timer.stage('preprocess'):
+            input_tensor = await run_in_threadpool(preprocess, img)
+        t = time.perf_counter()
+        try:
+            fut = await run_in_threadpool(worker_pool.submit, input_tensor, INFERENCE_TIMEOUT_S)
+            outputs, meta = await asyncio.wait_for(asyncio.wrap_future(fut), timeout=INFERENCE_TIMEOUT_S)
+        except (asyncio.TimeoutError, TimeoutError) as e:
+            raise HTTPException(status_code=504, detail=f"Inference timed out: {e}")
+        except RuntimeError as e:
+            raise HTTPException(status_code=500, detail=f"Inference failed: {e}")
+        roundtrip_ms = (time.perf_counter() - t) * 1000.0
+        timer.add('queue', meta['queue_ms'])
+        timer.add('infer', meta['infer_ms'])
+        timer.add('dispatch', max(0.0, roundtrip_ms - meta['queue_ms'] - meta['infer_ms']))
+    else:
+        with timer.stage('preprocess'):
+            input_tensor = preprocess(img).unsqueeze(0).to(DEVICE)
+
+        with timer.stage('infer'), torch.no_grad():
+            outputs = model(input_tensor)
+
+    with timer.stage('post'):
         # if outputs is a tensor of shape [1, C]
         probs = torch.nn.functional.softmax(outputs, dim=1)
         conf, idx = torch.max(probs, 1)
@@ -217,54 +491,93 @@ async def infer(req: InferRequest):
     return {"label": label, "confidence": confidence}
 
 
+@app.post('/infer')
+async def infer(req: InferRequest, response: Response, x_request_id: Optional[str] = Header(default=None)):
+    """Accepts JSON with `image_b64` and returns { label, confidence }"""
+    timer = StageTimer(x_request_id or req.request_id)
+    # ensure model is available (lazy-load if necessary)
+    with timer.stage('load'):
+        ensure_model_loaded()
+    with timer.stage('decode'):
+        img = image_from_b64(req.image_b64)
+    result = await run_inference(img, timer)
+    timer.apply(response)
+    return result
+
+
 @app.post('/infer-file')
-async def infer_file(file: UploadFile = File(...)):
+async def infer_file(response: Response, file: UploadFile = File(...), x_request_id: Optional[str] = Header(default=None)):
     """Accepts multipart/form-data file upload (image)"""
+    timer = StageTimer(x_request_id)
     # ensure model is available (lazy-load if necessary)
-    ensure_model_loaded()
-    contents = await file.read()
-    try:
-        img = Image.open(BytesIO(contents)).convert('RGB')
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Invalid image file: {e}")
+    with timer.stage('load'):
+        ensure_model_loaded()
+    with timer.stage('decode'):
+        contents = await file.read()
+        try:
+            img = Image.open(BytesIO(contents)).convert('RGB')
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Invalid image file: {e}")
 
-    input_tensor = preprocess(img).unsqueeze(0).to(DEVICE)
-    with torch.no_grad():
-        outputs = model(input_tensor)
-        probs = torch.nn.functional.softmax(outputs, dim=1)
-        conf, idx = torch.max(probs, 1)
-        label = CLASSES[idx.item()]
-        confidence = float(conf.item())
+    result = await run_inference(img, timer)
+    timer.apply(response)
+    return result
 
-    return {"label": label, "confidence": confidence}
+
+def _health_payload() -> dict:
+    ready = model_ready()
+    return {
+        # the process is up and serving HTTP
+        "live": True,
+        # the model is loaded and warmed; inference will not block on loading
+        "ready": ready,
+        "state": load_status['state'],
+        "progress": load_status['progress'],
+        "timings": load_status['timings'],
+        "error": load_status['error'] or getattr(app.state, 'load_error', None),
+    }
 
 
 @app.get('/health')
 async def health():
     """
-    Health endpoint. Return ok=True when either:
+    Health endpoint. Always answers 200 so platform port/liveness probes pass
+    while the model is still downloading; `live` and `ready` are reported
+    separately together with the loader state, progress and timings.
+
+    `ok` is kept for existing callers: True when either
     - the model is loaded in memory, or
     - the model file exists on disk (so the service can load it on demand).
-
-    This makes readiness probes less flaky across worker restarts where the
-    process may not yet have loaded the model into memory but the file is
-    already present (downloaded during previous startup).
     """
-    # Prefer the in-memory model state when available
-    if model is not None:
-        return {"ok": True, "model_path": MODEL_PATH, "error": None}
+    payload = _health_payload()
+    if model_ready():
+        return {"ok": True, "model_path": MODEL_PATH, **payload}
 
     # If the model file exists on disk, report ok=True so external probes
     # treat the service as ready (it can load the model lazily on first request).
     try:
-        from pathlib import Path
         if Path(MODEL_PATH).exists():
-            return {"ok": True, "model_path": MODEL_PATH, "error": getattr(app.state, 'load_error', None)}
+            return {"ok": True, "model_path": MODEL_PATH, **payload}
     except Exception:
         # Fall through to reporting not-ready on unexpected errors
         pass
 
-    return {"ok": False, "model_path": None, "error": getattr(app.state, 'load_error', None)}
+    return {"ok": False, "model_path": None, **payload}
+
+
+@app.get('/health/live')
+async def health_live():
+    """Liveness: 200 whenever the process can answer HTTP."""
+    return {"live": True, "state": load_status['state']}
+
+
+@app.get('/health/ready')
+async def health_ready(response: Response):
+    """Readiness: 200 once the model is loaded and warmed, 503 otherwise."""
+    payload = _health_payload()
+    if not payload['ready']:
+        response.status_code = 503
+    return payload
 
 
 @app.get('/model-info')
@@ -278,16 +591,24 @@ async def model_info():
     - sha256: sha256 hex digest of the file (if exists)
     - loaded: whether the model is currently loaded in memory
     - load_error: last recorded load error (if any)
+    - state / timings: background loader state and per-phase timings
+    - inference_pool: per-worker stats when INFERENCE_WORKERS > 0
+    - autotune: tuned settings, what was applied and the measured throughput
     """
     try:
         p = Path(MODEL_PATH)
         info = {
             'model_path': MODEL_PATH,
+            'backend': MODEL_BACKEND,
             'exists': p.exists(),
             'size': None,
             'sha256': None,
-            'loaded': model is not None,
-            'load_error': getattr(app.state, 'load_error', None)
+            'loaded': model_ready(),
+            'load_error': getattr(app.state, 'load_error', None),
+            'state': load_status['state'],
+            'timings': load_status['timings'],
+            'inference_pool': worker_pool.stats() if worker_pool is not None else None,
+            'autotune': autotune_info,
         }
         if p.exists():
             try:
@@ -308,10 +629,16 @@ async def model_info():
         raise HTTPException(status_code=500, detail=f"Failed to compute model info: {e}")
 
 
+@app.on_event('shutdown')
+async def shutdown_worker_pool():
+    if worker_pool is not None:
+        worker_pool.close()
+
+
 # Helpful developer GET routes to avoid confusing 404s in the browser console.
 @app.get('/')
 async def root():
-    return {"service": "E-waste model service", "routes": ["POST /infer (json image_b64)", "POST /infer-file (multipart)", "GET /health"]}
+    return {"service": "E-waste model service", "routes": ["POST /infer (json image_b64)", "POST /infer-file (multipart)", "GET /health", "GET /health/live", "GET /health/ready"]}
 
 
 @app.get('/infer')
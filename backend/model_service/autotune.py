@@ -0,0 +1,254 @@
+"""Hardware autotuner for model service inference settings.
+
+Sweeps `torch.set_num_threads`, `torch.set_num_interop_threads`, batch size
+and (optionally) the process-pool topology on the machine it runs on, and
+writes the fastest configuration to a JSON file that later starts reuse.
+
+Offline:
+    python autotune.py --model /path/to/model.pt --out autotune.json
+
+At startup app.py runs the same sweep when `AUTOTUNE=1` and no matching
+config file exists (see README).
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import torch
+
+from model_backends import load_backend
+
+DEFAULT_CONFIG_PATH = Path(__file__).resolve().parent / 'autotune.json'
+
+
+def host_fingerprint(model_path: str = None) -> dict:
+    """Identify the hardware/software a config was tuned on."""
+    try:
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cores = os.cpu_count() or 1
+    fp = {
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'usable_cores': cores,
+        'torch': torch.__version__,
+    }
+    if model_path and Path(model_path).exists():
+        fp['model_size'] = Path(model_path).stat().st_size
+    return fp
+
+
+def _thread_candidates(cores: int):
+    c = {1, cores}
+    n = 2
+    while n < cores:
+        c.add(n)
+        n *= 2
+    return sorted(c)
+
+
+def bench_callable(fn, batch: int, duration: float, min_iters: int = 3) -> dict:
+    """Time `fn(batch_tensor)` for ~duration seconds; return throughput and latency."""
+    x = torch.randn(batch, 3, 224, 224)
+    with torch.no_grad():
+        fn(x)  # warm-up for this shape
+        lat = []
+        t_end = time.perf_counter() + duration
+        while len(lat) < min_iters or time.perf_counter() < t_end:
+            t = time.perf_counter()
+            fn(x)
+            lat.append((time.perf_counter() - t) * 1000.0)
+    total_s = sum(lat) / 1000.0
+    return {
+        'throughput_ips': round(batch * len(lat) / total_s, 2),
+        'latency_ms_p50': round(statistics.median(lat), 2),
+        'iters': len(lat),
+    }
+
+
+def sweep_in_process(model_path: str, backend: str = 'torchscript', batch_sizes=(1, 2, 4, 8),
+                     interop_candidates=(1, 2), duration: float = 1.5, log=print):
+    """Sweep intra-op threads x batch size in this process.
+
+    Inter-op threads can only be set once per process, so each inter-op value
+    other than the current one is measured in a child process.
+    """
+    cores = host_fingerprint()['usable_cores']
+    model = load_backend(backend, model_path, torch.device('cpu'), warm=False)
+    results = []
+    for i, interop in enumerate(interop_candidates):
+        if i > 0:
+            results.extend(_sweep_child(model_path, backend, batch_sizes, interop, duration, log))
+            continue
+        try:
+            torch.set_num_interop_threads(interop)
+        except RuntimeError:
+            # already fixed for this process; record what we actually measured
+            interop = torch.get_num_interop_threads()
+        for threads in _thread_candidates(cores):
+            torch.set_num_threads(threads)
+            for bs in batch_sizes:
+                r = bench_callable(model, bs, duration)
+                r.update({'mode': 'in_process', 'num_threads': threads, 'interop_threads': interop, 'batch_size': bs})
+                log(f'[autotune] {r}')
+                results.append(r)
+    return results
+
+
+def _sweep_child(model_path, backend, batch_sizes, interop, duration, log):
+    import subprocess
+    cmd = [sys.executable, __file__, '--model', model_path, '--backend', backend, '--child-interop', str(interop),
+           '--duration', str(duration), '--batch-sizes', ','.join(str(b) for b in batch_sizes)]
+    try:
+        out = subprocess.run(cmd, check=True, capture_output=True, text=True, cwd=str(Path(__file__).parent)).stdout
+        rows = json.loads(out.strip().splitlines()[-1])
+        for r in rows:
+            log(f'[autotune] {r}')
+        return rows
+    except Exception as e:
+        log(f'[autotune] inter-op={interop} sweep failed: {e}')
+        return []
+
+
+def sweep_worker_pool(model_path: str, backend: str = 'torchscript', max_batch: int = 1,
+                      num_classes: int = 12, requests_per_worker: int = 16, log=print):
+    """Measure end-to-end throughput of each process-pool topology that
+    splits the usable cores evenly (workers x threads_per_worker)."""
+    from concurrent.futures import wait
+    from worker_pool import InferenceWorkerPool
+
+    cores = host_fingerprint()['usable_cores']
+    results = []
+    for workers in [w for w in _thread_candidates(cores) if cores % w == 0]:
+        threads = cores // workers
+        pool = InferenceWorkerPool(model_path, workers, threads_per_worker=threads, num_classes=num_classes,
+                                   max_batch=max_batch, backend=backend)
+        try:
+            pool.start()
+            x = torch.randn(3, 224, 224)
+            n = requests_per_worker * workers
+            t = time.perf_counter()
+            futs = []
+            for _ in range(n):
+                futs.append(pool.submit(x))
+            wait(futs)
+            elapsed = time.perf_counter() - t
+            lat = [f.result()[1]['queue_ms'] + f.result()[1]['infer_ms'] for f in futs]
+            r = {'mode': 'worker_pool', 'workers': workers, 'threads_per_worker': threads, 'batch_size': max_batch,
+                 'throughput_ips': round(n / elapsed, 2), 'latency_ms_p50': round(statistics.median(lat), 2), 'iters': n}
+            log(f'[autotune] {r}')
+            results.append(r)
+        except Exception as e:
+            log(f'[autotune] pool workers={workers} failed: {e}')
+        finally:
+            pool.close()
+    return results
+
+
+def choose_best(results, objective: str = 'throughput') -> dict:
+    if not results:
+        return {}
+    if objective == 'latency':
+        single = [r for r in results if r['batch_size'] == 1] or results
+        return min(single, key=lambda r: r['latency_ms_p50'])
+    return max(results, key=lambda r: r['throughput_ips'])
+
+
+def run_autotune(model_path: str, out_path=DEFAULT_CONFIG_PATH, backend: str = 'torchscript',
+                 batch_sizes=(1, 2, 4, 8), include_workers: bool = True, duration: float = 1.5,
+                 objective: str = 'throughput', log=print) -> dict:
+    """Run the full sweep, save it to `out_path` and return the config dict."""
+    t0 = time.perf_counter()
+    results = sweep_in_process(model_path, backend, batch_sizes, duration=duration, log=log)
+    # in-process serving runs one image per forward pass, so pick threading on
+    # batch-1 rows; the best batched row only decides the pool's max_batch
+    single = [r for r in results if r['batch_size'] == 1] or results
+    best_threading = choose_best(single, objective)
+    pool_batch = choose_best(results, objective).get('batch_size', 1)
+    candidates = list(single)
+    if include_workers:
+        pool_rows = sweep_worker_pool(model_path, backend, max_batch=pool_batch, log=log)
+        results += pool_rows
+        candidates += pool_rows
+    best = choose_best(candidates, objective)
+
+    use_pool = best.get('mode') == 'worker_pool'
+    settings = {
+        'num_threads': best_threading.get('num_threads'),
+        'interop_threads': best_threading.get('interop_threads'),
+        'workers': best.get('workers') if use_pool else 0,
+        'threads_per_worker': best.get('threads_per_worker') if use_pool else None,
+        'max_batch': best.get('batch_size', 1) if use_pool else 1,
+    }
+    config = {
+        'created_at': time.time(),
+        'host': host_fingerprint(model_path),
+        'backend': backend,
+        'objective': objective,
+        'settings': settings,
+        'best': best,
+        'sweep_s': round(time.perf_counter() - t0, 2),
+        'results': results,
+    }
+    if out_path:
+        Path(out_path).parent.mkdir(parents=True, exist_ok=True)
+        with open(out_path, 'w') as f:
+            json.dump(config, f, indent=2)
+        log(f'[autotune] wrote {out_path}: {settings} -> {best.get("throughput_ips")} img/s')
+    return config
+
+
+def load_config(path=DEFAULT_CONFIG_PATH, model_path: str = None, backend: str = None):
+    """Return a saved config if it was tuned on this host (and model/backend), else None."""
+    p = Path(path)
+    if not p.exists():
+        return None
+    try:
+        with open(p) as f:
+            config = json.load(f)
+    except Exception as e:
+        print(f'[autotune] ignoring unreadable config {p}: {e}')
+        return None
+    if config.get('host') != host_fingerprint(model_path):
+        print(f'[autotune] {p} was tuned on different hardware/model; ignoring')
+        return None
+    if backend and config.get('backend', 'torchscript') != backend:
+        print(f'[autotune] {p} was tuned for backend {config.get("backend")!r}, not {backend!r}; ignoring')
+        return None
+    return config
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sweep torch threading / batching / worker topology for this host')
+    parser.add_argument('--model', default=os.environ.get('MODEL_PATH'), help='TorchScript model to benchmark')
+    parser.add_argument('--backend', default=os.environ.get('MODEL_BACKEND', 'torchscript'))
+    parser.add_argument('--out', default=os.environ.get('AUTOTUNE_CONFIG', str(DEFAULT_CONFIG_PATH)))
+    parser.add_argument('--batch-sizes', default='1,2,4,8')
+    parser.add_argument('--duration', type=float, default=1.5, help='seconds per measured configuration')
+    parser.add_argument('--objective', choices=['throughput', 'latency'], default='throughput')
+    parser.add_argument('--no-workers', action='store_true', help='skip the process-pool topology sweep')
+    parser.add_argument('--child-interop', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if not args.model:
+        raise SystemExit('--model or MODEL_PATH is required')
+    batch_sizes = tuple(int(b) for b in args.batch_sizes.split(',') if b)
+
+    if args.child_interop:
+        # child mode: measure one inter-op setting and print JSON rows for the parent
+        torch.set_num_interop_threads(args.child_interop)
+        rows = sweep_in_process(args.model, args.backend, batch_sizes, interop_candidates=(args.child_interop,),
+                                duration=args.duration, log=lambda *_: None)
+        print(json.dumps(rows))
+        return
+
+    run_autotune(args.model, args.out, args.backend, batch_sizes, include_workers=not args.no_workers,
+                 duration=args.duration, objective=args.objective)
+
+
+if __name__ == '__main__':
+    main()
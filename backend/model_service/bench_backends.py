@@ -0,0 +1,109 @@
+"""Benchmark the `inductor` execution backend against TorchScript.
+
+Loads the traced TorchScript model and the `.pth` checkpoint compiled with
+Inductor, then reports for each backend:
+- load / compile time (run twice to see the effect of the on-disk compile cache),
+- p50 latency and throughput per batch size,
+- agreement with TorchScript (max |logit diff| and top-1 agreement).
+
+Usage:
+    python bench_backends.py --torchscript ../../Model/new_layer4_resnet50_ewaste_traced.pt \
+        --checkpoint ../../Model/resnet50_finetuned_layer4_standard.pth --batch-sizes 1,4,8
+
+Compile-cache effect: run it twice, or pass `--fresh-cache` to clear the
+cache first and measure a cold compile.
+"""
+import argparse
+import json
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import torch
+
+from autotune import bench_callable
+from model_backends import COMPILE_CACHE_DIR, load_backend
+
+
+def _measure_load(backend, path, batch_sizes):
+    t = time.perf_counter()
+    model = load_backend(backend, path, torch.device('cpu'), batch_sizes=batch_sizes, warm=False)
+    load_s = time.perf_counter() - t
+    t = time.perf_counter()
+    with torch.no_grad():
+        for bs in batch_sizes:
+            model(torch.zeros(bs, 3, 224, 224))
+    first_call_s = time.perf_counter() - t
+    return model, round(load_s, 3), round(first_call_s, 3)
+
+
+def _child_startup(backend, path, batch_sizes):
+    """Measure load + first call in a fresh process (what a service restart pays)."""
+    cmd = [sys.executable, __file__, '--child', backend, '--child-path', path,
+           '--batch-sizes', ','.join(str(b) for b in batch_sizes)]
+    out = subprocess.run(cmd, check=True, capture_output=True, text=True, cwd=str(Path(__file__).parent)).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--torchscript', help='traced TorchScript .pt file')
+    parser.add_argument('--checkpoint', help='.pth checkpoint for the inductor backend')
+    parser.add_argument('--batch-sizes', default='1,4')
+    parser.add_argument('--duration', type=float, default=3.0, help='seconds per measured batch size')
+    parser.add_argument('--threads', type=int, default=0, help='torch.set_num_threads (0 = torch default)')
+    parser.add_argument('--fresh-cache', action='store_true', help=f'clear {COMPILE_CACHE_DIR} first')
+    parser.add_argument('--out', help='write the JSON report here as well')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--child-path', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    batch_sizes = [int(b) for b in args.batch_sizes.split(',') if b]
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    if args.child:
+        _, load_s, first_call_s = _measure_load(args.child, args.child_path, batch_sizes)
+        print(json.dumps({'load_s': load_s, 'first_call_s': first_call_s}))
+        return
+
+    if not args.torchscript or not args.checkpoint:
+        raise SystemExit('--torchscript and --checkpoint are required')
+    if args.fresh_cache:
+        shutil.rmtree(COMPILE_CACHE_DIR, ignore_errors=True)
+
+    report = {'torch': torch.__version__, 'threads': torch.get_num_threads(), 'backends': {}}
+    models = {}
+    for backend, path in (('torchscript', args.torchscript), ('inductor', args.checkpoint)):
+        entry = {'path': path}
+        if backend == 'inductor':
+            # first start compiles (or reuses an existing cache), second start must hit the cache
+            entry['cold_start'] = _child_startup(backend, path, batch_sizes)
+            entry['cached_start'] = _child_startup(backend, path, batch_sizes)
+        model, entry['load_s'], entry['first_call_s'] = _measure_load(backend, path, batch_sizes)
+        entry['per_batch'] = {bs: bench_callable(model, bs, args.duration) for bs in batch_sizes}
+        models[backend] = model
+        report['backends'][backend] = entry
+        print(f'{backend}: {json.dumps(entry)}')
+
+    x = torch.randn(max(batch_sizes), 3, 224, 224)
+    with torch.no_grad():
+        ref = models['torchscript'](x)
+        got = models['inductor'](x)
+    report['agreement'] = {
+        'max_abs_logit_diff': float((ref - got).abs().max()),
+        'top1_agreement': float((ref.argmax(1) == got.argmax(1)).float().mean()),
+    }
+    for bs in batch_sizes:
+        ts = report['backends']['torchscript']['per_batch'][bs]['throughput_ips']
+        ind = report['backends']['inductor']['per_batch'][bs]['throughput_ips']
+        print(f'batch={bs}: torchscript {ts} img/s, inductor {ind} img/s (x{ind / ts:.2f})')
+    print('agreement:', report['agreement'])
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""Model loading backends for the model service.
+
+`load_backend(name, path, device)` returns a callable in eval mode that maps
+a float tensor `[N, 3, 224, 224]` to logits `[N, num_classes]`, already
+warmed up for the batch sizes it will serve. Used both in-process by app.py
+and by the worker processes in worker_pool.py.
+
+Backends:
+- `torchscript`: `torch.jit.load` of the traced `.pt` file (default).
+- `inductor`: rebuilds the eager ResNet-50 from the `.pth` checkpoint (same
+  recipe as raspberry/raspi-1/convert_to_torchscript.py) and compiles it with
+  `torch.compile(backend="inductor")`, one static graph per served batch
+  size. Compiled artifacts are cached under `COMPILE_CACHE_DIR` so restarts
+  skip most of the compile time.
+"""
+import os
+from pathlib import Path
+
+import torch
+
+BACKENDS = ('torchscript', 'inductor')
+
+NUM_CLASSES = int(os.environ.get('NUM_CLASSES', '12'))
+COMPILE_CACHE_DIR = os.environ.get('COMPILE_CACHE_DIR') or str(Path(__file__).resolve().parent / 'compile_cache')
+COMPILE_MODE = os.environ.get('COMPILE_MODE', 'default')  # or 'max-autotune' / 'reduce-overhead'
+
+
+def load_torchscript(path: str, device: torch.device):
+    if not Path(path).exists():
+        raise FileNotFoundError(f"Model not found at: {path}")
+    model = torch.jit.load(path, map_location=device)
+    model.eval()
+    return model
+
+
+def load_state_dict(pth_path: str, device: torch.device):
+    ckpt = torch.load(pth_path, map_location=device)
+    if isinstance(ckpt, dict) and 'state_dict' in ckpt:
+        sd = ckpt['state_dict']
+    else:
+        sd = ckpt
+    # strip possible 'module.' prefixes from keys
+    return {k.replace('module.', ''): v for k, v in sd.items()}
+
+
+def build_resnet50(num_classes: int = NUM_CLASSES):
+    import torchvision.models as models
+    model = models.resnet50(weights=None)
+    model.fc = torch.nn.Linear(model.fc.in_features, num_classes)
+    return model
+
+
+def enable_compile_cache(cache_dir: str = COMPILE_CACHE_DIR):
+    """Point Inductor's on-disk caches (FX graph cache, autotune results,
+    generated kernels) at `cache_dir` so they survive restarts."""
+    Path(cache_dir).mkdir(parents=True, exist_ok=True)
+    os.environ['TORCHINDUCTOR_CACHE_DIR'] = cache_dir
+    os.environ.setdefault('TORCHINDUCTOR_FX_GRAPH_CACHE', '1')
+    os.environ.setdefault('TORCHINDUCTOR_AUTOGRAD_CACHE', '1')
+    import torch._inductor.config as inductor_config
+    inductor_config.fx_graph_cache = True
+    return cache_dir
+
+
+def load_inductor(pth_path: str, device: torch.device, num_classes: int = NUM_CLASSES,
+                  mode: str = COMPILE_MODE, cache_dir: str = COMPILE_CACHE_DIR):
+    if not Path(pth_path).exists():
+        raise FileNotFoundError(f"Checkpoint not found at: {pth_path}")
+    if not str(pth_path).endswith(('.pth', '.pt.tar', '.ckpt')):
+        print(f'Warning: inductor backend expects a .pth state_dict checkpoint, got {pth_path}')
+    enable_compile_cache(cache_dir)
+    model = build_resnet50(num_classes)
+    model.load_state_dict(load_state_dict(pth_path, device))
+    model.eval().to(device)
+    # static shapes: one specialised graph per batch size we warm up
+    return torch.compile(model, backend='inductor', mode=None if mode == 'default' else mode, dynamic=False)
+
+
+def warm_up(model, device: torch.device, batch_sizes=(1,), iterations: int = None):
+    """Run a few dummy forward passes per batch size so the first real request
+    doesn't pay for lazy allocator / kernel selection work."""
+    iterations = int(os.environ.get('MODEL_WARMUP_ITERS', '2')) if iterations is None else iterations
+    with torch.no_grad():
+        for bs in sorted(set(int(b) for b in batch_sizes if b)):
+            dummy = torch.zeros(bs, 3, 224, 224, device=device)
+            for _ in range(max(0, iterations)):
+                model(dummy)
+
+
+def load_backend(name: str, path: str, device: torch.device, batch_sizes=(1,), warm: bool = True):
+    """Load, and by default warm, the model for backend `name`.
+
+    For `inductor` the warm-up is where compilation happens (or where the
+    cached artifacts are loaded), so pass every batch size that will be served.
+    """
+    name = (name or 'torchscript').lower()
+    if name == 'torchscript':
+        model = load_torchscript(path, device)
+    elif name == 'inductor':
+        model = load_inductor(path, device)
+    else:
+        raise ValueError(f"Unknown model backend {name!r}; expected one of {BACKENDS}")
+    if warm:
+        warm_up(model, device, batch_sizes)
+    return model
@@ -0,0 +1,303 @@
+"""Multi-process inference pool for the model service.
+
+A single Python process with one torch intra-op pool does not scale on 8/16
+core hosts: decode/preprocess hold the GIL and one large intra-op pool
+oversubscribes the cores. `InferenceWorkerPool` starts N worker processes,
+each holding its own copy of the model with a fixed thread count and pinned
+to its own set of CPU cores.
+
+Input tensors and output logits never go through pickle: every worker owns a
+small ring of fixed-size slots in `multiprocessing.shared_memory`. The
+dispatcher copies a preprocessed tensor into a free slot of the worker with
+the least outstanding work and sends only `(job_id, slot)` over the queue.
+Workers may fold several queued jobs into one batched forward pass (up to
+`max_batch`).
+
+Enable it in app.py with `INFERENCE_WORKERS=<n>`.
+"""
+import os
+import queue
+import threading
+import time
+import multiprocessing as mp
+from concurrent.futures import Future
+from multiprocessing import shared_memory
+from typing import List, Optional
+
+import numpy as np
+import torch
+
+INPUT_SHAPE = (3, 224, 224)
+_FLOAT = np.float32
+
+
+def plan_core_sets(num_workers: int, threads_per_worker: int) -> List[Optional[List[int]]]:
+    """Split the CPUs this process may run on into one contiguous block per worker.
+
+    Returns `None` for a worker when there are not enough cores left to give
+    it a dedicated block (it then floats on all cores rather than sharing).
+    """
+    try:
+        cores = sorted(os.sched_getaffinity(0))
+    except AttributeError:
+        return [None] * num_workers
+    plan = []
+    for i in range(num_workers):
+        block = cores[i * threads_per_worker:(i + 1) * threads_per_worker]
+        plan.append(block if len(block) == threads_per_worker else None)
+    return plan
+
+
+def _slot_views(shm_in, shm_out, slots: int, num_classes: int):
+    inp = np.ndarray((slots,) + INPUT_SHAPE, dtype=_FLOAT, buffer=shm_in.buf)
+    out = np.ndarray((slots, num_classes), dtype=_FLOAT, buffer=shm_out.buf)
+    return inp, out
+
+
+def _worker_main(idx, model_path, backend, threads, interop_threads, cores,
+                 shm_in_name, shm_out_name, slots, num_classes, max_batch,
+                 req_q, res_q):
+    """Worker process entry point: load the model, then serve slot jobs until `None`."""
+    try:
+        if cores and hasattr(os, 'sched_setaffinity'):
+            os.sched_setaffinity(0, cores)
+        torch.set_num_threads(threads)
+        try:
+            torch.set_num_interop_threads(interop_threads)
+        except RuntimeError:
+            # interop pool already started; keep the default
+            pass
+
+        from model_backends import load_backend
+        t = time.perf_counter()
+        model = load_backend(backend, model_path, torch.device('cpu'), batch_sizes=range(1, max_batch + 1))
+        load_s = time.perf_counter() - t
+
+        shm_in = shared_memory.SharedMemory(name=shm_in_name)
+        shm_out = shared_memory.SharedMemory(name=shm_out_name)
+        inp, out = _slot_views(shm_in, shm_out, slots, num_classes)
+        res_q.put(('ready', idx, {'load_s': round(load_s, 3), 'cores': cores, 'threads': threads}))
+    except Exception as e:
+        res_q.put(('error', idx, str(e)))
+        return
+
+    stop = False
+    while not stop:
+        job = req_q.get()
+        if job is None:
+            break
+        jobs = [job]
+        # opportunistically batch whatever else is already queued for this worker
+        while len(jobs) < max_batch:
+            try:
+                nxt = req_q.get_nowait()
+            except queue.Empty:
+                break
+            if nxt is None:
+                stop = True
+                break
+            jobs.append(nxt)
+
+        picked = time.monotonic()
+        try:
+            slot_ids = [j[1] for j in jobs]
+            batch = torch.from_numpy(inp[slot_ids])
+            t = time.perf_counter()
+            with torch.no_grad():
+                logits = model(batch)
+            infer_ms = (time.perf_counter() - t) * 1000.0
+            out[slot_ids] = logits.detach().float().numpy()
+            res_q.put(('done', idx, [(j[0], j[1], (picked - j[2]) * 1000.0) for j in jobs], infer_ms, None))
+        except Exception as e:
+            res_q.put(('done', idx, [(j[0], j[1], 0.0) for j in jobs], 0.0, str(e)))
+
+    del inp, out
+    shm_in.close()
+    shm_out.close()
+
+
+class _Worker:
+    def __init__(self, idx, slots, num_classes, ctx):
+        self.idx = idx
+        self.shm_in = shared_memory.SharedMemory(create=True, size=slots * int(np.prod(INPUT_SHAPE)) * 4)
+        self.shm_out = shared_memory.SharedMemory(create=True, size=slots * num_classes * 4)
+        self.inp, self.out = _slot_views(self.shm_in, self.shm_out, slots, num_classes)
+        self.free_slots = list(range(slots))
+        self.outstanding = 0
+        self.req_q = ctx.Queue()
+        self.proc = None
+        self.info = {}
+
+
+class InferenceWorkerPool:
+    """Dispatches preprocessed tensors to N pinned worker processes.
+
+    `submit(tensor)` returns a `concurrent.futures.Future` resolving to
+    `(logits, {'queue_ms', 'infer_ms', 'batch', 'worker'})`.
+    """
+
+    def __init__(self, model_path: str, num_workers: int, threads_per_worker: int = 1,
+                 interop_threads: int = 1, num_classes: int = 12, max_batch: int = 1,
+                 slots_per_worker: Optional[int] = None, pin_cores: bool = True,
+                 backend: str = 'torchscript'):
+        self.model_path = model_path
+        self.num_workers = max(1, int(num_workers))
+        self.threads_per_worker = max(1, int(threads_per_worker))
+        self.interop_threads = max(1, int(interop_threads))
+        self.num_classes = num_classes
+        self.max_batch = max(1, int(max_batch))
+        self.slots = slots_per_worker or max(2, 2 * self.max_batch)
+        self.pin_cores = pin_cores
+        self.backend = backend
+        self._ctx = mp.get_context('spawn')
+        self._res_q = self._ctx.Queue()
+        self._cond = threading.Condition()
+        self._jobs = {}
+        self._next_id = 0
+        self._workers: List[_Worker] = []
+        self._listener = None
+        self._closed = False
+
+    def start(self, timeout: float = 300.0):
+        """Spawn the workers and block until each has loaded and warmed its model."""
+        cores = plan_core_sets(self.num_workers, self.threads_per_worker) if self.pin_cores else [None] * self.num_workers
+        for i in range(self.num_workers):
+            w = _Worker(i, self.slots, self.num_classes, self._ctx)
+            w.proc = self._ctx.Process(
+                target=_worker_main,
+                name=f'inference-worker-{i}',
+                args=(i, self.model_path, self.backend, self.threads_per_worker, self.interop_threads, cores[i],
+                      w.shm_in.name, w.shm_out.name, self.slots, self.num_classes, self.max_batch,
+                      w.req_q, self._res_q),
+                daemon=True,
+            )
+            w.proc.start()
+            self._workers.append(w)
+
+        pending = set(range(self.num_workers))
+        deadline = time.monotonic() + timeout
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self.close()
+                raise TimeoutError(f'inference workers {sorted(pending)} did not start within {timeout}s')
+            try:
+                kind, idx, info = self._res_q.get(timeout=remaining)
+            except queue.Empty:
+                continue
+            if kind == 'error':
+                self.close()
+                raise RuntimeError(f'inference worker {idx} failed to start: {info}')
+            self._workers[idx].info = info
+            pending.discard(idx)
+
+        self._listener = threading.Thread(target=self._collect_results, name='inference-pool-results', daemon=True)
+        self._listener.start()
+        print(f'Inference pool ready: {self.num_workers} workers x {self.threads_per_worker} threads, '
+              f'max_batch={self.max_batch}, cores={[w.info.get("cores") for w in self._workers]}')
+        return self
+
+    def _pick_worker(self) -> Optional[_Worker]:
+        # least-outstanding-work routing among workers that still have a free slot
+        candidates = [w for w in self._workers if w.free_slots and w.proc.is_alive()]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda w: w.outstanding)
+
+    def submit(self, tensor: torch.Tensor, timeout: float = 30.0) -> Future:
+        """Copy one preprocessed CHW (or 1xCHW) tensor into shared memory and queue it."""
+        if self._closed:
+            raise RuntimeError('inference pool is closed')
+        arr = tensor.detach().reshape(INPUT_SHAPE).float().numpy()
+        fut = Future()
+        with self._cond:
+            w = self._pick_worker()
+            deadline = time.monotonic() + timeout
+            while w is None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not any(x.proc.is_alive() for x in self._workers):
+                    raise TimeoutError('no inference worker slot available')
+                self._cond.wait(remaining)
+                w = self._pick_worker()
+            slot = w.free_slots.pop()
+            w.outstanding += 1
+            job_id = self._next_id
+            self._next_id += 1
+            self._jobs[job_id] = fut
+        w.inp[slot] = arr
+        w.req_q.put((job_id, slot, time.monotonic()))
+        return fut
+
+    def _collect_results(self):
+        while not self._closed:
+            try:
+                msg = self._res_q.get(timeout=1.0)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                break
+            try:
+                self._handle_result(msg)
+            except Exception as e:
+                # one bad message must not end the listener: nothing would free a slot again
+                print(f'Inference pool: failed to handle result {msg[:2]!r}: {e!r}')
+
+    def _handle_result(self, msg):
+        if msg[0] != 'done':
+            return
+        _, idx, jobs, infer_ms, error = msg
+        w = self._workers[idx]
+        for job_id, slot, queue_ms in jobs:
+            logits = None if error else torch.from_numpy(w.out[slot].copy()).unsqueeze(0)
+            with self._cond:
+                fut = self._jobs.pop(job_id, None)
+                w.free_slots.append(slot)
+                w.outstanding -= 1
+                self._cond.notify()
+            # cancelled when the caller gave up (run_inference's timeout); the slot is freed all the same
+            if fut is None or not fut.set_running_or_notify_cancel():
+                continue
+            if error:
+                fut.set_exception(RuntimeError(error))
+            else:
+                fut.set_result((logits, {'queue_ms': queue_ms, 'infer_ms': infer_ms, 'batch': len(jobs), 'worker': idx}))
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                'workers': self.num_workers,
+                'threads_per_worker': self.threads_per_worker,
+                'interop_threads': self.interop_threads,
+                'max_batch': self.max_batch,
+                'backend': self.backend,
+                'per_worker': [
+                    {'alive': w.proc.is_alive() if w.proc else False, 'outstanding': w.outstanding, **w.info}
+                    for w in self._workers
+                ],
+            }
+
+    def close(self):
+        self._closed = True
+        for w in self._workers:
+            try:
+                w.req_q.put(None)
+            except Exception:
+                pass
+        for w in self._workers:
+            if w.proc is not None:
+                w.proc.join(timeout=5)
+                if w.proc.is_alive():
+                    w.proc.terminate()
+            # drop the numpy views first; shared memory can't close while exported
+            w.inp = w.out = None
+            for shm in (w.shm_in, w.shm_out):
+                try:
+                    shm.close()
+                    shm.unlink()
+                except Exception:
+                    pass
+        with self._cond:
+            for fut in self._jobs.values():
+                if not fut.done():
+                    fut.set_exception(RuntimeError('inference pool closed'))
+            self._jobs.clear()
@@ -68,50 +68,92 @@ router.delete('/:id', async (req, res) => {
   res.json({ message: 'Bin deleted' });
 });
 
+async function resolveBin(bin_id) {
+  // Attempt to resolve bin by various strategies: by ObjectId, qrCode, or id-like field
+  let bin = null;
+  // try by ObjectId-ish
+  if (!bin && typeof bin_id === 'string' && /^[0-9a-fA-F]{24}$/.test(bin_id)) {
+    try { bin = await Bin.findById(bin_id); } catch (e) { bin = null; }
+  }
+  // try by qrCode
+  if (!bin) bin = await Bin.findOne({ qrCode: bin_id });
+  // try by explicit id field
+  if (!bin) bin = await Bin.findOne({ _id: bin_id }).catch(() => null);
+  return bin;
+}
+
+// Apply one sensor reading; returns the updated bin, or null if the bin does not exist
+async function applyReading({ bin_id, distance_cm, fill_percent, ts }) {
+  const bin = await resolveBin(bin_id);
+  // If no bin exists, do not auto-create without explicit admin action
+  if (!bin) return null;
+
+  const updates = {};
+  if (typeof fill_percent === 'number') updates.level = fill_percent;
+  if (typeof distance_cm === 'number') updates.lastDistanceCm = distance_cm;
+  updates.lastUpdated = ts ? new Date(ts) : new Date();
+
+  // Derive status heuristics: if level >= 95% mark full, if >= 70% mark collecting
+  const levelVal = typeof updates.level === 'number' ? updates.level : (typeof bin.level === 'number' ? bin.level : null);
+  if (typeof levelVal === 'number') {
+    if (levelVal >= 95) updates.status = 'full';
+    else if (levelVal >= 70) updates.status = 'collecting';
+    else updates.status = 'available';
+  }
+
+  return Bin.findByIdAndUpdate(bin._id, { $set: updates }, { new: true });
+}
+
+function emitBinUpdate(req, bin) {
+  // Emit socket event to notify connected clients about the update
+  try {
+    const io = req.app && req.app.get && req.app.get('io');
+    if (io) io.emit('binStatusUpdate', bin);
+  } catch (e) { /* ignore socket emission failures */ }
+}
+
 // Sensor update endpoint: accept POST /update with payload { bin_id, distance_cm, fill_percent, ts }
-// This endpoint is intended for IoT devices (Raspberry Pi) to report ultrasonic readings.
+// or a batch { device, ts, readings: [{ bin_id, distance_cm, fill_percent, ts }, ...] }.
+// This endpoint is intended for IoT devices (Raspberry Pi) to report ultrasonic readings;
+// the Pi monitors send one batch per cycle containing only the bins that changed.
 router.post('/update', async (req, res) => {
   try {
-    const { bin_id, distance_cm, fill_percent, ts } = req.body || {};
-    if (!bin_id) return res.status(400).json({ error: 'bin_id required' });
-
-    // Attempt to resolve bin by various strategies: by ObjectId, qrCode, or id-like field
-    let bin = null;
-    // try by ObjectId-ish
-    if (!bin && typeof bin_id === 'string' && /^[0-9a-fA-F]{24}$/.test(bin_id)) {
-      try { bin = await Bin.findById(bin_id); } catch (e) { bin = null; }
-    }
-    // try by qrCode
-    if (!bin) bin = await Bin.findOne({ qrCode: bin_id });
-    // try by explicit id field
-    if (!bin) bin = await Bin.findOne({ _id: bin_id }).catch(() => null);
-
-    if (!bin) {
-      // If no bin exists, return 404 — do not auto-create without explicit admin action
-      return res.status(404).json({ error: 'Bin not found' });
-    }
-
-    const updates = {};
-    if (typeof fill_percent === 'number') updates.level = fill_percent;
-    if (typeof distance_cm === 'number') updates.lastDistanceCm = distance_cm;
-    updates.lastUpdated = ts ? new Date(ts) : new Date();
-
-    // Derive status heuristics: if level >= 95% mark full, if >= 70% mark collecting
-    const levelVal = typeof updates.level === 'number' ? updates.level : (typeof bin.level === 'number' ? bin.level : null);
-    if (typeof levelVal === 'number') {
-      if (levelVal >= 95) updates.status = 'full';
-      else if (levelVal >= 70) updates.status = 'collecting';
-      else updates.status = 'available';
+    const body = req.body || {};
+    if (Array.isArray(body.readings)) {
+      const results = [];
+      // A bin only stores its latest level, so a batch (e.g. a backlog flushed after an outage)
+      // is applied as the newest reading per bin; the older ones are acknowledged as superseded.
+      const newest = new Map();
+      for (const reading of body.readings) {
+        if (!reading || !reading.bin_id) {
+          results.push({ bin_id: reading && reading.bin_id, ok: false, error: 'bin_id required' });
+          continue;
+        }
+        const key = String(reading.bin_id);
+        const prev = newest.get(key);
+        if (prev && prev.ts && reading.ts && new Date(reading.ts) < new Date(prev.ts)) {
+          results.push({ bin_id: reading.bin_id, ok: true, superseded: true });
+          continue;
+        }
+        if (prev) results.push({ bin_id: prev.bin_id, ok: true, superseded: true });
+        newest.set(key, reading);
+      }
+      // one reading per bin, so the bins can be updated concurrently
+      const applied = await Promise.all([...newest.values()].map(async (reading) => {
+        const updated = await applyReading(reading);
+        if (!updated) return { bin_id: reading.bin_id, ok: false, error: 'Bin not found' };
+        emitBinUpdate(req, updated);
+        return { bin_id: reading.bin_id, ok: true };
+      }));
+      results.push(...applied);
+      // unknown bins don't fail the batch; the device would otherwise resend it forever
+      return res.json({ ok: true, results });
     }
 
-    const updated = await Bin.findByIdAndUpdate(bin._id, { $set: updates }, { new: true });
-
-    // Emit socket event to notify connected clients about the update
-    try {
-      const io = req.app && req.app.get && req.app.get('io');
-      if (io) io.emit('binStatusUpdate', updated);
-    } catch (e) { /* ignore socket emission failures */ }
-
+    if (!body.bin_id) return res.status(400).json({ error: 'bin_id required' });
+    const updated = await applyReading(body);
+    if (!updated) return res.status(404).json({ error: 'Bin not found' });
+    emitBinUpdate(req, updated);
     return res.json({ ok: true, bin: updated });
   } catch (err) {
     console.error('Error in /api/bins/update:', err);
@@ -63,7 +63,7 @@ router.post('/run-model', async (req, res) => {
     if (replySocketId && requestMap) requestMap.set(requestId, { replySocketId, ts: Date.now() });
 
     try {
-      const j = await callModelService(MODEL_SERVICE_URL, { image_b64: body.image_b64 });
+      const j = await callModelService(MODEL_SERVICE_URL, { image_b64: body.image_b64 }, { requestId });
       if (replySocketId) {
         io.to(replySocketId).emit('iot-model-result', { requestId, label: j.label, confidence: j.confidence, source: 'server' });
       }
@@ -1,5 +1,7 @@
 // Lightweight wrapper to call an external model service with a fetch fallback
-export async function callModelService(url, payload = {}, timeoutMs = 15000) {
+// Pass `requestId` to propagate it as `X-Request-Id` so the model service can log
+// per-stage timings (returned in its `Server-Timing` header) against the same id.
+export async function callModelService(url, payload = {}, timeoutMs = 15000, requestId = undefined) {
   // pick fetch: prefer global fetch (Node 18+), otherwise dynamic import node-fetch
   let fetchFn;
   if (typeof fetch !== 'undefined') {
@@ -19,14 +21,19 @@ export async function callModelService(url, payload = {}, timeoutMs = 15000) {
     signal = controller.signal;
     const timeout = setTimeout(() => controller.abort(), timeoutMs);
 
+    const headers = { 'Content-Type': 'application/json' };
+    if (requestId) headers['X-Request-Id'] = String(requestId);
     const res = await fetchFn(url, {
       method: 'POST',
-      headers: { 'Content-Type': 'application/json' },
+      headers,
       body: JSON.stringify(payload),
       signal,
     });
     clearTimeout(timeout);
 
+    const serverTiming = res.headers && res.headers.get ? res.headers.get('server-timing') : null;
+    if (serverTiming) console.log(`Model service timing requestId=${requestId || '-'}: ${serverTiming}`);
+
     const text = await res.text();
     if (!res.ok) {
       throw new Error(`Model service returned ${res.status}: ${text}`);
@@ -50,7 +57,7 @@ export async function callModelServiceWithRetries(url, payload = {}, opts = {})
   let lastErr;
   for (let i = 0; i < attempts; i++) {
     try {
-      const res = await callModelService(url, payload, opts.timeoutMs || 15000);
+      const res = await callModelService(url, payload, opts.timeoutMs || 15000, opts.requestId);
       return res;
     } catch (err) {
       lastErr = err;
@@ -6,6 +6,9 @@ Features:
 - Connects to backend via socket.io and registers as a device
 - Listens for `run_model` events to capture an image, run inference, and return results
 - Uploads captured frames to `/api/frame/upload_frame` so the website can display them
+  (raw JPEG body; JSON base64 for backends that reject it)
+- Emits `iot-photo` with the JPEG as a binary attachment when the backend announces
+  `binary_frames` at registration (`IMAGE_TRANSPORT=binary|base64` to force one)
 - Posts model results to `/api/iot/model_result` (and emits `iot-model-result` over socket.io)
 
 Configure via environment variables or edit the constants below.
@@ -19,6 +22,7 @@ import json
 import subprocess
 import requests
 import socketio
+from contextlib import contextmanager
 from pathlib import Path
 
 # Configuration (edit or set environment variables)
@@ -31,6 +35,8 @@ CAPTURE_HEIGHT = int(os.environ.get('CAPTURE_HEIGHT', '240'))
 USE_RASPISTILL = os.environ.get('USE_RASPISTILL', '1') == '1'
 TFLITE_MODEL_PATH = os.environ.get('TFLITE_MODEL_PATH', '')
 TORCH_MODEL_PATH = os.environ.get('TORCH_MODEL_PATH', '')
+TRACE_LOG_PATH = os.environ.get('TRACE_LOG_PATH', '')  # optional JSONL file for per-request span logs
+IMAGE_TRANSPORT = os.environ.get('IMAGE_TRANSPORT', 'auto').lower()  # auto | binary | base64
 
 # Default torch model location (repo pi_model new_layer4)
 if not TORCH_MODEL_PATH:
@@ -41,6 +47,44 @@ if not TORCH_MODEL_PATH:
     elif alt2.exists():
         TORCH_MODEL_PATH = str(alt2)
 
+
+
+class SpanLog:
+    """Per-request span recorder. `finish()` prints one JSON line (and appends it
+    to TRACE_LOG_PATH if set) with monotonic offsets/durations per stage."""
+
+    def __init__(self, request_id):
+        self.request_id = request_id
+        self.t0 = time.monotonic()
+        self.spans = []
+
+    @contextmanager
+    def span(self, name):
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.spans.append({'name': name, 'start_ms': round((start - self.t0) * 1000.0, 2), 'dur_ms': round((time.monotonic() - start) * 1000.0, 2)})
+
+    def add(self, name, dur_ms):
+        if dur_ms is not None:
+            end_ms = (time.monotonic() - self.t0) * 1000.0
+            self.spans.append({'name': name, 'start_ms': round(end_ms - dur_ms, 2), 'dur_ms': round(dur_ms, 2)})
+
+    def finish(self, **fields):
+        record = {'requestId': self.request_id, 'device': DEVICE_NAME, 'ts': time.time(),
+                  'total_ms': round((time.monotonic() - self.t0) * 1000.0, 2), 'spans': self.spans}
+        record.update(fields)
+        line = json.dumps(record, separators=(',', ':'))
+        print('[trace]', line)
+        if TRACE_LOG_PATH:
+            try:
+                with open(TRACE_LOG_PATH, 'a') as f:
+                    f.write(line + '\n')
+            except Exception as e:
+                print('trace log write failed:', e)
+
+
 # lazy torch model
 _torch_model = None
 
@@ -62,7 +106,7 @@ def load_torch_model():
         _torch_model = None
         return None
 
-def run_local_torchscript(image_path):
+def run_local_torchscript(image_path, timings=None):
     try:
         import torch
         from PIL import Image
@@ -76,10 +120,15 @@ def run_local_torchscript(image_path):
             transforms.ToTensor(),
             transforms.Normalize(mean=[0.485,0.456,0.406], std=[0.229,0.224,0.225])
         ])
+        t = time.monotonic()
         img = Image.open(image_path).convert('RGB')
         inp = preprocess(img).unsqueeze(0).to(DEVICE)
+        t_pre = time.monotonic()
         with torch.no_grad():
             out = model(inp)
+            if timings is not None:
+                timings['preprocess_ms'] = (t_pre - t) * 1000.0
+                timings['inference_ms'] = (time.monotonic() - t_pre) * 1000.0
             probs = torch.nn.functional.softmax(out, dim=1)
             conf, idx = torch.max(probs, 1)
             # map to labels - prefer local labels.json if present
@@ -131,14 +180,46 @@ def b64_from_bytes(b):
     return base64.b64encode(b).decode('ascii')
 
 
-def upload_frame_to_server(device_id, b64frame):
+# What the backend announced in register_success (binary_frames, ...)
+server_info = {}
+
+
+def use_binary():
+    if IMAGE_TRANSPORT in ('binary', 'base64'):
+        return IMAGE_TRANSPORT == 'binary'
+    return bool(server_info.get('binary_frames'))
+
+
+def photo_payload(img, request_id):
+    """iot-photo body: JPEG bytes as a binary attachment, or base64 for older backends."""
+    payload = { 'requestId': request_id, 'device': DEVICE_NAME, 'mime': 'image/jpeg', 'bytes': len(img) }
+    if use_binary():
+        payload.update(image=img, encoding='binary')
+    else:
+        payload.update(image_b64=b64_from_bytes(img), encoding='base64')
+    return payload
+
+
+def upload_frame_to_server(device_id, img, request_id=None):
+    """POST the JPEG as the raw body; falls back to JSON base64 if the backend rejects it."""
     url = SERVER_URL.rstrip('/') + '/api/frame/upload_frame'
-    headers = { 'Content-Type': 'application/json' }
+    headers = { 'X-Device-Id': device_id }
     if DEVICE_TOKEN:
         headers['x-device-token'] = DEVICE_TOKEN
-    body = { 'device_id': device_id, 'frame': b64frame }
+    if request_id:
+        headers['X-Request-Id'] = str(request_id)
     try:
-        r = requests.post(url, json=body, headers=headers, timeout=10)
+        if IMAGE_TRANSPORT != 'base64':
+            r = requests.post(url, data=img, params={ 'device_id': device_id },
+                              headers=dict(headers, **{ 'Content-Type': 'image/jpeg' }), timeout=10)
+            print('upload_frame:', r.status_code, r.text[:200])
+            if r.status_code not in (400, 413, 415):
+                return r.ok
+            print('upload_frame: raw body rejected; retrying as base64 JSON')
+        body = { 'device_id': device_id, 'frame': b64_from_bytes(img) }
+        if request_id:
+            body['requestId'] = request_id
+        r = requests.post(url, json=body, headers=dict(headers, **{ 'Content-Type': 'application/json' }), timeout=10)
         print('upload_frame:', r.status_code, r.text[:200])
         return r.ok
     except Exception as e:
@@ -146,12 +227,15 @@ def upload_frame_to_server(device_id, b64frame):
         return False
 
 
-def post_model_result(device_id, result):
+def post_model_result(device_id, result, request_id=None):
     url = SERVER_URL.rstrip('/') + '/api/iot/model_result'
     headers = { 'Content-Type': 'application/json' }
     if DEVICE_TOKEN:
         headers['x-device-token'] = DEVICE_TOKEN
     body = { 'device_id': device_id, 'result': result }
+    if request_id:
+        headers['X-Request-Id'] = str(request_id)
+        body['requestId'] = request_id
     try:
         r = requests.post(url, json=body, headers=headers, timeout=10)
         print('model_result POST:', r.status_code, r.text[:200])
@@ -170,37 +254,13 @@ def run_local_model_stub(image_bytes):
     return { 'label': label, 'confidence': confidence }
 
 
-def run_local_tflite(image_path):
-    try:
-        # Basic outline: user must adapt to their model input/output format
-        from PIL import Image
-        import numpy as np
-        try:
-            from tflite_runtime.interpreter import Interpreter
-        except Exception:
-            from tensorflow.lite.python.interpreter import Interpreter
-        if not TFLITE_MODEL_PATH or not Path(TFLITE_MODEL_PATH).exists():
-            print('TFLITE_MODEL_PATH not set or file missing')
-            return None
-        interp = Interpreter(model_path=str(TFLITE_MODEL_PATH))
-        interp.allocate_tensors()
-        inp = interp.get_input_details()[0]
-        out = interp.get_output_details()[0]
-        # naive preprocessing: resize to expected size and normalize
-        w = inp['shape'][2]
-        h = inp['shape'][1]
-        img = Image.open(image_path).convert('RGB').resize((w,h))
-        arr = (np.asarray(img).astype('float32') / 255.0)[None, ...]
-        interp.set_tensor(inp['index'], arr)
-        interp.invoke()
-        output_data = interp.get_tensor(out['index'])
-        scores = output_data[0]
-        top = int(scores.argmax())
-        conf = float(scores[top])
-        return { 'label': f'class_{top}', 'confidence': round(conf,3) }
-    except Exception as e:
-        print('TFLite inference failed:', e)
+def run_local_tflite(image_path, timings=None):
+    # Shared with run_model.py: cached interpreter, labels manifest and int8 quantization
+    from run_model import run_tflite
+    if not TFLITE_MODEL_PATH or not Path(TFLITE_MODEL_PATH).exists():
+        print('TFLITE_MODEL_PATH not set or file missing')
         return None
+    return run_tflite(str(TFLITE_MODEL_PATH), image_path, timings=timings)
 
 
 @sio.event
@@ -216,6 +276,8 @@ def connect():
 @sio.on('register_success')
 def on_register_success(data):
     print('Register success:', data)
+    server_info.clear()
+    server_info.update(data if isinstance(data, dict) else {})
 
 
 @sio.on('register_error')
@@ -228,31 +290,37 @@ def on_run_model(payload):
     print('Received run_model:', payload)
     requestId = payload.get('requestId') if isinstance(payload, dict) else None
     params = payload.get('params') if isinstance(payload, dict) else {}
+    trace = SpanLog(requestId)
 
     # Capture image
     img = None
-    if USE_RASPISTILL:
-        img = capture_with_raspistill()
-    if not img:
-        img = capture_with_opencv()
+    with trace.span('capture'):
+        if USE_RASPISTILL:
+            img = capture_with_raspistill()
+        if not img:
+            img = capture_with_opencv()
     if not img:
         print('Capture failed')
         sio.emit('iot-model-result', {'requestId': requestId, 'device': DEVICE_NAME, 'error': 'capture_failed'})
+        trace.finish(error='capture_failed')
         return
 
     # Upload frame so website can show it
-    b64 = b64_from_bytes(img)
-    uploaded = upload_frame_to_server(DEVICE_NAME, b64)
+    with trace.span('upload'):
+        uploaded = upload_frame_to_server(DEVICE_NAME, img, request_id=requestId)
 
     # Emit iot-photo for immediate viewing
     try:
-        sio.emit('iot-photo', { 'requestId': requestId, 'device': DEVICE_NAME, 'image_b64': b64 })
-        print('Emitted iot-photo')
+        with trace.span('emit_photo'):
+            photo = photo_payload(img, requestId)
+            sio.emit('iot-photo', photo)
+        print('Emitted iot-photo', { 'bytes': len(img), 'encoding': photo['encoding'] })
     except Exception as e:
         print('emit iot-photo failed', e)
 
     # Run model locally (TFLite if present, otherwise stub)
     result = None
+    timings = {}
     # Save the capture to disk for tflite if needed
     try:
         with open(CAPTURE_PATH, 'wb') as f:
@@ -263,30 +331,35 @@ def on_run_model(payload):
     result = None
     try:
         if TORCH_MODEL_PATH and Path(TORCH_MODEL_PATH).exists():
-            result = run_local_torchscript(CAPTURE_PATH)
+            result = run_local_torchscript(CAPTURE_PATH, timings=timings)
     except Exception as e:
         print('Error attempting TorchScript inference:', e)
         result = None
 
     # Fallback to TFLite if TorchScript not available or failed
     if not result and TFLITE_MODEL_PATH and Path(TFLITE_MODEL_PATH).exists():
-        result = run_local_tflite(CAPTURE_PATH)
+        result = run_local_tflite(CAPTURE_PATH, timings=timings)
 
     # Final fallback to stub
     if not result:
         result = run_local_model_stub(img)
+    trace.add('preprocess', timings.get('preprocess_ms'))
+    trace.add('inference', timings.get('inference_ms'))
 
     # Attach optional metadata
     result_payload = { 'label': result.get('label'), 'confidence': result.get('confidence'), 'source': 'device' }
     # Emit via socket
     try:
-        sio.emit('iot-model-result', { 'requestId': requestId, 'device': DEVICE_NAME, 'result': result_payload })
+        with trace.span('emit'):
+            sio.emit('iot-model-result', { 'requestId': requestId, 'device': DEVICE_NAME, 'result': result_payload })
         print('Emitted iot-model-result')
     except Exception as e:
         print('emit iot-model-result failed', e)
 
     # Also POST to server for persistence
-    post_model_result(DEVICE_NAME, result_payload)
+    with trace.span('post_result'):
+        post_model_result(DEVICE_NAME, result_payload, request_id=requestId)
+    trace.finish(label=result_payload['label'], uploaded=bool(uploaded))
 
 
 @sio.event
@@ -22,30 +22,80 @@ def stub_result():
     return { 'label': random.choice(labels), 'confidence': round(random.uniform(0.6, 0.99), 3) }
 
 
-def run_tflite(model_path, image_path):
-    try:
-        from PIL import Image
-        import numpy as np
+# Fallback class names (same order as the ResNet checkpoint's outputs)
+DEFAULT_LABELS = ["Battery","Cables","Charger","Earphones","Headphones","Keyboard","Mobile","Mouse","PCBs","Printer","Remote Control","Smartwatch"]
+IMAGENET_MEAN = [0.485, 0.456, 0.406]
+IMAGENET_STD = [0.229, 0.224, 0.225]
+
+_interpreters = {}
+
+
+def load_manifest(model_path):
+    """Labels manifest written by convert_to_tflite.py (`<model>.labels.json`).
+    Falls back to a plain list in labels.json next to this script."""
+    base, _ = os.path.splitext(model_path)
+    for path in (base + '.labels.json', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'labels.json')):
+        if os.path.exists(path):
+            with open(path) as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {'labels': data}
+    return {'labels': DEFAULT_LABELS}
+
+
+def _get_interpreter(model_path):
+    # building the interpreter (and XNNPACK's packed weights) is expensive; do it once per model
+    if model_path not in _interpreters:
         try:
             # try tflite-runtime first
             from tflite_runtime.interpreter import Interpreter
         except Exception:
             from tensorflow.lite.python.interpreter import Interpreter
-        interp = Interpreter(model_path=model_path)
+        threads = int(os.environ.get('TFLITE_THREADS', '0')) or os.cpu_count() or 1
+        interp = Interpreter(model_path=model_path, num_threads=threads)
         interp.allocate_tensors()
+        _interpreters[model_path] = (interp, load_manifest(model_path))
+    return _interpreters[model_path]
+
+
+def run_tflite(model_path, image_path, timings=None):
+    try:
+        import time
+        from PIL import Image
+        import numpy as np
+        interp, manifest = _get_interpreter(model_path)
         inp = interp.get_input_details()[0]
         out = interp.get_output_details()[0]
-        # simplistic: resize to expected shape
         w = int(inp['shape'][2])
         h = int(inp['shape'][1])
-        img = Image.open(image_path).convert('RGB').resize((w,h))
-        arr = (np.asarray(img).astype('float32') / 255.0)[None, ...]
+        t = time.monotonic()
+        cfg = manifest.get('input', {})
+        img = Image.open(image_path).convert('RGB').resize((w,h), Image.BILINEAR)
+        arr = np.asarray(img).astype('float32') / 255.0
+        arr = (arr - np.array(cfg.get('mean', IMAGENET_MEAN), 'float32')) / np.array(cfg.get('std', IMAGENET_STD), 'float32')
+        if inp['dtype'] != np.float32:
+            # full-integer model: quantize with the input tensor's scale / zero point
+            scale, zero_point = inp['quantization']
+            info = np.iinfo(inp['dtype'])
+            arr = np.clip(np.round(arr / scale + zero_point), info.min, info.max)
+        arr = arr.astype(inp['dtype'])[None, ...]
+        t_pre = time.monotonic()
         interp.set_tensor(inp['index'], arr)
         interp.invoke()
         output_data = interp.get_tensor(out['index'])[0]
+        if timings is not None:
+            timings['preprocess_ms'] = (t_pre - t) * 1000.0
+            timings['inference_ms'] = (time.monotonic() - t_pre) * 1000.0
+        if output_data.dtype != np.float32:
+            scale, zero_point = out['quantization']
+            output_data = (output_data.astype('float32') - zero_point) * scale
+        if manifest.get('output', {}).get('kind', 'logits') == 'logits':
+            e = np.exp(output_data - output_data.max())
+            output_data = e / e.sum()
         top = int(output_data.argmax())
         conf = float(output_data[top])
-        return { 'label': f'class_{top}', 'confidence': round(conf, 3) }
+        labels = manifest.get('labels') or []
+        label = labels[top] if top < len(labels) else f'class_{top}'
+        return { 'label': label, 'confidence': round(conf, 3) }
     except Exception as e:
         print('TFLite inference failed:', e, file=sys.stderr)
         return None
@@ -4,6 +4,9 @@ CLI helper to upload a local image file to the backend frame server.
 
 Usage:
   python3 send_frame.py --file ./capture.jpg --device raspi-1 --server http://backend:5000
+
+--format picks the body: raw JPEG (default), multipart form (`frame` file) or
+the old JSON base64 for backends without binary uploads.
 """
 import argparse
 import base64
@@ -16,6 +19,7 @@ p.add_argument('--file', '-f', required=True)
 p.add_argument('--device', '-d', default='raspi-1')
 p.add_argument('--server', '-s', default=os.environ.get('EW_BACKEND_URL', 'http://127.0.0.1:5000'))
 p.add_argument('--token', '-t', default=os.environ.get('DEVICE_TOKEN', ''))
+p.add_argument('--format', choices=['raw', 'multipart', 'base64'], default='raw')
 args = p.parse_args()
 
 if not os.path.exists(args.file):
@@ -23,13 +27,21 @@ if not os.path.exists(args.file):
     sys.exit(2)
 with open(args.file, 'rb') as f:
     b = f.read()
-b64 = base64.b64encode(b).decode('ascii')
 url = args.server.rstrip('/') + '/api/frame/upload_frame'
-headers = {'Content-Type': 'application/json'}
+headers = {}
 if args.token:
     headers['x-device-token'] = args.token
+mime = 'image/png' if b[:4] == b'\x89PNG' else 'image/jpeg'
 try:
-    r = requests.post(url, json={'device_id': args.device, 'frame': b64}, headers=headers, timeout=10)
+    if args.format == 'raw':
+        headers['Content-Type'] = mime
+        r = requests.post(url, data=b, params={'device_id': args.device}, headers=headers, timeout=10)
+    elif args.format == 'multipart':
+        r = requests.post(url, data={'device_id': args.device},
+                          files={'frame': (os.path.basename(args.file), b, mime)}, headers=headers, timeout=10)
+    else:
+        b64 = base64.b64encode(b).decode('ascii')
+        r = requests.post(url, json={'device_id': args.device, 'frame': b64}, headers=headers, timeout=10)
     print('status', r.status_code, r.text[:400])
 except Exception as e:
     print('upload failed', e)
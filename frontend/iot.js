@@ -224,14 +224,28 @@ function setupUi() {
   socket.on('connect', () => {
     console.log('IoT socket connected', socket.id);
     updateStatus();
+    // the backend forgets subscriptions of a dropped socket; subscribe again
+    if (_liveDevice) socket.emit('live-view-subscribe', { device: _liveDevice });
   });
 
+  let _captureObjectUrl = null;
   socket.on('iot-photo', (payload) => {
     console.log('Received iot-photo', payload);
     showCaptureLoading(false);
+    // Binary attachment ({ image: ArrayBuffer, mime, bytes }): show and persist the bytes as they are
+    const imgBytes = payload && (payload.image instanceof ArrayBuffer || ArrayBuffer.isView(payload.image)) ? payload.image : null;
     // Accept multiple possible keys from various Pi/client implementations
-    const imgB64 = payload && (payload.imageBase64 || payload.image_b64 || payload.image || payload.frame || payload.img);
-    if (imgContainer && imgB64) {
+    const imgB64 = payload && !imgBytes && (payload.imageBase64 || payload.image_b64 || payload.image || payload.frame || payload.img);
+    if (imgContainer && imgBytes) {
+      const mime = payload.mime || 'image/jpeg';
+      if (_captureObjectUrl) URL.revokeObjectURL(_captureObjectUrl);
+      _captureObjectUrl = URL.createObjectURL(new Blob([imgBytes], { type: mime }));
+      imgContainer.innerHTML = `<img src="${_captureObjectUrl}" style="width:100%; max-width:640px; height:auto; border-radius:8px;"/>`;
+      try {
+        const deviceId = payload.device || payload.device_id || (document.getElementById('piDeviceIdInput') && document.getElementById('piDeviceIdInput').value) || 'raspi-1';
+        persistFrameToServer(deviceId, imgBytes, mime).catch((e) => console.warn('persistFrameToServer failed', e));
+      } catch (e) { /* ignore */ }
+    } else if (imgContainer && imgB64) {
       // Basic validation: try to detect common image formats by magic bytes (JPEG or PNG)
       let mime = null;
       try {
@@ -269,19 +283,28 @@ function setupUi() {
     try { _piCaptureInFlight = false; } catch(e){}
   });
 
-  // Persist an incoming base64 frame to the backend frame server so
+  // Persist an incoming frame (base64 string or raw image bytes) to the backend frame server so
   // `GET /api/frame/latest_frame` and SSE `/api/frame/stream/:deviceId` can be used.
-  async function persistFrameToServer(deviceId, base64Frame) {
-    if (!deviceId || !base64Frame) return;
+  async function persistFrameToServer(deviceId, frame, mime = 'image/jpeg') {
+    if (!deviceId || !frame) return;
+    const isBytes = typeof frame !== 'string';
     try {
       // If in mock mode, store the latest frame locally and skip network
       if (getMockEnabled && getMockEnabled()) {
-        try { localStorage.setItem(`mock_latest_frame_${deviceId}`, base64Frame); } catch (e) {}
+        try {
+          let b64 = frame;
+          if (isBytes) {
+            const bytes = ArrayBuffer.isView(frame) ? new Uint8Array(frame.buffer, frame.byteOffset, frame.byteLength) : new Uint8Array(frame);
+            b64 = btoa(Array.from(bytes, (c) => String.fromCharCode(c)).join(''));
+          }
+          localStorage.setItem(`mock_latest_frame_${deviceId}`, b64);
+        } catch (e) {}
         return;
       }
       const url = `${ORIGIN.replace(/\/$/, '')}/api/frame/upload_frame`;
-      const body = { device_id: deviceId, frame: base64Frame };
-      const res = await fetch(url, { method: 'POST', headers: { 'Content-Type': 'application/json' }, body: JSON.stringify(body) });
+      const res = isBytes
+        ? await fetch(`${url}?device_id=${encodeURIComponent(deviceId)}`, { method: 'POST', headers: { 'Content-Type': mime }, body: frame })
+        : await fetch(url, { method: 'POST', headers: { 'Content-Type': 'application/json' }, body: JSON.stringify({ device_id: deviceId, frame }) });
       if (!res.ok) {
         const txt = await res.text().catch(() => `Status ${res.status}`);
         console.warn('persistFrameToServer: upload failed', res.status, txt.slice(0,200));
@@ -300,9 +323,29 @@ function setupUi() {
     updateStatus();
   });
 
-  // Remote Pi feed handlers (SSE + fetch latest)
+  // Remote Pi feed handlers (live view + SSE + fetch latest)
   let _piEvt = null;
   let _piPolling = null;
+  // Live view: while subscribed, the Pi streams frames to us as iot-live-frame ({ image, mime, device, seq })
+  let _liveDevice = null;
+  let _liveObjectUrl = null;
+  socket.on('iot-live-frame', (payload) => {
+    if (!payload || !_liveDevice || payload.device !== _liveDevice) return;
+    const img = document.getElementById('remoteFrameImg');
+    if (!img) return;
+    const mime = payload.mime || 'image/jpeg';
+    if (payload.image instanceof ArrayBuffer || ArrayBuffer.isView(payload.image)) {
+      const prev = _liveObjectUrl;
+      _liveObjectUrl = URL.createObjectURL(new Blob([payload.image], { type: mime }));
+      img.src = _liveObjectUrl;
+      if (prev) URL.revokeObjectURL(prev);
+    } else if (payload.image_b64) {
+      img.src = `data:${mime};base64,${payload.image_b64}`;
+    } else {
+      return;
+    }
+    img.style.display = 'block';
+  });
   async function fetchAndUpdatePiFrame(deviceId) {
     try {
       // If mock mode is enabled, read the latest mock frame from localStorage
@@ -390,6 +433,8 @@ function setupUi() {
         fetchAndUpdatePiFrame(deviceId);
         if (!_piPolling) _piPolling = setInterval(() => fetchAndUpdatePiFrame(deviceId), 2000);
       } else {
+        _liveDevice = deviceId;
+        socket.emit('live-view-subscribe', { device: deviceId });
         _piEvt = new EventSource(`${ORIGIN.replace(/\/$/, '')}/api/frame/stream/${encodeURIComponent(deviceId)}`);
         _piEvt.onmessage = (e) => {
           // when event arrives, fetch latest frame and update image
@@ -414,6 +459,8 @@ function setupUi() {
       if (_piEvt) { _piEvt.close(); _piEvt = null; }
     } catch (e) { /* ignore */ }
     try { if (_piPolling) { clearInterval(_piPolling); _piPolling = null; } } catch (e) { }
+    if (_liveDevice) { socket.emit('live-view-unsubscribe', { device: _liveDevice }); _liveDevice = null; }
+    if (_liveObjectUrl) { URL.revokeObjectURL(_liveObjectUrl); _liveObjectUrl = null; }
     const img = document.getElementById('remoteFrameImg'); if (img) img.style.display = 'none';
   }
 
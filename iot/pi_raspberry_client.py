@@ -98,7 +98,10 @@ def on_run_model(payload):
         b64 = image_file_to_b64(img_path)
         # If MODEL_SERVICE_URL provided, call it and then emit iot-model-result
         if MODEL_SERVICE_URL:
-            j = requests.post(MODEL_SERVICE_URL, json={'image_b64': b64}, timeout=30).json()
+            headers = {'X-Request-Id': str(reqid)} if reqid else {}
+            resp = requests.post(MODEL_SERVICE_URL, json={'image_b64': b64}, headers=headers, timeout=30)
+            print('Model service Server-Timing:', resp.headers.get('Server-Timing'))
+            j = resp.json()
             result = { 'requestId': reqid, 'label': j.get('label'), 'confidence': j.get('confidence'), 'device': DEVICE_NAME }
             sio.emit('iot-model-result', result)
             print('Posted to model service and emitted result')
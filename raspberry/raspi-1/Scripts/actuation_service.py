@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+"""Long-lived actuation service for the sorter (stepper carousel + servo gate).
+
+Spawning `Scripts/main.py` per item re-imports torch, creates a new pigpio
+factory and re-runs the servo import-time homing (which moves the gate and
+sleeps a second) every time. `ActuationService` does that set-up once and
+then executes sort commands from a queue on a single worker thread, so a
+command is dispatched in milliseconds and commands never overlap on the
+hardware.
+
+Use it in-process (pi_client.py does this with ACTUATION_MODE=service), or
+run it as a daemon behind a local Unix socket:
+
+    python3 Scripts/actuation_service.py --socket /tmp/ew-actuation.sock
+
+and send JSON lines such as `{"cmd": "sort", "label": "Battery"}`
+(see `send_command`). Replies are one JSON line per request.
+"""
+import argparse
+import json
+import os
+import queue
+import socket
+import socketserver
+import threading
+import time
+from concurrent.futures import Future
+
+from trace_log import RequestTrace, activate, phase
+
+CATEGORY_MAP = {
+    "Cables": 1, "Charger": 1,
+    "Headphones": 2,
+    "Battery": 3,
+    "PCBs": 4, "Earphones": 2,
+    "Mobile": 5, "Mouse": 5, "Printer": 5, "Remote Control": 5, "Smartwatch": 5,"Keyboard": 5
+    }
+
+# Pauses around the gate cycle (same defaults as the original main.py sequence)
+SETTLE_AT_CATEGORY_SEC = float(os.environ.get('ACTUATION_SETTLE_SEC', '3'))
+SETTLE_AFTER_DROP_SEC = float(os.environ.get('ACTUATION_AFTER_DROP_SEC', '3'))
+SETTLE_AFTER_RETURN_SEC = float(os.environ.get('ACTUATION_AFTER_RETURN_SEC', '1'))
+
+# When the carousel goes back to Cat 1: 'always' after every item (old behaviour),
+# 'idle' after ACTUATION_IDLE_HOME_SEC without work, or 'never' (only on shutdown).
+# Otherwise the next item moves straight from the current bin.
+RETURN_HOME = os.environ.get('ACTUATION_RETURN_HOME', 'idle').lower()
+IDLE_HOME_SEC = float(os.environ.get('ACTUATION_IDLE_HOME_SEC', '10'))
+
+DEFAULT_SOCKET_PATH = os.environ.get('ACTUATION_SOCKET', '/tmp/ew-actuation.sock')
+
+
+SETTLE_DEFAULTS = (SETTLE_AT_CATEGORY_SEC, SETTLE_AFTER_DROP_SEC, SETTLE_AFTER_RETURN_SEC)
+
+
+class InterlockError(RuntimeError):
+    """Raised instead of opening the gate when the carousel is not at the item's bin."""
+
+
+def run_sort_cycle(category, stepper, servo, on_dropped=None, settle=SETTLE_DEFAULTS, position_check=None,
+                   return_home=True):
+    """Move the carousel to `category`, open/close the gate and (if `return_home`) return home.
+
+    `on_dropped()` is called as soon as the gate has closed again (the item
+    has left the gate), before the carousel returns home; the pipeline
+    scheduler uses it to start capturing the next item. `position_check()`
+    must return True right before the gate opens, otherwise the item is not
+    dropped and InterlockError is raised.
+    """
+    settle_at, settle_drop, settle_return = settle
+    stepper.move_to_category(category)
+    with phase('settle_at_category'):
+        time.sleep(settle_at)  # Wait a moment at the category position
+    if position_check is not None and not position_check():
+        raise InterlockError(f'carousel not at category {category}; gate kept closed')
+    with phase('gate'):
+        if hasattr(servo, 'open_gate'):
+            # the servos settle and detach in the background while the carousel moves on
+            gate = servo.open_gate()
+            gate.wait_closed()
+            if gate.done():
+                gate.result()  # raises if the cycle failed
+        else:
+            servo.run_servo()
+    if on_dropped is not None:
+        on_dropped()
+    with phase('settle_after_drop'):
+        time.sleep(settle_drop)  # Wait a moment before returning
+    if return_home:
+        stepper.return_to_initial(category)
+        with phase('settle_after_return'):
+            time.sleep(settle_return)
+
+
+class ActuationService:
+    """Owns the initialised stepper/servo modules and runs sort commands serially."""
+
+    def __init__(self, stepper=None, servo=None, settle=SETTLE_DEFAULTS, return_home=RETURN_HOME,
+                 idle_home_s=IDLE_HOME_SEC):
+        self._queue = queue.Queue()
+        self._thread = None
+        self._ready = threading.Event()
+        self._init_error = None
+        # pre-initialised (or simulated) stepper/servo modules skip the GPIO set-up
+        self.stepper = stepper
+        self.servo = servo
+        self.settle = settle
+        self.return_home = return_home
+        self.idle_home_s = idle_home_s
+        self.position = 1  # carousel starts at category 1 (home)
+        self.completed = 0
+        self.busy = False
+
+    def start(self, wait=True, timeout=30.0):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='actuation-service', daemon=True)
+            self._thread.start()
+        if wait:
+            self._ready.wait(timeout)
+            if self._init_error is not None:
+                raise RuntimeError(f'actuation hardware init failed: {self._init_error}')
+        return self
+
+    def _init_hardware(self):
+        if self.stepper is not None and self.servo is not None:
+            return
+        from pin_factory import ensure_pin_factory
+        t = time.monotonic()
+        ensure_pin_factory()
+        import new_stepper_code  # enables the driver on import
+        import servo_control  # homes the gate on import
+        self.stepper = new_stepper_code
+        self.servo = servo_control
+        print(f'[actuation] hardware ready in {time.monotonic() - t:.2f}s')
+
+    def _run(self):
+        try:
+            self._init_hardware()
+        except Exception as e:
+            self._init_error = repr(e)
+            print('[actuation] hardware init failed:', repr(e))
+        finally:
+            self._ready.set()
+
+        while True:
+            try:
+                item = self._queue.get(timeout=self._idle_timeout())
+            except queue.Empty:
+                self._go_home('idle')
+                continue
+            if item is None:
+                # the carousel is assumed to be at home when the next process starts
+                self._go_home('shutdown')
+                break
+            fut, category, label, request_id, enqueued, on_dropped = item
+            if self._init_error is not None:
+                fut.set_exception(RuntimeError(self._init_error))
+                continue
+            if category not in self.categories():
+                fut.set_exception(ValueError(f'Unknown category {category}'))
+                continue
+            started = time.monotonic()
+            dropped = {}
+            self.busy = True
+
+            def _dropped():
+                dropped['ms'] = round((time.monotonic() - started) * 1000.0, 2)
+                if on_dropped is not None:
+                    on_dropped()
+
+            # per-phase timings of this cycle (stepper, servo, pauses) as one trace line
+            trace = RequestTrace(request_id, kind='sort_cycle', label=label, category=category,
+                                 queue_ms=round((started - enqueued) * 1000.0, 2))
+            try:
+                print(f'[actuation] sort label={label} category={category} requestId={request_id}')
+                with activate(trace):
+                    run_sort_cycle(category, _TrackedStepper(self), self.servo, on_dropped=_dropped, settle=self.settle,
+                                   position_check=lambda: self.carousel_category(self.position) == category,
+                                   return_home=self.return_home == 'always')
+                self.completed += 1
+                trace.finish(drop_ms=dropped.get('ms'))
+                fut.set_result({
+                    'label': label,
+                    'category': category,
+                    'requestId': request_id,
+                    'queue_ms': round((started - enqueued) * 1000.0, 2),
+                    'drop_ms': dropped.get('ms'),
+                    'actuation_ms': round((time.monotonic() - started) * 1000.0, 2),
+                })
+            except Exception as e:
+                print('[actuation] sort failed:', e)
+                trace.finish(error=str(e))
+                fut.set_exception(e)
+            finally:
+                self.busy = False
+
+    def categories(self):
+        """Categories the stepper has a bin position for."""
+        positions = getattr(self.stepper, 'CATEGORY_POSITIONS', None)
+        return set(positions) if positions else set(CATEGORY_MAP.values())
+
+    def carousel_category(self, assumed=None):
+        """Where the stepper's own tracker says the carousel is (None between bins or unknown).
+
+        The tracker is what moved the motor, so the gate interlock reads it
+        rather than what was asked for. `assumed` is returned for steppers
+        without one.
+        """
+        carousel = getattr(self.stepper, 'CAROUSEL', None) or getattr(self.stepper, 'carousel', None)
+        return carousel.category if carousel is not None else assumed
+
+    def _idle_timeout(self):
+        if self.return_home == 'idle' and self.position != 1 and self._init_error is None:
+            return self.idle_home_s
+        return None
+
+    def _go_home(self, reason):
+        if self.position == 1 or self._init_error is not None or self.stepper is None:
+            return
+        self.busy = True
+        try:
+            print(f'[actuation] returning home ({reason})')
+            trace = RequestTrace(None, kind='return_home', reason=reason)
+            with activate(trace):
+                _TrackedStepper(self).return_to_initial(self.position)
+            trace.finish()
+        except Exception as e:
+            print('[actuation] return home failed:', e)
+        finally:
+            self.busy = False
+
+    def submit(self, label=None, category=None, request_id=None, on_dropped=None):
+        """Queue one sort. Returns a Future with timing info once the cycle is done.
+
+        `on_dropped()` runs on the actuation thread right after the gate closes.
+        """
+        fut = Future()
+        if category is None:
+            category = CATEGORY_MAP.get(label)
+        if category is None:
+            fut.set_exception(ValueError(f'No category mapping for label {label!r}'))
+            return fut
+        try:
+            known = int(category) in self.categories()
+        except (TypeError, ValueError):
+            known = False
+        if not known:
+            fut.set_exception(ValueError(f'Unknown category {category!r} for label {label!r}'))
+            return fut
+        self.start(wait=False)
+        self._queue.put((fut, int(category), label, request_id, time.monotonic(), on_dropped))
+        return fut
+
+    def status(self):
+        return {
+            'ready': self._ready.is_set() and self._init_error is None,
+            'error': self._init_error,
+            'busy': self.busy,
+            'position': self.position,
+            'queued': self._queue.qsize(),
+            'completed': self.completed,
+        }
+
+    def close(self):
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout=60)
+        for mod in (self.stepper, self.servo):
+            try:
+                if mod is not None:
+                    mod.cleanup()
+            except Exception as e:
+                print('[actuation] cleanup error:', e)
+
+
+class _TrackedStepper:
+    """Wraps the stepper module so the service knows where the carousel is."""
+
+    def __init__(self, service):
+        self._service = service
+
+    def move_to_category(self, category):
+        self._service.position = None  # moving
+        self._service.stepper.move_to_category(category)
+        self._service.position = self._service.carousel_category(category)
+
+    def return_to_initial(self, category):
+        self._service.position = None
+        self._service.stepper.return_to_initial(category)
+        self._service.position = self._service.carousel_category(1)
+
+
+_shared_service = None
+_shared_lock = threading.Lock()
+
+
+def get_service():
+    """Process-wide service instance (started lazily in the background)."""
+    global _shared_service
+    with _shared_lock:
+        if _shared_service is None:
+            _shared_service = ActuationService().start(wait=False)
+        return _shared_service
+
+
+# --- Local socket daemon ---
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        service = self.server.service
+        for raw in self.rfile:
+            try:
+                req = json.loads(raw.decode('utf-8'))
+                cmd = req.get('cmd')
+                if cmd == 'sort':
+                    fut = service.submit(label=req.get('label'), category=req.get('category'),
+                                         request_id=req.get('requestId'))
+                    if req.get('wait', True):
+                        reply = {'ok': True, 'result': fut.result(timeout=req.get('timeout', 120))}
+                    else:
+                        reply = {'ok': True, 'queued': True}
+                elif cmd == 'status':
+                    reply = {'ok': True, 'status': service.status()}
+                elif cmd == 'ping':
+                    reply = {'ok': True}
+                else:
+                    reply = {'ok': False, 'error': f'unknown cmd {cmd!r}'}
+            except Exception as e:
+                reply = {'ok': False, 'error': str(e)}
+            self.wfile.write((json.dumps(reply) + '\n').encode('utf-8'))
+            self.wfile.flush()
+
+
+class ActuationSocketServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path, service):
+        if os.path.exists(path):
+            os.remove(path)
+        super().__init__(path, _Handler)
+        self.service = service
+
+
+def send_command(payload, path=DEFAULT_SOCKET_PATH, timeout=120.0):
+    """Send one JSON command to a running daemon and return its JSON reply."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        s.settimeout(timeout)
+        s.connect(path)
+        s.sendall((json.dumps(payload) + '\n').encode('utf-8'))
+        buf = b''
+        while not buf.endswith(b'\n'):
+            chunk = s.recv(4096)
+            if not chunk:
+                break
+            buf += chunk
+    return json.loads(buf.decode('utf-8'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Persistent actuation daemon for the sorter')
+    parser.add_argument('--socket', default=DEFAULT_SOCKET_PATH)
+    args = parser.parse_args()
+
+    service = ActuationService().start()
+    server = ActuationSocketServer(args.socket, service)
+    print(f'[actuation] listening on {args.socket}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print('\n[actuation] stopping')
+    finally:
+        server.server_close()
+        service.close()
+        try:
+            os.remove(args.socket)
+        except OSError:
+            pass
+
+
+if __name__ == '__main__':
+    main()
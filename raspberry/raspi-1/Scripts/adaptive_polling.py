@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""Adaptive bin polling driven by per-bin fill-rate estimates.
+
+The monitors used to sweep every `UPDATE_INTERVAL` (2 s or 10 s) whether or
+not anything was being thrown in. `AdaptivePoller` picks the delay before the
+next sweep from the readings themselves:
+
+- every bin's fill rate (%/min) is the least-squares slope of its readings in
+  the last `POLL_RATE_WINDOW_SEC`, which gives a time-to-full prediction;
+- a bin that is filling (rate >= `POLL_FILLING_PCT_PER_MIN`) is polled at
+  `POLL_HEADROOM_FRACTION` of its predicted time to full, never slower than
+  the start interval. The interval shrinks with the headroom left, down to
+  `POLL_MIN_SEC` just before the bin fills, so the sweep that sees it full
+  follows the crossing closely;
+- a static bin backs off by `POLL_BACKOFF` per sweep up to `POLL_MAX_SEC`
+  (only up to the start interval between `POLL_NEAR_FULL_PCT` and full), but
+  never beyond the same fraction of its predicted time to full;
+- a bin whose sensor does not answer stays at the start interval.
+
+All bins are swept together, so the next sweep is the shortest interval any
+bin asks for. `ADAPTIVE_POLLING=0` keeps the fixed `UPDATE_INTERVAL`.
+
+Replay a simulated day to compare sweeps and detection delay with a fixed interval:
+
+    python3 Scripts/adaptive_polling.py --hours 24
+"""
+import argparse
+import os
+import random
+import time
+from collections import deque
+
+ADAPTIVE_POLLING = os.environ.get('ADAPTIVE_POLLING', '1') not in ('0', 'false', 'False')
+POLL_MIN_SEC = float(os.environ.get('POLL_MIN_SEC', '2'))
+POLL_MAX_SEC = float(os.environ.get('POLL_MAX_SEC', '120'))
+POLL_BACKOFF = float(os.environ.get('POLL_BACKOFF', '1.5'))
+POLL_NEAR_FULL_PCT = float(os.environ.get('POLL_NEAR_FULL_PCT', '85'))
+POLL_FILLING_PCT_PER_MIN = float(os.environ.get('POLL_FILLING_PCT_PER_MIN', '1.0'))
+POLL_HEADROOM_FRACTION = float(os.environ.get('POLL_HEADROOM_FRACTION', '0.25'))
+POLL_RATE_WINDOW_SEC = float(os.environ.get('POLL_RATE_WINDOW_SEC', '300'))
+
+MIN_RATE_SPAN_SEC = 20.0  # need readings at least this far apart for a slope
+FULL_PCT = 95.0  # the backend marks a bin full from here on; time to full is measured to this level
+
+
+class FillRateEstimator:
+    """Fill rate of one bin from its recent readings."""
+
+    def __init__(self, window_s=POLL_RATE_WINDOW_SEC, max_points=60):
+        self.window_s = window_s
+        self.points = deque(maxlen=max_points)
+
+    def add(self, fill_percent, t):
+        self.points.append((t, fill_percent))
+        while self.points and t - self.points[0][0] > self.window_s:
+            self.points.popleft()
+
+    def rate_pct_per_min(self):
+        """Least-squares slope of the window in %/min, or None with too little history."""
+        if len(self.points) < 3 or self.points[-1][0] - self.points[0][0] < MIN_RATE_SPAN_SEC:
+            return None
+        n = len(self.points)
+        mean_t = sum(t for t, _ in self.points) / n
+        mean_f = sum(f for _, f in self.points) / n
+        var = sum((t - mean_t) ** 2 for t, _ in self.points)
+        cov = sum((t - mean_t) * (f - mean_f) for t, f in self.points)
+        return cov / var * 60.0 if var else None
+
+    def time_to_full_s(self, full_pct=None):
+        """Predicted seconds until `full_pct` at the current rate (None if not filling)."""
+        rate = self.rate_pct_per_min()
+        if not self.points or rate is None or rate <= 0:
+            return None
+        return max(0.0, ((FULL_PCT if full_pct is None else full_pct) - self.points[-1][1]) / rate * 60.0)
+
+
+class AdaptivePoller:
+    """Chooses the delay before the next sweep of all bins."""
+
+    def __init__(self, start_s, min_s=POLL_MIN_SEC, max_s=POLL_MAX_SEC, backoff=POLL_BACKOFF,
+                 near_full_pct=POLL_NEAR_FULL_PCT, filling_pct_per_min=POLL_FILLING_PCT_PER_MIN,
+                 headroom_fraction=POLL_HEADROOM_FRACTION, window_s=POLL_RATE_WINDOW_SEC):
+        self.start_s = min(max(start_s, min_s), max_s)
+        self.min_s = min_s
+        self.max_s = max_s
+        self.backoff = backoff
+        self.near_full_pct = near_full_pct
+        self.filling_pct_per_min = filling_pct_per_min
+        self.headroom_fraction = headroom_fraction
+        self.window_s = window_s
+        self.estimators = {}
+        self._interval = {}  # bin_id -> interval it asked for last time
+
+    def _bin_interval(self, bin_id, fill):
+        est = self.estimators[bin_id]
+        if fill is None:
+            return self.start_s
+        rate = est.rate_pct_per_min()
+        ttf = est.time_to_full_s() if fill < FULL_PCT else None
+        if ttf is not None and rate >= self.filling_pct_per_min:
+            # filling: a fixed share of the headroom left, so sweeps close in on the moment it fills
+            return min(self.start_s, max(self.min_s, ttf * self.headroom_fraction))
+        # near full, and a first full reading that may still be noise, stay at the start interval;
+        # a bin that reads full twice in a row is full and can back off until it is emptied
+        points = est.points
+        confirmed_full = fill >= FULL_PCT and len(points) >= 2 and points[-2][1] >= FULL_PCT
+        cap = self.max_s if fill < self.near_full_pct or confirmed_full else self.start_s
+        interval = min(cap, self._interval.get(bin_id, self.start_s) * self.backoff)
+        if ttf is not None:
+            interval = min(interval, max(self.min_s, ttf * self.headroom_fraction))
+        return interval
+
+    def update(self, readings, now=None):
+        """Feed one sweep's readings; returns the seconds to wait before the next sweep."""
+        now = time.monotonic() if now is None else now
+        intervals = []
+        for r in readings:
+            bin_id, fill = r['bin_id'], r.get('fill_percent')
+            est = self.estimators.setdefault(bin_id, FillRateEstimator(self.window_s))
+            if fill is not None:
+                est.add(fill, now)
+            self._interval[bin_id] = self._bin_interval(bin_id, fill)
+            intervals.append(self._interval[bin_id])
+        return min(intervals) if intervals else self.start_s
+
+    def status(self, bin_id):
+        """Fill rate and predicted time to full of a bin, for logs and check_fill."""
+        est = self.estimators.get(bin_id)
+        if est is None:
+            return {}
+        rate = est.rate_pct_per_min()
+        ttf = est.time_to_full_s()
+        return {
+            'fill_rate_pct_min': round(rate, 2) if rate is not None else None,
+            'time_to_full_s': round(ttf) if ttf is not None else None,
+        }
+
+
+# --- Replay ---
+
+def simulate_day(hours, fixed_s, seed=0, bins=5, noise_pct=0.5):
+    """Bins that are static most of the time, fill in bursts and are emptied a while after
+    they fill up; compares polling at a fixed interval with adaptive polling."""
+    rng = random.Random(seed)
+    seconds = int(hours * 3600)
+    levels = []  # per bin, true fill level at every second
+    for _ in range(bins):
+        level, rate, burst_end, next_burst, empty_at = 0.0, 0.0, 0, rng.uniform(0, 3600), None
+        trace = []
+        for t in range(seconds):
+            if t >= next_burst:
+                rate = rng.uniform(1.0, 4.0) / 60.0
+                burst_end = t + rng.uniform(120, 900)
+                next_burst = burst_end + rng.expovariate(1 / 3600.0)
+            if t < burst_end:
+                level = min(100.0, level + rate)
+            if level >= 100.0 and empty_at is None:
+                empty_at = t + rng.uniform(1800, 7200)
+            if empty_at is not None and t >= empty_at:
+                level, empty_at = 0.0, None
+            trace.append(level)
+        levels.append(trace)
+
+    # seconds at which each bin really crosses FULL_PCT
+    crossings = [[t for t in range(1, seconds) if trace[t] >= FULL_PCT > trace[t - 1]] for trace in levels]
+
+    def run(adaptive):
+        poller = AdaptivePoller(fixed_s)
+        t, sweeps, detect = 0.0, 0, []
+        shown_since = {}  # bin -> time since which its readings have shown it full (what the backend shows)
+        next_crossing = [0] * bins
+        while t < seconds:
+            readings = []
+            for b in range(bins):
+                fill = max(0.0, levels[b][int(t)] + rng.gauss(0, noise_pct))
+                readings.append({'bin_id': b, 'fill_percent': fill})
+                if fill >= FULL_PCT:
+                    shown_since.setdefault(b, t)
+                else:
+                    shown_since.pop(b, None)
+                # delay from the real crossing until the bin is shown full; 0 if a noisy
+                # reading already showed it full before it got there
+                i = next_crossing[b]
+                if i < len(crossings[b]) and crossings[b][i] <= t and b in shown_since:
+                    detect.append(max(0.0, shown_since[b] - crossings[b][i]))
+                    next_crossing[b] += 1
+            sweeps += 1
+            t += poller.update(readings, now=t) if adaptive else fixed_s
+        return {'sweeps': sweeps, 'full_events': len(detect),
+                'mean_full_detection_s': round(sum(detect) / len(detect), 1) if detect else None,
+                'max_full_detection_s': round(max(detect), 1) if detect else None}
+
+    return {'fixed': run(False), 'adaptive': run(True)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--hours', type=float, default=24.0)
+    parser.add_argument('--fixed-interval', type=float, default=float(os.environ.get('UPDATE_INTERVAL', '10')))
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    import json
+    report = simulate_day(args.hours, args.fixed_interval, args.seed)
+    report['sweep_reduction'] = round(report['fixed']['sweeps'] / max(1, report['adaptive']['sweeps']), 1)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,263 @@
+"""Bin-level telemetry uplink shared by the ultrasonic monitors and pi_client.
+
+The monitors used to `requests.post` every bin on every interval, each on a
+fresh connection, even when nothing had changed. `TelemetryUplink.publish()`
+takes one cycle's readings for all bins and:
+
+- keeps only bins whose fill level moved by at least `TELEMETRY_DELTA_PCT`
+  since the value the backend last accepted, bins whose sensor started or
+  stopped answering, and bins not sent for `TELEMETRY_HEARTBEAT_SEC` (so the
+  backend can tell a quiet bin from a dead monitor);
+- sends them as one request, `{"device", "ts", "readings": [...]}`, on a
+  keep-alive `requests.Session`.
+
+A reading only counts as sent once the backend accepted it or it is safely
+queued. Backends without batch support answer the batch with 400; the uplink
+then falls back to one request per reading, still on the same session.
+
+Outages: with an `Outbox`, readings that cannot be sent go to a small SQLite
+queue on disk (`BIN_OUTBOX_PATH`) instead of being dropped. Once anything is
+queued, every new reading is queued behind it so the backend sees them in
+order. The backlog is sent oldest first in batches of `BIN_OUTBOX_BATCH`
+readings (gzip-compressed) once the retry time has passed, each with
+`BIN_OUTBOX_FLUSH_TIMEOUT_SEC` to complete (the backend applies the newest
+reading per bin, but a slow database should not turn a half-applied batch
+into an endless resend). After a failure
+the retry waits with jittered exponential backoff (`BIN_OUTBOX_BACKOFF_SEC`
+doubling up to `BIN_OUTBOX_BACKOFF_MAX_SEC`), so a recovering link or backend
+is not hit by every device at once. The queue keeps at most
+`BIN_OUTBOX_MAX_ROWS` readings and drops the oldest beyond that. The database
+is only written while the link is down, one transaction per cycle, in WAL
+mode with `synchronous=NORMAL` to keep SD-card writes small.
+"""
+import gzip
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+import requests
+
+TELEMETRY_DELTA_PCT = float(os.environ.get('TELEMETRY_DELTA_PCT', '2.0'))
+TELEMETRY_HEARTBEAT_SEC = float(os.environ.get('TELEMETRY_HEARTBEAT_SEC', '300'))
+TELEMETRY_TIMEOUT_SEC = float(os.environ.get('TELEMETRY_TIMEOUT_SEC', '5'))
+TELEMETRY_GZIP_MIN_BYTES = int(os.environ.get('TELEMETRY_GZIP_MIN_BYTES', '1024'))
+
+# {name} is the monitor (pi_client, ultrasonic_monitor, ...); empty disables the outbox
+BIN_OUTBOX_PATH = os.environ.get('BIN_OUTBOX_PATH', str(Path.home() / '.cache' / 'ew-bin-outbox-{name}.sqlite3'))
+BIN_OUTBOX_MAX_ROWS = int(os.environ.get('BIN_OUTBOX_MAX_ROWS', '20000'))
+BIN_OUTBOX_BATCH = int(os.environ.get('BIN_OUTBOX_BATCH', '100'))
+BIN_OUTBOX_FLUSH_TIMEOUT_SEC = float(os.environ.get('BIN_OUTBOX_FLUSH_TIMEOUT_SEC', '30'))
+BIN_OUTBOX_BACKOFF_SEC = float(os.environ.get('BIN_OUTBOX_BACKOFF_SEC', '5'))
+BIN_OUTBOX_BACKOFF_MAX_SEC = float(os.environ.get('BIN_OUTBOX_BACKOFF_MAX_SEC', '300'))
+
+
+def make_reading(bin_id, distance_cm, fill_percent, ts=None):
+    """One bin reading in the shape the backend's /api/bin/update expects."""
+    return {
+        'bin_id': bin_id,
+        'distance_cm': round(distance_cm, 2) if distance_cm is not None else None,
+        'fill_percent': round(fill_percent, 2) if fill_percent is not None else None,
+        'ts': ts or datetime.utcnow().isoformat() + 'Z',
+    }
+
+
+class Outbox:
+    """Bounded on-disk FIFO of readings waiting for the backend."""
+
+    def __init__(self, path, max_rows=BIN_OUTBOX_MAX_ROWS):
+        self.path = str(path)
+        self.max_rows = max_rows
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(self.path, check_same_thread=False)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.execute('CREATE TABLE IF NOT EXISTS outbox (id INTEGER PRIMARY KEY AUTOINCREMENT, reading TEXT NOT NULL)')
+        self.db.commit()
+        self._count = self.db.execute('SELECT COUNT(*) FROM outbox').fetchone()[0]
+        self.dropped = 0
+
+    def __len__(self):
+        return self._count
+
+    def put(self, readings):
+        """Queue readings (one transaction); drops the oldest beyond `max_rows`."""
+        with self.db:
+            self.db.executemany('INSERT INTO outbox (reading) VALUES (?)',
+                                [(json.dumps(r, separators=(',', ':')),) for r in readings])
+            self._count += len(readings)
+            excess = self._count - self.max_rows
+            if excess > 0:
+                self.db.execute('DELETE FROM outbox WHERE id IN (SELECT id FROM outbox ORDER BY id LIMIT ?)',
+                                (excess,))
+                self._count -= excess
+                self.dropped += excess
+
+    def peek(self, n):
+        """The oldest `n` readings as `(last_id, readings)`."""
+        rows = self.db.execute('SELECT id, reading FROM outbox ORDER BY id LIMIT ?', (n,)).fetchall()
+        return (rows[-1][0] if rows else None), [json.loads(r) for _, r in rows]
+
+    def remove_through(self, last_id):
+        with self.db:
+            removed = self.db.execute('DELETE FROM outbox WHERE id <= ?', (last_id,)).rowcount
+        self._count -= removed
+
+    def close(self):
+        self.db.close()
+
+
+def open_outbox(name, path=BIN_OUTBOX_PATH):
+    """The outbox for monitor `name`, or None if disabled or the database can't be opened."""
+    if not path:
+        return None
+    try:
+        return Outbox(path.format(name=name))
+    except Exception as e:
+        print(f'[telemetry] outbox unavailable ({e}); readings are dropped while offline')
+        return None
+
+
+class TelemetryUplink:
+    """Delta-filtered, batched bin updates over one keep-alive session."""
+
+    def __init__(self, url, device=None, delta_pct=TELEMETRY_DELTA_PCT, heartbeat_s=TELEMETRY_HEARTBEAT_SEC,
+                 timeout=TELEMETRY_TIMEOUT_SEC, session=None, outbox=None):
+        self.url = url
+        self.device = device
+        self.delta_pct = delta_pct
+        self.heartbeat_s = heartbeat_s
+        self.timeout = timeout
+        self.session = session or requests.Session()
+        self.batch = True
+        self.outbox = outbox
+        self._failures = 0  # consecutive failed attempts, for the backoff
+        self._retry_at = 0.0
+        self._sent = {}  # bin_id -> (fill_percent, monotonic time) last accepted by the backend
+        self._lock = threading.Lock()
+        self.stats = {'cycles': 0, 'readings': 0, 'sent': 0, 'requests': 0, 'bytes': 0, 'failures': 0,
+                      'queued': 0, 'flushed': 0}
+
+    def _due(self, reading, now):
+        last = self._sent.get(reading['bin_id'])
+        if last is None:
+            return True
+        fill, sent_at = last
+        if now - sent_at >= self.heartbeat_s:
+            return True
+        if (fill is None) != (reading['fill_percent'] is None):
+            return True
+        return fill is not None and abs(reading['fill_percent'] - fill) >= self.delta_pct
+
+    def select(self, readings, now=None):
+        """The readings that need to go out this cycle."""
+        now = time.monotonic() if now is None else now
+        return [r for r in readings if self._due(r, now)]
+
+    def _post(self, body, timeout=None):
+        data = json.dumps(body, separators=(',', ':')).encode()
+        headers = {'Content-Type': 'application/json'}
+        if len(data) >= TELEMETRY_GZIP_MIN_BYTES:
+            data = gzip.compress(data)
+            headers['Content-Encoding'] = 'gzip'
+        self.stats['requests'] += 1
+        self.stats['bytes'] += len(data)
+        return self.session.post(self.url, data=data, headers=headers, timeout=timeout or self.timeout)
+
+    def _send(self, readings, timeout=None):
+        if self.batch:
+            resp = self._post({'device': self.device, 'ts': datetime.utcnow().isoformat() + 'Z',
+                               'readings': readings}, timeout)
+            if resp.status_code != 400:
+                resp.raise_for_status()
+                return
+            print('[telemetry] backend rejected the batch; sending one reading per request')
+            self.batch = False
+        for r in readings:
+            resp = self._post(r, timeout)
+            if resp.status_code == 404:
+                print(f"[telemetry] backend does not know bin {r['bin_id']}")
+                continue
+            resp.raise_for_status()
+
+    def _backoff(self, now):
+        self._failures += 1
+        delay = min(BIN_OUTBOX_BACKOFF_MAX_SEC, BIN_OUTBOX_BACKOFF_SEC * 2 ** (self._failures - 1))
+        self._retry_at = now + delay * random.uniform(0.5, 1.0)
+
+    def _queue(self, readings):
+        self.outbox.put(readings)
+        self.stats['queued'] += len(readings)
+
+    def _flush(self, now):
+        """Send the backlog oldest first until it is empty or a batch fails."""
+        while len(self.outbox) and now >= self._retry_at:
+            last_id, batch = self.outbox.peek(BIN_OUTBOX_BATCH)
+            try:
+                self._send(batch, max(self.timeout, BIN_OUTBOX_FLUSH_TIMEOUT_SEC))
+            except requests.RequestException as e:
+                self.stats['failures'] += 1
+                self._backoff(now)
+                print(f'[telemetry] backlog of {len(self.outbox)} readings not sent ({e}); '
+                      f'retry in {self._retry_at - now:.0f}s')
+                return
+            self.outbox.remove_through(last_id)
+            self.stats['flushed'] += len(batch)
+            self._failures = 0
+            print(f'[telemetry] flushed {len(batch)} queued readings ({len(self.outbox)} left)')
+
+    def _mark_sent(self, readings, now):
+        for r in readings:
+            self._sent[r['bin_id']] = (r['fill_percent'], now)
+
+    def publish(self, readings, force=False):
+        """Send what changed in this cycle's `readings` (all of them with `force`).
+
+        Returns the number of readings sent or queued.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.stats['cycles'] += 1
+            self.stats['readings'] += len(readings)
+            out = list(readings) if force else self.select(readings, now)
+            if not self.url:
+                if out:
+                    print('[telemetry] BIN_UPDATE_URL not set; readings:', out)
+                    self._mark_sent(out, now)
+                return len(out)
+            if self.outbox is not None and (len(self.outbox) or now < self._retry_at):
+                # offline or still catching up: keep the order, queue behind the backlog
+                if out:
+                    self._queue(out)
+                    self._mark_sent(out, now)
+                self._flush(now)
+                return len(out)
+            if not out:
+                return 0
+            try:
+                self._send(out)
+            except requests.RequestException as e:
+                self.stats['failures'] += 1
+                if self.outbox is None:
+                    print(f'[telemetry] failed to send {len(out)} readings: {e}')
+                    return 0
+                self._backoff(now)
+                self._queue(out)
+                self._mark_sent(out, now)
+                print(f'[telemetry] failed to send {len(out)} readings ({e}); queued, '
+                      f'retry in {self._retry_at - now:.0f}s')
+                return len(out)
+            self._failures = 0
+            print(f"[telemetry] sent {len(out)}/{len(readings)} readings ({', '.join(r['bin_id'] for r in out)})")
+            self._mark_sent(out, now)
+            self.stats['sent'] += len(out)
+            return len(out)
+
+    def close(self):
+        self.session.close()
+        if self.outbox is not None:
+            self.outbox.close()
@@ -1,8 +1,25 @@
+import atexit
+import os
 import time
 import datetime
+import threading
+from collections import deque, namedtuple
 from pathlib import Path
 import subprocess
 
+# Persistent camera settings (see CameraService)
+CAMERA_PERSISTENT = os.environ.get('CAMERA_PERSISTENT', '1') not in ('0', 'false', 'False')
+# Device index, or a path / URL that cv2.VideoCapture understands, or a folder
+# of images to replay (simulation, see sim_hardware.FolderCapture)
+CAMERA_SOURCE = os.environ.get('CAMERA_SOURCE', '0')
+CAMERA_WIDTH = int(os.environ.get('CAMERA_WIDTH', '1280'))
+CAMERA_HEIGHT = int(os.environ.get('CAMERA_HEIGHT', '720'))
+CAMERA_FPS = float(os.environ.get('CAMERA_FPS', '0'))  # 0 = driver default
+CAMERA_BUFFER_FRAMES = int(os.environ.get('CAMERA_BUFFER_FRAMES', '4'))
+CAMERA_WARMUP_SEC = float(os.environ.get('CAMERA_WARMUP_SEC', '2'))
+# Also write in-memory captures to Photos/ (archival only; nothing reads them back)
+ARCHIVE_CAPTURES = os.environ.get('ARCHIVE_CAPTURES', '0') in ('1', 'true', 'True')
+
 
 def _photos_dir():
     p = Path(__file__).resolve().parent.parent / "Photos"
@@ -27,47 +44,306 @@ def _libcamera_capture(out_path: Path, width=1280, height=720):
         return False
 
 
-def capture():
-    """Capture an image. Prefer OpenCV; if unavailable or camera open fails,
-    fall back to `libcamera-still` (Raspberry Pi). Returns the saved filepath or None.
+Frame = namedtuple('Frame', ['seq', 'ts', 'image'])
+
+
+class CameraService:
+    """Keeps the camera open and fills a ring buffer of recent frames.
+
+    A reader thread calls `cam.read()` continuously (so the driver never queues
+    stale frames) and keeps the last `buffer_size` frames with their
+    `time.monotonic()` timestamps. `latest()` then returns the freshest frame
+    in milliseconds instead of paying open + warm-up on every capture. If reads
+    keep failing or the device disappears the camera is reopened with backoff.
     """
-    photos_dir = _photos_dir()
-    base_path = photos_dir / "captured_image"
-    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"{base_path}_{timestamp}.jpg"
 
-    # Try OpenCV first (if installed)
-    try:
+    def __init__(self, source=CAMERA_SOURCE, width=CAMERA_WIDTH, height=CAMERA_HEIGHT, fps=CAMERA_FPS,
+                 buffer_size=CAMERA_BUFFER_FRAMES, warmup_s=CAMERA_WARMUP_SEC,
+                 max_read_failures=5, reconnect_backoff_s=(0.5, 10.0), read_retry_s=0.05):
+        self.source = int(source) if str(source).isdigit() else source
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.warmup_s = warmup_s
+        self.max_read_failures = max_read_failures
+        self.reconnect_backoff_s = reconnect_backoff_s
+        self.read_retry_s = read_retry_s
+        self._frames = deque(maxlen=max(1, buffer_size))
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stop = threading.Event()
+        self._seq = 0
+        self.connected = False
+        self.reconnects = 0
+        self.last_error = None
+        self.open_error = None  # set while the device cannot be opened at all
+        self.opened_at = None
+
+    def start(self, wait=False, timeout=10.0):
+        """Start the reader thread; with `wait=True` block until the first frame."""
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='camera-service', daemon=True)
+            self._thread.start()
+        if wait:
+            self.latest(timeout=timeout)
+        return self
+
+    def _open(self):
         import cv2
-        try:
-            cam = cv2.VideoCapture(0)
-            cam.set(3, 1280)
-            cam.set(4, 720)
-            # allow camera to warm up
-            time.sleep(2)
-            img = None
-            success = False
-            for _ in range(5):
+        if os.path.isdir(str(self.source)):
+            from sim_hardware import FolderCapture
+            return FolderCapture(self.source)
+        cam = cv2.VideoCapture(self.source)
+        if not cam.isOpened():
+            cam.release()
+            raise RuntimeError(f'cannot open camera {self.source!r}')
+        cam.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+        cam.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+        # keep the driver queue short so a read returns a current frame
+        cam.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        if self.fps:
+            cam.set(cv2.CAP_PROP_FPS, self.fps)
+        return cam
+
+    def _run(self):
+        backoff = self.reconnect_backoff_s[0]
+        cam = None
+        failures = 0
+        while not self._stop.is_set():
+            if cam is None:
+                try:
+                    cam = self._open()
+                    self.opened_at = time.monotonic()
+                    self.open_error = None
+                    failures = 0
+                    print(f'[camera] opened {self.source!r} ({self.width}x{self.height})')
+                except Exception as e:
+                    self.last_error = self.open_error = str(e)
+                    print(f'[camera] open failed: {e}; retrying in {backoff:.1f}s')
+                    self._stop.wait(backoff)
+                    backoff = min(backoff * 2, self.reconnect_backoff_s[1])
+                    continue
+            try:
                 ret, img = cam.read()
-                if ret and img is not None:
-                    success = True
-                    break
+            except Exception as e:
+                ret, img = False, None
+                self.last_error = str(e)
+            now = time.monotonic()
+            if not ret or img is None:
+                failures += 1
+                if failures >= self.max_read_failures:
+                    # a device that opens but gives no frames must not spin open/read/release;
+                    # the backoff only resets once a frame comes through
+                    print(f'[camera] {failures} failed reads; reconnecting in {backoff:.1f}s')
+                    cam.release()
+                    cam = None
+                    self.connected = False
+                    self.reconnects += 1
+                    self._stop.wait(backoff)
+                    backoff = min(backoff * 2, self.reconnect_backoff_s[1])
+                else:
+                    self._stop.wait(self.read_retry_s)
+                continue
+            failures = 0
+            backoff = self.reconnect_backoff_s[0]
+            if now - self.opened_at < self.warmup_s:
+                # auto exposure / white balance still settling; don't hand these out
+                continue
+            with self._cond:
+                self._seq += 1
+                self._frames.append(Frame(self._seq, now, img))
+                self.connected = True
+                self._cond.notify_all()
+        if cam is not None:
             cam.release()
-            if success:
-                # write as jpeg to reduce size
-                cv2.imwrite(str(filename), img)
-                print(f'Image saved as {filename} (cv2)')
-                return str(filename)
+        self.connected = False
+
+    def latest(self, timeout=5.0, newer_than=None, max_age_s=None):
+        """Return the freshest `Frame`, waiting up to `timeout` for one.
+
+        `newer_than` (a monotonic timestamp) waits for a frame captured after
+        that moment, e.g. after the item came to rest. `max_age_s` rejects a
+        buffered frame that is older than that. Returns None on timeout.
+        """
+        self.start()
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                if self._frames:
+                    f = self._frames[-1]
+                    fresh_enough = max_age_s is None or time.monotonic() - f.ts <= max_age_s
+                    if (newer_than is None or f.ts > newer_than) and fresh_enough:
+                        return f
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+
+    def status(self):
+        with self._cond:
+            newest = self._frames[-1] if self._frames else None
+            span = self._frames[-1].ts - self._frames[0].ts if len(self._frames) > 1 else 0.0
+            fps = (len(self._frames) - 1) / span if span > 0 else None
+        return {
+            'source': str(self.source),
+            'running': self._thread is not None and self._thread.is_alive(),
+            'connected': self.connected,
+            'frames_captured': self._seq,
+            'fps': round(fps, 1) if fps else None,
+            'last_frame_age_ms': round((time.monotonic() - newest.ts) * 1000.0, 1) if newest else None,
+            'reconnects': self.reconnects,
+            'error': self.last_error,
+            'open_error': self.open_error,
+        }
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+_shared_camera = None
+_shared_camera_lock = threading.Lock()
+
+
+def new_camera():
+    """A camera service of the caller's own (not started), or None if OpenCV is missing."""
+    try:
+        import cv2  # noqa: F401
+    except Exception:
+        return None
+    return CameraService()
+
+
+def get_camera():
+    """Process-wide camera service (started lazily), or None if OpenCV is missing."""
+    global _shared_camera
+    with _shared_camera_lock:
+        if _shared_camera is None:
+            camera = new_camera()
+            if camera is None:
+                return None
+            _shared_camera = camera.start()
+            # stop the reader before interpreter teardown (cv2 dislikes dying mid-read)
+            atexit.register(_shared_camera.stop)
+        return _shared_camera
+
+
+def _archive_path():
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+    return _photos_dir() / f"captured_image_{timestamp}.jpg"
+
+
+def _opencv_grab(width=1280, height=720, warmup_s=2.0):
+    """Open the camera once, warm up, return one BGR frame (or None) and release it."""
+    import cv2
+    cam = cv2.VideoCapture(0)
+    try:
+        cam.set(3, width)
+        cam.set(4, height)
+        # allow camera to warm up
+        time.sleep(warmup_s)
+        for _ in range(5):
+            ret, img = cam.read()
+            if ret and img is not None:
+                return img
+        print('OpenCV capture failed or returned no frames')
+        return None
+    finally:
+        cam.release()
+
+
+def _libcamera_grab(width=1280, height=720):
+    """libcamera-still straight to stdout, decoded in memory. Returns a BGR frame or None."""
+    import cv2
+    import numpy as np
+    cmd = ['libcamera-still', '-n', '-e', 'jpg', '-o', '-', '--width', str(width), '--height', str(height)]
+    try:
+        out = subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE).stdout
+        return cv2.imdecode(np.frombuffer(out, dtype=np.uint8), cv2.IMREAD_COLOR)
+    except Exception as e:
+        print('libcamera capture failed:', e)
+        return None
+
+
+def capture_frame(timeout=None):
+    """Capture one frame as a BGR numpy array without touching the SD card.
+
+    Uses the persistent `CameraService` when enabled, otherwise a one-shot
+    OpenCV capture, then `libcamera-still` piped to memory. The one-shot
+    methods are also tried when the service cannot open the camera (e.g. a
+    CSI camera OpenCV does not see) or has no frame. Returns None if OpenCV
+    is missing or every method failed.
+    """
+    try:
+        import cv2  # noqa: F401
+    except Exception:
+        return None
+    camera = get_camera() if CAMERA_PERSISTENT else None
+    if camera is not None and camera.open_error is None:
+        frame = camera.latest(timeout=timeout or CAMERA_WARMUP_SEC + 5.0)
+        if frame is not None:
+            return frame.image
+    if camera is not None:
+        print('Camera service has no frame:', camera.status().get('error'), '- trying one-shot capture')
+    try:
+        img = _opencv_grab()
+        if img is not None:
+            return img
+    except Exception as e:
+        print('OpenCV capture error:', e)
+    return _libcamera_grab()
+
+
+def encode_jpeg(frame, size=None, quality=75):
+    """Encode a BGR frame to JPEG bytes in memory, optionally shrunk to fit `size` (w, h).
+
+    Fixed quality; `iot-photo` uploads go through the byte-budget encoder in frame_encoder.py.
+    """
+    from frame_encoder import encode_fixed
+    return encode_fixed(frame, size=size, quality=quality)
+
+
+def archive_frame(frame=None, jpeg=None, background=True):
+    """Write a capture to Photos/ for archival. Reuses `jpeg` bytes if already
+    encoded; by default the write happens off the caller's thread."""
+    path = _archive_path()
+
+    def _write():
+        try:
+            if jpeg is not None:
+                path.write_bytes(jpeg)
             else:
-                print('OpenCV capture failed or returned no frames')
+                import cv2
+                cv2.imwrite(str(path), frame)
         except Exception as e:
-            print('OpenCV capture error:', e)
-    except Exception:
-        # cv2 not installed
-        pass
+            print('Archiving capture failed:', e)
+
+    if background:
+        threading.Thread(target=_write, name='capture-archive', daemon=True).start()
+    else:
+        _write()
+    return str(path)
 
-    # Fallback: try libcamera-still (works on Raspberry Pi OS with camera stack)
-    outp = Path(filename)
+
+def capture():
+    """Capture an image. Prefer OpenCV; if unavailable or camera open fails,
+    fall back to `libcamera-still` (Raspberry Pi). Returns the saved filepath or None.
+
+    With CAMERA_PERSISTENT (default) the frame comes from the shared
+    `CameraService` ring buffer instead of opening the camera again. Callers
+    that only need the pixels should use `capture_frame()` instead.
+    """
+    frame = capture_frame()
+    if frame is not None:
+        filename = archive_frame(frame, background=False)
+        print(f'Image saved as {filename} (cv2)')
+        return filename
+
+    # Fallback without OpenCV: libcamera-still to a file (works on Raspberry Pi OS with camera stack)
+    outp = _archive_path()
     ok = _libcamera_capture(outp)
     if ok and outp.exists():
         print(f'Image saved as {outp} (libcamera)')
@@ -77,6 +353,63 @@ def capture():
     print('No image captured; all methods failed')
     return None
 
+def capture_frames(count=3, interval_s=0.05, width=1280, height=720, warmup_s=2.0):
+    """Grab `count` frames from one camera session as BGR numpy arrays.
+
+    The camera is opened and warmed up once for the whole burst, so K frames
+    cost roughly one warm-up plus K frame intervals instead of K full
+    `capture()` calls. With CAMERA_PERSISTENT the frames are the next K frames
+    (at least `interval_s` apart) from the camera service, with no open or
+    warm-up at all. If the service cannot open the camera or yields nothing,
+    the burst falls back to one OpenCV session, then to a single
+    `libcamera-still` frame. Returns a (possibly shorter) list; empty on failure.
+    """
+    camera = get_camera() if CAMERA_PERSISTENT else None
+    if camera is not None and camera.open_error is None:
+        frames = []
+        after = time.monotonic()
+        while len(frames) < count:
+            f = camera.latest(timeout=CAMERA_WARMUP_SEC + 5.0, newer_than=after)
+            if f is None:
+                break
+            frames.append(f.image)
+            after = f.ts + interval_s
+        if frames:
+            return frames
+    if camera is not None:
+        print('Camera service has no frames:', camera.status().get('error'), '- trying one-shot burst')
+
+    try:
+        import cv2
+    except Exception:
+        print('OpenCV not installed; burst capture unavailable')
+        return []
+    frames = []
+    cam = cv2.VideoCapture(0)
+    try:
+        cam.set(3, width)
+        cam.set(4, height)
+        # allow camera to warm up
+        time.sleep(warmup_s)
+        attempts = 0
+        while len(frames) < count and attempts < count * 3:
+            attempts += 1
+            ret, img = cam.read()
+            if ret and img is not None:
+                frames.append(img)
+                if len(frames) < count and interval_s > 0:
+                    time.sleep(interval_s)
+    except Exception as e:
+        print('OpenCV burst capture error:', e)
+    finally:
+        cam.release()
+    if not frames:
+        img = _libcamera_grab(width, height)
+        if img is not None:
+            frames.append(img)
+    return frames
+
+
 # --- Other spec notes ---
 # - Driverless: This is why cv2.VideoCapture(0) works easily.
 # - LED Lights: This is a hardware feature. For best quality, 
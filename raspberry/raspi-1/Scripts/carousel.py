@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""Absolute-position bookkeeping for the stepper carousel.
+
+`move_to_category` used to always start from Cat 1 (home) and
+`return_to_initial` always went back, so two items for the same bin cost two
+full out-and-back trips. `Carousel` remembers where the carousel is (in steps
+from home, anticlockwise positive) and moves straight from the current bin to
+the next one. If the carousel can turn all the way round
+(`STEPPER_STEPS_PER_REV` > 0), it goes whichever way is shorter; with the
+default 0 it never wraps past the end bins, like the old code.
+
+The position is only known because every move goes through the carousel and
+the carousel starts at home. After an aborted move the position is unknown
+until `reset()` is called with the carousel back at home.
+
+Replay a label sequence to compare travel with the old out-and-back moves:
+
+    python3 Scripts/carousel.py --random 50
+    python3 Scripts/carousel.py --labels-file labels.txt   # one label (or trace JSON line) per line
+"""
+import argparse
+import json
+import os
+import random
+
+ACW = 1  # same direction constants as new_stepper_code
+CW = 0
+
+STEPPER_STEPS_PER_REV = int(os.environ.get('STEPPER_STEPS_PER_REV', '0'))
+
+
+class Carousel:
+    """Tracks the carousel position and turns category moves into shortest step moves."""
+
+    def __init__(self, step_fn, positions, steps_per_rev=STEPPER_STEPS_PER_REV, home=1):
+        self.step_fn = step_fn  # step_fn(steps, direction)
+        self.positions = dict(positions)
+        self.steps_per_rev = steps_per_rev
+        self.home = home
+        self.position = self._normalise(self.positions[home])
+        self.travel_steps = 0
+
+    def _normalise(self, pos):
+        if self.steps_per_rev:
+            half = self.steps_per_rev // 2
+            return (pos + half) % self.steps_per_rev - half
+        return pos
+
+    @property
+    def category(self):
+        """Category the carousel is at, or None between bins / when unknown."""
+        for cat, pos in self.positions.items():
+            if self.position is not None and self._normalise(pos) == self.position:
+                return cat
+        return None
+
+    def delta_to(self, category):
+        """Signed steps (anticlockwise positive) from the current position to `category`."""
+        if self.position is None:
+            raise RuntimeError('carousel position unknown; move it home and call reset()')
+        delta = self._normalise(self.positions[category]) - self.position
+        if self.steps_per_rev:
+            # shortest way round
+            delta = self._normalise(delta)
+        return delta
+
+    def go_to(self, category):
+        """Move to `category`; returns the number of steps taken."""
+        delta = self.delta_to(category)
+        if delta:
+            target = self._normalise(self.position + delta)
+            self.position = None  # unknown if the move is interrupted
+            self.step_fn(abs(delta), ACW if delta > 0 else CW)
+            self.position = target
+            self.travel_steps += abs(delta)
+        return abs(delta)
+
+    def go_home(self):
+        return self.go_to(self.home)
+
+    def reset(self, category=None):
+        """Declare the carousel to be at `category` (default home), e.g. after re-homing it by hand."""
+        self.position = self._normalise(self.positions[self.home if category is None else category])
+
+
+# --- Replay benchmark ---
+
+def _load_labels(path):
+    labels = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith('[trace] '):
+                line = line[len('[trace] '):]
+            if not line:
+                continue
+            if line.startswith('{'):
+                label = json.loads(line).get('label')
+                if label:
+                    labels.append(label)
+            else:
+                labels.append(line)
+    return labels
+
+
+def replay(categories, positions, steps_per_rev, return_home):
+    """Move counts for a category sequence; `return_home` is the old out-and-back behaviour."""
+    moves = []
+    carousel = Carousel(lambda steps, direction: moves.append(steps), positions, steps_per_rev)
+    returns = 0
+    for cat in categories:
+        carousel.go_to(cat)
+        if return_home and carousel.go_home():
+            returns += 1
+    if not return_home:
+        carousel.go_home()  # back home once at the end (or when idle)
+    return {'moves': moves, 'travel_steps': carousel.travel_steps, 'returns': returns}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--labels-file', help='labels to replay, one per line (plain or [trace] JSON)')
+    parser.add_argument('--random', type=int, default=0, help='replay this many random labels instead')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--steps-per-rev', type=int, default=STEPPER_STEPS_PER_REV,
+                        help='allow wrapping round (0 = never pass the end bins)')
+    args = parser.parse_args()
+
+    os.environ.setdefault('GPIOZERO_PIN_FACTORY', 'mock')  # constants only; keep off the GPIO
+    import new_stepper_code as stepper
+    from actuation_service import CATEGORY_MAP, SETTLE_AFTER_RETURN_SEC
+    from stepper_motion import STEPPER_ACCEL, STEPPER_MAX_HZ, STEPPER_START_HZ, plan_duration_s, plan_move
+
+    if args.labels_file:
+        labels = _load_labels(args.labels_file)
+    else:
+        rng = random.Random(args.seed)
+        labels = [rng.choice(list(CATEGORY_MAP)) for _ in range(args.random or 50)]
+    categories = [CATEGORY_MAP[lbl] for lbl in labels if lbl in CATEGORY_MAP]
+    if not categories:
+        raise SystemExit('no labels with a category mapping to replay')
+
+    start_hz = STEPPER_START_HZ or 1.0 / (2.0 * stepper.PULSE_WIDTH_SEC)
+
+    def motion_s(moves):
+        return {
+            'sleep': sum(n * 2 * stepper.PULSE_WIDTH_SEC for n in moves),
+            'wave': sum(plan_duration_s(plan_move(n, start_hz, STEPPER_MAX_HZ, STEPPER_ACCEL)) for n in moves),
+        }
+
+    report = {'items': len(categories), 'steps_per_rev': args.steps_per_rev}
+    results = {}
+    for name, return_home in (('home_each_item', True), ('direct', False)):
+        r = replay(categories, stepper.CATEGORY_POSITIONS, args.steps_per_rev, return_home)
+        secs = motion_s(r['moves'])
+        results[name] = r
+        report[name] = {
+            'travel_steps': r['travel_steps'],
+            'moves': len(r['moves']),
+            'motion_s_sleep_backend': round(secs['sleep'], 2),
+            'motion_s_wave_backend': round(secs['wave'], 2),
+            # each return home is followed by the after-return pause
+            'return_settle_s': round(r['returns'] * SETTLE_AFTER_RETURN_SEC, 2),
+        }
+    old, new = report['home_each_item'], report['direct']
+    for backend in ('sleep', 'wave'):
+        key = f'motion_s_{backend}_backend'
+        saved = old[key] + old['return_settle_s'] - new[key] - new['return_settle_s']
+        report[f'time_saved_s_{backend}_backend'] = round(saved, 2)
+    report['travel_steps_saved_pct'] = round(100.0 * (1 - new['travel_steps'] / old['travel_steps']), 1) \
+        if old['travel_steps'] else 0.0
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
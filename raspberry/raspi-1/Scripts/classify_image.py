@@ -1,5 +1,6 @@
 # scripts/classify_image.py
 import os
+import time
 import torch
 from torchvision import transforms
 from PIL import Image
@@ -76,33 +77,147 @@ def classify_image(image_path: str, model_path: str | Path | None = None) -> str
     return label
 
 
-def run_inference_from_path(path: str, model_path: str = None):
+def run_inference_from_path(path: str, model_path: str = None, timings: dict | None = None):
     """Compatibility wrapper used by `pi_client.py`.
     Returns a dict: { 'label': str, 'confidence': float }
     """
     try:
-        label = classify_image(path, model_path=model_path)
-        return {'label': label, 'confidence': 1.0}
+        t = time.monotonic()
+        image = Image.open(path).convert("RGB")
+        if timings is not None:
+            timings['decode_ms'] = (time.monotonic() - t) * 1000.0
+        return run_inference_from_pil(image, model_path=model_path, timings=timings)
     except Exception as e:
         return {'label': 'error', 'confidence': 0.0, 'error': str(e)}
 
 
-def run_inference_from_pil(pil_image, model_path: str = None):
-    """Run inference from a PIL Image instance and return the same dict shape as above."""
+def run_inference_from_pil(pil_image, model_path: str = None, timings: dict | None = None):
+    """Run inference from a PIL Image instance and return the same dict shape as above.
+
+    If `timings` is given it is filled with `preprocess_ms` and `inference_ms`
+    so callers can break the request down in their span log.
+    """
     try:
         model = _load_model(model_path)
+        t = time.monotonic()
         input_tensor = preprocess(pil_image).unsqueeze(0).to(DEVICE)
+        t_pre = time.monotonic()
         with torch.no_grad():
             outputs = model(input_tensor)
             if isinstance(outputs, tuple) or (hasattr(outputs, 'shape') and outputs.ndim > 1):
-                _, predicted = torch.max(outputs, 1)
+                probs = torch.nn.functional.softmax(outputs, dim=1)
+                conf, predicted = torch.max(probs, 1)
                 idx = int(predicted.item())
+                confidence = float(conf.item())
             else:
                 try:
                     idx = int(outputs)
                 except Exception:
                     raise RuntimeError('Unexpected model output shape')
+                # model returned a bare class index; no probabilities to report
+                confidence = 1.0
             label = CLASSES[idx]
-        return {'label': label, 'confidence': 1.0}
+        if timings is not None:
+            timings['preprocess_ms'] = (t_pre - t) * 1000.0
+            timings['inference_ms'] = (time.monotonic() - t_pre) * 1000.0
+        return {'label': label, 'confidence': confidence}
+    except Exception as e:
+        return {'label': 'error', 'confidence': 0.0, 'error': str(e)}
+
+
+# --- Burst mode: K frames, one batched forward pass, confidence-weighted vote ---
+
+BURST_FRAMES = int(os.environ.get('BURST_FRAMES', '3'))
+BURST_INTERVAL_SEC = float(os.environ.get('BURST_INTERVAL_SEC', '0.05'))
+
+
+def _to_pil(frame):
+    """Accept PIL images or OpenCV BGR numpy frames."""
+    if isinstance(frame, Image.Image):
+        return frame.convert("RGB")
+    return Image.fromarray(frame[:, :, ::-1].copy())
+
+
+_MEAN = torch.tensor([0.485, 0.456, 0.406]).view(3, 1, 1)
+_STD = torch.tensor([0.229, 0.224, 0.225]).view(3, 1, 1)
+
+
+def preprocess_frame(frame):
+    """OpenCV BGR numpy frame -> normalised CHW tensor, without a PIL round trip.
+
+    INTER_AREA approximates the antialiased resize `preprocess` applies to PIL images.
+    """
+    if isinstance(frame, Image.Image):
+        return preprocess(frame.convert("RGB"))
+    try:
+        import cv2
+    except ImportError:
+        return preprocess(_to_pil(frame))
+    rgb = cv2.cvtColor(cv2.resize(frame, (224, 224), interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2RGB)
+    tensor = torch.from_numpy(rgb).permute(2, 0, 1).float().div_(255.0)
+    return (tensor - _MEAN) / _STD
+
+
+def classify_batch(frames, model_path: str | Path | None = None, timings: dict | None = None):
+    """Classify several frames in a single forward pass; returns softmax probs [N, C]."""
+    model = _load_model(model_path)
+    t = time.monotonic()
+    batch = torch.stack([preprocess_frame(f) for f in frames]).to(DEVICE)
+    t_pre = time.monotonic()
+    with torch.no_grad():
+        probs = torch.nn.functional.softmax(model(batch), dim=1).cpu()
+    if timings is not None:
+        timings['preprocess_ms'] = (t_pre - t) * 1000.0
+        timings['inference_ms'] = (time.monotonic() - t_pre) * 1000.0
+    return probs
+
+
+def run_inference_from_frame(frame, model_path: str = None, timings: dict | None = None):
+    """Classify an in-memory BGR frame (e.g. from `capture_image.capture_frame()`).
+
+    Returns the same dict shape as `run_inference_from_pil`.
+    """
+    try:
+        conf, idx = classify_batch([frame], model_path=model_path, timings=timings)[0].max(dim=0)
+        return {'label': CLASSES[int(idx)], 'confidence': float(conf)}
+    except Exception as e:
+        return {'label': 'error', 'confidence': 0.0, 'error': str(e)}
+
+
+def vote(probs):
+    """Combine per-frame softmax outputs into one decision.
+
+    Each frame's distribution is weighted by that frame's own top-1 confidence,
+    so blurred / ambiguous frames count less than sharp ones. The returned
+    `confidence` is the winning class's share of the weighted mass.
+    """
+    per_conf, per_idx = probs.max(dim=1)
+    weights = per_conf / per_conf.sum().clamp_min(1e-8)
+    combined = (probs * weights.unsqueeze(1)).sum(dim=0)
+    conf, idx = combined.max(dim=0)
+    idx = int(idx.item())
+    return {
+        'label': CLASSES[idx],
+        'confidence': float(conf.item()),
+        'frames': int(probs.shape[0]),
+        'agreement': float((per_idx == idx).float().mean().item()),
+        'per_frame': [{'label': CLASSES[int(i)], 'confidence': round(float(c), 4)} for c, i in zip(per_conf, per_idx)],
+    }
+
+
+def run_burst_inference(frames=None, k: int = None, interval_s: float = None,
+                        model_path: str = None, timings: dict | None = None):
+    """Capture `k` frames (unless `frames` are given), classify them in one batch
+    and return the voted `{label, confidence, frames, agreement, per_frame}`."""
+    try:
+        if frames is None:
+            from capture_image import capture_frames
+            t = time.monotonic()
+            frames = capture_frames(k or BURST_FRAMES, BURST_INTERVAL_SEC if interval_s is None else interval_s)
+            if timings is not None:
+                timings['capture_ms'] = (time.monotonic() - t) * 1000.0
+        if not frames:
+            return {'label': 'error', 'confidence': 0.0, 'error': 'no frames captured'}
+        return vote(classify_batch(frames, model_path=model_path, timings=timings))
     except Exception as e:
         return {'label': 'error', 'confidence': 0.0, 'error': str(e)}
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""In-memory JPEG encoder that aims for a byte budget per frame.
+
+`on_capture` used to shrink every frame to `IMAGE_MAX_WIDTH` x
+`IMAGE_MAX_HEIGHT` at a fixed `IMAGE_JPEG_QUALITY`. How many bytes that gives
+depends on the scene: a busy frame can be several times the size of an empty
+chute, and on a weak Wi-Fi link the big ones stall the socket.
+`BudgetJpegEncoder.encode()` instead keeps frames at or under
+`IMAGE_BYTE_BUDGET` bytes, with as much quality as fits:
+
+- JPEG size is modelled from the bytes the frame would take at full size
+  and the reference quality, times a factor per quality, times
+  `scale ** 1.6` for a smaller resolution (detail gets denser as a frame
+  shrinks, so bytes fall slower than the pixel count). For a scene it has
+  not seen, a 1/8-size probe encode gives that estimate in about a
+  millisecond.
+- With that estimate it picks the highest quality between `IMAGE_QUALITY_MIN`
+  and `IMAGE_QUALITY_MAX` that fits the budget at full size, and only lowers
+  the resolution (down to `IMAGE_MIN_SCALE`) when even the minimum quality
+  would not fit.
+- Scenes are told apart by a coarse signature (source size, brightness and
+  detail of a tiny thumbnail). Each keeps its last settings and the size
+  estimate its last encode gave, so a steady scene is normally encoded
+  exactly once. A frame over budget is re-encoded from the corrected
+  estimate (at most `IMAGE_ENCODE_ATTEMPTS` encodes), and settings that
+  fit are only changed for more quality or resolution.
+
+Every call returns the JPEG and an info dict with bytes, size, quality,
+encode time, attempts and whether the budget was met. `IMAGE_BYTE_BUDGET=0`
+keeps the fixed size and quality. Frames are BGR numpy arrays; without
+OpenCV, Pillow does the resizing and encoding.
+
+    python3 Scripts/frame_encoder.py frontend/assets/login-bg.jpeg --budget 12000
+"""
+import argparse
+import os
+import threading
+import time
+
+IMAGE_BYTE_BUDGET = int(os.environ.get('IMAGE_BYTE_BUDGET', '16000'))
+IMAGE_MAX_WIDTH = int(os.environ.get('IMAGE_MAX_WIDTH', '320'))
+IMAGE_MAX_HEIGHT = int(os.environ.get('IMAGE_MAX_HEIGHT', '240'))
+IMAGE_JPEG_QUALITY = int(os.environ.get('IMAGE_JPEG_QUALITY', '50'))
+IMAGE_QUALITY_MIN = int(os.environ.get('IMAGE_QUALITY_MIN', '30'))
+IMAGE_QUALITY_MAX = int(os.environ.get('IMAGE_QUALITY_MAX', '85'))
+IMAGE_MIN_SCALE = float(os.environ.get('IMAGE_MIN_SCALE', '0.4'))
+IMAGE_ENCODE_ATTEMPTS = int(os.environ.get('IMAGE_ENCODE_ATTEMPTS', '3'))
+
+REFERENCE_QUALITY = 75
+JPEG_OVERHEAD_BYTES = 620  # headers and tables; roughly constant whatever the content
+HEADROOM = 0.9  # aim a little under the budget so estimation error rarely needs a second encode
+PROBE_SCALE = 0.125
+SCALE_EXPONENT = 1.6  # bytes ~ scale ** SCALE_EXPONENT (2 would be proportional to pixels)
+# Relative JPEG size against REFERENCE_QUALITY (libjpeg tables, typical photos)
+QUALITY_SIZE = [(10, 0.30), (20, 0.42), (30, 0.52), (40, 0.60), (50, 0.68), (60, 0.78), (70, 0.90),
+                (75, 1.00), (80, 1.12), (85, 1.32), (90, 1.68), (95, 2.50)]
+
+
+def _size_factor(quality):
+    """Interpolated QUALITY_SIZE at `quality`."""
+    if quality <= QUALITY_SIZE[0][0]:
+        return QUALITY_SIZE[0][1]
+    for (q0, f0), (q1, f1) in zip(QUALITY_SIZE, QUALITY_SIZE[1:]):
+        if quality <= q1:
+            return f0 + (f1 - f0) * (quality - q0) / (q1 - q0)
+    return QUALITY_SIZE[-1][1]
+
+
+def _resize(frame, size):
+    if (frame.shape[1], frame.shape[0]) == size:
+        return frame
+    try:
+        import cv2
+        return cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+    except ImportError:
+        import numpy as np
+        from PIL import Image
+        return np.asarray(Image.fromarray(frame[:, :, ::-1]).resize(size, Image.BOX))[:, :, ::-1]
+
+
+def _imencode(frame, quality):
+    try:
+        import cv2
+        ok, buf = cv2.imencode('.jpg', frame, [int(cv2.IMWRITE_JPEG_QUALITY), int(quality)])
+        if not ok:
+            raise RuntimeError('cv2.imencode failed')
+        return buf.tobytes()
+    except ImportError:
+        from io import BytesIO
+        from PIL import Image
+        out = BytesIO()
+        Image.fromarray(frame[:, :, ::-1]).save(out, format='JPEG', quality=int(quality))
+        return out.getvalue()
+
+
+def _fit(width, height, max_w, max_h):
+    scale = min(max_w / width, max_h / height, 1.0)
+    return max(1, int(width * scale)), max(1, int(height * scale))
+
+
+def encode_fixed(frame, size=None, quality=IMAGE_JPEG_QUALITY):
+    """JPEG bytes at a fixed quality, shrunk to fit `size` (w, h) if given; no budget."""
+    if size:
+        frame = _resize(frame, _fit(frame.shape[1], frame.shape[0], *size))
+    return _imencode(frame, quality)
+
+
+class BudgetJpegEncoder:
+    """Encodes BGR frames to JPEG at or under a byte budget, remembering settings per scene."""
+
+    def __init__(self, budget=IMAGE_BYTE_BUDGET, max_size=(IMAGE_MAX_WIDTH, IMAGE_MAX_HEIGHT),
+                 quality_min=IMAGE_QUALITY_MIN, quality_max=IMAGE_QUALITY_MAX, min_scale=IMAGE_MIN_SCALE,
+                 attempts=IMAGE_ENCODE_ATTEMPTS, fixed_quality=IMAGE_JPEG_QUALITY):
+        self.budget = budget
+        self.max_size = max_size
+        self.quality_min = quality_min
+        self.quality_max = quality_max
+        self.min_scale = min_scale
+        self.attempts = max(1, attempts)
+        self.fixed_quality = fixed_quality
+        # signature -> {'full_bytes': estimate at full size and REFERENCE_QUALITY, 'scale', 'quality',
+        #               'ceiling': lowest settings seen over budget, 'budget': the budget they apply to}
+        self.scenes = {}
+        self._lock = threading.Lock()
+        self.stats = {'frames': 0, 'encodes': 0, 'over_budget': 0, 'bytes': 0, 'encode_ms': 0.0}
+
+    def _encode(self, frame, size, quality):
+        return _imencode(_resize(frame, size), quality)
+
+    def signature(self, frame):
+        """Coarse scene key: source size, brightness and detail of a 32x24 grayscale thumbnail."""
+        gray = _resize(frame, (32, 24)).mean(axis=2)
+        # mean absolute difference between neighbours, a cheap stand-in for edge energy
+        detail = (abs(gray[:, 1:] - gray[:, :-1]).mean() + abs(gray[1:] - gray[:-1]).mean()) / 2.0
+        return frame.shape[1], frame.shape[0], int(gray.mean()) // 32, min(int(detail) // 4, 7)
+
+    def _estimate(self, data, scale, quality):
+        """Bytes at full size and REFERENCE_QUALITY implied by one encode."""
+        return max(len(data) - JPEG_OVERHEAD_BYTES, 1) / (scale ** SCALE_EXPONENT * _size_factor(quality))
+
+    def _choose(self, full_bytes):
+        """(scale, quality) with the most quality that the estimate says fits the budget."""
+        target = self.budget * HEADROOM - JPEG_OVERHEAD_BYTES
+        for q in range(self.quality_max, self.quality_min - 1, -5):
+            if full_bytes * _size_factor(q) <= target:
+                return 1.0, q
+        scale = (target / (full_bytes * _size_factor(self.quality_min))) ** (1.0 / SCALE_EXPONENT) if target > 0 else 0.0
+        return max(self.min_scale, min(1.0, round(scale, 2))), self.quality_min
+
+    def encode(self, frame, scene=None):
+        """JPEG bytes and an info dict for one BGR frame.
+
+        `scene` overrides the automatic scene signature (e.g. a camera or view name).
+        """
+        t0 = time.perf_counter()
+        base = _fit(frame.shape[1], frame.shape[0], *self.max_size)
+        if self.budget <= 0:
+            data = encode_fixed(frame, base, self.fixed_quality)
+            return data, self._report(t0, data, base, self.fixed_quality, 1, None)
+        key = scene if scene is not None else self.signature(frame)
+        with self._lock:
+            state = dict(self.scenes.get(key) or {})
+        if not state:
+            probe = self._encode(frame, _fit(base[0], base[1], base[0] * PROBE_SCALE, base[1] * PROBE_SCALE),
+                                 REFERENCE_QUALITY)
+            state['full_bytes'] = self._estimate(probe, PROBE_SCALE, REFERENCE_QUALITY)
+            state['scale'], state['quality'] = self._choose(state['full_bytes'])
+        elif state.get('budget') != self.budget:
+            # the budget moved (e.g. live view following the link): what was too big may fit now
+            state.pop('ceiling', None)
+            state['scale'], state['quality'] = self._choose(state['full_bytes'])
+        state['budget'] = self.budget
+        attempts = 0
+        while True:
+            size = (max(1, int(base[0] * state['scale'])), max(1, int(base[1] * state['scale'])))
+            data = self._encode(frame, size, state['quality'])
+            attempts += 1
+            if len(data) > self.budget:
+                state['ceiling'] = (state['scale'], state['quality'])
+            # what this encode says about the scene, for the next choice
+            state['full_bytes'] = self._estimate(data, state['scale'], state['quality'])
+            scale, quality = self._choose(state['full_bytes'])
+            if len(data) <= self.budget or attempts >= self.attempts or (scale, quality) == (state['scale'], state['quality']):
+                break
+            state['scale'], state['quality'] = scale, quality
+        used = (state['scale'], state['quality'])
+        # next frame of this scene: settings that fit are kept unless the estimate allows better
+        # ones that have not already gone over the budget for this scene
+        if len(data) <= self.budget and ((scale, quality) < used or (scale, quality) >= state.get('ceiling', (2.0, 0))):
+            scale, quality = used
+        with self._lock:
+            self.scenes[key] = dict(state, scale=scale, quality=quality)
+        return data, self._report(t0, data, size, used[1], attempts, key)
+
+    def _report(self, t0, data, size, quality, attempts, scene):
+        encode_ms = (time.perf_counter() - t0) * 1000.0
+        within = self.budget <= 0 or len(data) <= self.budget
+        with self._lock:
+            self.stats['frames'] += 1
+            self.stats['encodes'] += attempts
+            self.stats['over_budget'] += 0 if within else 1
+            self.stats['bytes'] += len(data)
+            self.stats['encode_ms'] += encode_ms
+        return {'bytes': len(data), 'width': size[0], 'height': size[1], 'quality': int(quality),
+                'encode_ms': round(encode_ms, 2), 'attempts': attempts, 'budget': self.budget,
+                'within_budget': within, 'scene': list(scene) if isinstance(scene, tuple) else scene}
+
+
+_shared_encoder = None
+_shared_encoder_lock = threading.Lock()
+
+
+def get_encoder():
+    """Process-wide encoder, so scene settings carry over between captures."""
+    global _shared_encoder
+    with _shared_encoder_lock:
+        if _shared_encoder is None:
+            _shared_encoder = BudgetJpegEncoder()
+        return _shared_encoder
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('images', nargs='+', help='image files; each is encoded --repeat times')
+    parser.add_argument('--budget', type=int, default=IMAGE_BYTE_BUDGET)
+    parser.add_argument('--max-size', default=f'{IMAGE_MAX_WIDTH}x{IMAGE_MAX_HEIGHT}')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    import cv2
+    max_size = tuple(int(v) for v in args.max_size.lower().split('x'))
+    encoder = BudgetJpegEncoder(budget=args.budget, max_size=max_size)
+    for path in args.images:
+        frame = cv2.imread(path)
+        if frame is None:
+            print(f'{path}: not an image')
+            continue
+        for _ in range(args.repeat):
+            _, info = encoder.encode(frame)
+            print(f"{os.path.basename(path)}: {info['bytes']} B {info['width']}x{info['height']} q{info['quality']} "
+                  f"{info['encode_ms']:.1f} ms, {info['attempts']} encode(s)")
+    print('stats:', encoder.stats)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""Live view: stream the persistent camera to the website while someone watches.
+
+Without it the website only sees a frame when someone triggers `capture`.
+`LiveViewStreamer` publishes frames from the shared `CameraService` at
+`LIVE_VIEW_FPS`:
+
+- Only while there are viewers. The backend counts subscribed browsers per
+  device and sends `live_view {viewers}`; with none the thread sleeps. With
+  `release_camera` (pi_client sets it for CAMERA_PERSISTENT=0, where the
+  stream has a camera service of its own) the camera is also stopped and
+  released on pause, so one-shot captures can open the device again.
+- Latest frame wins. At most one frame is in flight: a frame is only sent
+  after the backend acknowledged the previous one, and a tick that finds the
+  link busy is skipped instead of queued, so the next tick sends whatever is
+  newest. An ack that does not come within `LIVE_VIEW_ACK_TIMEOUT_SEC`
+  counts as lost.
+- The frame size follows the link. Every ack gives a throughput sample,
+  bytes over round trip, smoothed into an estimate. The byte budget per
+  frame is `LIVE_VIEW_LINK_SHARE` of what that rate moves in one frame
+  period, between `LIVE_VIEW_MIN_BYTES` and `LIVE_VIEW_MAX_BYTES`, and the
+  budget encoder (frame_encoder.py) picks resolution and quality for it.
+  Round-trip latency makes the sample low, which keeps it on the safe side:
+  frames grow while a round trip takes less than that share of the period
+  and shrink when it takes more. Lost acks halve the estimate.
+
+`send(payload, callback)` does the transport. pi_client passes a
+socket.io emit with an ack callback, and the callback gets the backend's
+answer, `{viewers}`.
+"""
+import os
+import threading
+import time
+from collections import deque
+
+from frame_encoder import BudgetJpegEncoder
+from photo_uplink import photo_payload
+
+LIVE_VIEW = os.environ.get('LIVE_VIEW', '1') not in ('0', 'false', 'False')
+LIVE_VIEW_FPS = float(os.environ.get('LIVE_VIEW_FPS', '5'))
+LIVE_VIEW_MAX_WIDTH = int(os.environ.get('LIVE_VIEW_MAX_WIDTH', '640'))
+LIVE_VIEW_MAX_HEIGHT = int(os.environ.get('LIVE_VIEW_MAX_HEIGHT', '480'))
+LIVE_VIEW_MIN_BYTES = int(os.environ.get('LIVE_VIEW_MIN_BYTES', '4000'))
+LIVE_VIEW_MAX_BYTES = int(os.environ.get('LIVE_VIEW_MAX_BYTES', '48000'))
+LIVE_VIEW_LINK_SHARE = float(os.environ.get('LIVE_VIEW_LINK_SHARE', '0.7'))
+LIVE_VIEW_ACK_TIMEOUT_SEC = float(os.environ.get('LIVE_VIEW_ACK_TIMEOUT_SEC', '2'))
+
+BANDWIDTH_SMOOTHING = 0.3  # weight of a new throughput sample
+
+
+class LiveViewStreamer:
+    """Sends the newest camera frame at up to `fps` while viewers are subscribed."""
+
+    def __init__(self, camera, send, fps=LIVE_VIEW_FPS, max_size=(LIVE_VIEW_MAX_WIDTH, LIVE_VIEW_MAX_HEIGHT),
+                 min_bytes=LIVE_VIEW_MIN_BYTES, max_bytes=LIVE_VIEW_MAX_BYTES, link_share=LIVE_VIEW_LINK_SHARE,
+                 ack_timeout_s=LIVE_VIEW_ACK_TIMEOUT_SEC, binary=True, device=None, release_camera=False):
+        self.camera = camera
+        self.send = send
+        self.period_s = 1.0 / max(fps, 0.1)
+        self.min_bytes = min_bytes
+        self.max_bytes = max_bytes
+        self.link_share = link_share
+        self.ack_timeout_s = ack_timeout_s
+        self.binary = binary
+        self.device = device
+        self.release_camera = release_camera
+        self._camera_open = False
+        self.encoder = BudgetJpegEncoder(budget=min_bytes, max_size=max_size)
+        self.viewers = 0
+        self.bandwidth = None  # bytes/s, smoothed
+        self._in_flight = None  # (seq, monotonic send time, bytes)
+        self._last_seq = None
+        self._last_ts = None
+        self._acks = deque(maxlen=20)  # ack times, for the delivered frame rate
+        self._rtts = deque(maxlen=20)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self.stats = {'sent': 0, 'acked': 0, 'skipped_busy': 0, 'lost': 0, 'bytes': 0, 'encode_ms': 0.0}
+
+    def set_viewers(self, viewers):
+        """Viewer count from the backend; 0 pauses the stream."""
+        viewers = max(0, int(viewers or 0))
+        if viewers and not self.viewers:
+            print(f'[live] {viewers} viewer(s); streaming at up to {1.0 / self.period_s:.1f} fps')
+        elif not viewers and self.viewers:
+            print('[live] no viewers; paused')
+        self.viewers = viewers
+        if viewers:
+            self._wake.set()
+
+    def _budget(self):
+        if self.bandwidth is None:
+            return self.min_bytes
+        return int(min(self.max_bytes, max(self.min_bytes, self.bandwidth * self.period_s * self.link_share)))
+
+    def _sample(self, bytes_per_s):
+        self.bandwidth = bytes_per_s if self.bandwidth is None else \
+            (1 - BANDWIDTH_SMOOTHING) * self.bandwidth + BANDWIDTH_SMOOTHING * bytes_per_s
+
+    def _on_ack(self, seq, answer=None):
+        with self._lock:
+            if self._in_flight is None or self._in_flight[0] != seq:
+                return  # late ack of a frame already counted as lost
+            _, sent_at, size = self._in_flight
+            self._in_flight = None
+            now = time.monotonic()
+            rtt = max(now - sent_at, 1e-3)
+            self.stats['acked'] += 1
+            self._acks.append(now)
+            self._rtts.append(rtt)
+            self._sample(size / rtt)
+        if isinstance(answer, dict) and 'viewers' in answer:
+            self.set_viewers(answer['viewers'])
+
+    def _tick(self):
+        with self._lock:
+            if self._in_flight is not None:
+                if time.monotonic() - self._in_flight[1] < self.ack_timeout_s:
+                    # link still busy with the previous frame: skip, the next tick takes a newer one
+                    self.stats['skipped_busy'] += 1
+                    return
+                self.stats['lost'] += 1
+                self.bandwidth = (self.bandwidth or self.min_bytes / self.period_s) / 2.0
+                self._in_flight = None
+        self._camera_open = True  # latest() starts the camera service
+        frame = self.camera.latest(timeout=self.period_s, newer_than=self._last_ts)
+        if frame is None or frame.seq == self._last_seq:
+            return
+        self._last_seq, self._last_ts = frame.seq, frame.ts
+        self.encoder.budget = self._budget()
+        jpeg, info = self.encoder.encode(frame.image)
+        payload = photo_payload(jpeg, self.binary, width=info['width'], height=info['height'], device=self.device,
+                                seq=frame.seq, ts=time.time(), quality=info['quality'],
+                                encode_ms=info['encode_ms'], budget=info['budget'])
+        seq = frame.seq
+        with self._lock:
+            self._in_flight = (seq, time.monotonic(), len(jpeg))
+            self.stats['sent'] += 1
+            self.stats['bytes'] += len(jpeg)
+            self.stats['encode_ms'] += info['encode_ms']
+        try:
+            self.send(payload, lambda *answer: self._on_ack(seq, answer[0] if answer else None))
+        except Exception as e:
+            print('[live] send failed:', e)
+            with self._lock:
+                self._in_flight = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            if not self.viewers:
+                if self.release_camera and self._camera_open:
+                    self.camera.stop()
+                    self._camera_open = False
+                self._wake.wait(1.0)
+                self._wake.clear()
+                continue
+            t = time.monotonic()
+            try:
+                self._tick()
+            except Exception as e:
+                print('[live] frame failed:', e)
+            self._stop.wait(max(0.0, self.period_s - (time.monotonic() - t)))
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='live-view', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.period_s + self.ack_timeout_s)
+            self._thread = None
+        if self.release_camera and self._camera_open:
+            self.camera.stop()
+            self._camera_open = False
+
+    def status(self):
+        with self._lock:
+            stats = dict(self.stats)
+            acks = list(self._acks)
+        sent = stats['sent']
+        return dict(stats, viewers=self.viewers, budget=self._budget(),
+                    rtt_ms=round(self._rtts[-1] * 1000.0, 1) if self._rtts else None,
+                    bandwidth_kbps=round(self.bandwidth * 8 / 1000.0, 1) if self.bandwidth else None,
+                    mean_bytes=round(stats['bytes'] / sent) if sent else None,
+                    mean_encode_ms=round(stats['encode_ms'] / sent, 2) if sent else None,
+                    fps=round((len(acks) - 1) / (acks[-1] - acks[0]), 2) if len(acks) > 1 and acks[-1] > acks[0] else None)
@@ -1,11 +1,10 @@
 # scripts/main.py 
 from pathlib import Path
 from gpiozero import Device
-from gpiozero.pins.pigpio import PiGPIOFactory
 import time
 
-from classify_image import classify_image
-from capture_image import capture  # <-- added this import
+from classify_image import classify_image, run_burst_inference, run_inference_from_frame
+from capture_image import ARCHIVE_CAPTURES, archive_frame, capture, capture_frame  # <-- added this import
 
 
 
@@ -14,22 +13,17 @@ from capture_image import capture  # <-- added this import
 
 import argparse
 
+from pin_factory import ensure_pin_factory
+
 # This sets the *default* factory for all gpiozero devices
-Device.pin_factory = PiGPIOFactory()
+ensure_pin_factory()
 
 
 
 import new_stepper_code #importing whole module to ensure gpio initialization
 import servo_control  #importing whole module to ensure gpio initialization
-
-
-CATEGORY_MAP = {
-    "Cables": 1, "Charger": 1, 
-    "Headphones": 2, 
-    "Battery": 3, 
-    "PCBs": 4, "Earphones": 2, 
-    "Mobile": 5, "Mouse": 5, "Printer": 5, "Remote Control": 5, "Smartwatch": 5,"Keyboard": 5
-    }
+from actuation_service import CATEGORY_MAP, run_sort_cycle
+from trace_log import RequestTrace, activate
 
 # CATEGORY_MAP = { 
 #     "Headphones": 2, 
@@ -43,9 +37,13 @@ def main():
     parser = argparse.ArgumentParser()
     parser.add_argument('--label', help='Optional predicted label to actuate on (skip capture/classify)')
     parser.add_argument('--actuate-only', action='store_true', help='Run actuators only (no capture/classify)')
+    parser.add_argument('--burst', type=int, default=0, help='Classify a burst of N frames with a batched vote')
+    parser.add_argument('--min-confidence', type=float, default=0.0, help='Skip actuation below this burst confidence')
     args = parser.parse_args()
 
     a_time = time.time()
+    # one JSONL record per run with every phase (see trace_stats.py)
+    trace = RequestTrace(f'main-{int(a_time * 1000)}', kind='sort_cycle')
 
     label = None
     if args.label:
@@ -54,13 +52,45 @@ def main():
     elif args.actuate_only:
         print('actuate-only requested but no label provided; nothing to do')
         return
+    elif args.burst > 1:
+        print(f'Capturing burst of {args.burst} frames...')
+        timings = {}
+        result = run_burst_inference(k=args.burst, timings=timings)
+        trace.add('capture', timings.get('capture_ms'), end=trace.t0 + timings.get('capture_ms', 0.0) / 1000.0)
+        trace.add('preprocess', timings.get('preprocess_ms'))
+        trace.add('inference', timings.get('inference_ms'))
+        print(f"\n✅ Final Prediction: {result.get('label')} "
+              f"(confidence {result.get('confidence', 0.0):.2f}, agreement {result.get('agreement')})\n")
+        if result.get('label') == 'error':
+            print('Classification failed:', result.get('error'))
+        elif result.get('confidence', 0.0) < args.min_confidence:
+            print('Confidence below --min-confidence; skipping actuation')
+        else:
+            label = result['label']
     else:
         print('Capturing image...')
-        image_path = capture()  # capture and get file path
+        with trace.span('capture'):
+            frame = capture_frame()  # in memory; nothing written unless ARCHIVE_CAPTURES
 
         print('Running classification...')
         try:
-            label = classify_image(str(image_path))
+            if frame is not None:
+                timings = {}
+                result = run_inference_from_frame(frame, timings=timings)
+                trace.add('inference', timings.get('inference_ms'))
+                trace.add('preprocess', timings.get('preprocess_ms'),
+                          end=time.monotonic() - timings.get('inference_ms', 0.0) / 1000.0)
+                if result.get('label') == 'error':
+                    raise RuntimeError(result.get('error'))
+                label = result['label']
+                if ARCHIVE_CAPTURES:
+                    with trace.span('archive'):
+                        archive_frame(frame, background=False)
+            else:
+                with trace.span('capture_file'):
+                    image_path = capture()  # libcamera-still file fallback
+                with trace.span('classify'):
+                    label = classify_image(str(image_path))
         except Exception as e:
             print('Classification failed:', e)
             label = None
@@ -69,6 +99,7 @@ def main():
 
     if not label:
         print('No valid label; skipping actuation')
+        trace.finish(label=None)
         return
 
     category_number = CATEGORY_MAP.get(label)
@@ -78,12 +109,8 @@ def main():
         print('No category mapping for label; skipping motor/servo actions')
     else:
         # Motor Control 
-        new_stepper_code.move_to_category(category_number)
-        time.sleep(3)  # Wait a moment at the category position
-        servo_control.run_servo()
-        time.sleep(3)  # Wait a moment before returning
-        new_stepper_code.return_to_initial(category_number)
-        time.sleep(1)
+        with activate(trace):
+            run_sort_cycle(category_number, new_stepper_code, servo_control)
 
 
 
@@ -95,6 +122,7 @@ def main():
         pass
     print("Shared pigpio factory closed.")
     b_time=time.time()
+    trace.finish(label=label, category=category_number)
     print(f"Total runtime:{b_time-a_time}")
 if __name__ == "__main__":
     main()
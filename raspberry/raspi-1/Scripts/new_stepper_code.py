@@ -1,9 +1,14 @@
 import time
-from gpiozero import Device, OutputDevice
-from gpiozero.pins.pigpio import PiGPIOFactory
+from gpiozero import OutputDevice
+
+from carousel import STEPPER_STEPS_PER_REV, Carousel
+from pin_factory import ensure_pin_factory
+from stepper_motion import make_backend
+from trace_log import phase
 
 # --- 1. INITIALIZE GLOBAL FACTORY (for precise timing) ---
-Device.pin_factory = PiGPIOFactory()
+# Reuses the factory if main.py / the actuation service already created one.
+ensure_pin_factory()
 
 # --- 2. DEFINE YOUR PINS (BCM numbering) ---
 PUL_PIN = 21  # STEP
@@ -20,6 +25,15 @@ DIR_INVERTED = True       # flip to False if opposite
 STEPS_CAT_2_4 = 150
 STEPS_CAT_3_5 = 300
 
+# Absolute bin positions in steps from Cat 1 (home), anticlockwise positive
+CATEGORY_POSITIONS = {
+    1: 0,
+    2: STEPS_CAT_2_4,
+    3: STEPS_CAT_3_5,
+    4: -STEPS_CAT_2_4,
+    5: -STEPS_CAT_3_5,
+}
+
 # --- 5. SETUP GPIO DEVICES ---
 ENA = OutputDevice(ENA_PIN)   # We’ll handle logic manually
 DIR = OutputDevice(DIR_PIN)
@@ -28,63 +42,58 @@ PUL = OutputDevice(PUL_PIN)
 # Enable driver once at startup (LOW = enable)
 ENA.off()
 
+# Pulse generation: pigpio waveforms with accel/decel ramps, or the sleep loop
+# (STEPPER_BACKEND, see stepper_motion.py)
+MOTION = make_backend(PUL, PUL_PIN, DIR, DIR_INVERTED, PULSE_WIDTH_SEC)
 
-def step_motor(steps, direction):
+
+def step_motor(steps, direction, wait=True):
     """
     Spins the motor a specific number of steps in a given direction.
+    With wait=False the waveform backend returns while the motor is still
+    moving; call MOTION.wait() before the next move.
     """
-    dir_signal = int(direction) ^ int(DIR_INVERTED)
-    DIR.value = dir_signal
-
     print(f"    Moving {steps} steps, direction: {'ACW' if direction == ACW else 'CW'}")
 
-    for _ in range(steps):
-        PUL.on()
-        time.sleep(PULSE_WIDTH_SEC)
-        PUL.off()
-        time.sleep(PULSE_WIDTH_SEC)
+    duration = MOTION.move(steps, direction, wait=wait)
 
-    print("    Move complete.")
+    if wait:
+        print(f"    Move complete ({MOTION.name}, {duration:.2f}s).")
 
 
 def move_to_category(category):
     """
-    Moves the motor to the specified category position.
+    Moves the motor straight from its current position to the specified
+    category position (shortest direction).
     """
     print(f"Moving to Category {category}...")
 
-    if category == 1:
-        print("Already at Cat 1 (Initial).")
-    elif category == 2:
-        step_motor(STEPS_CAT_2_4, ACW)
-    elif category == 3:
-        step_motor(STEPS_CAT_3_5, ACW)
-    elif category == 4:
-        step_motor(STEPS_CAT_2_4, CW)
-    elif category == 5:
-        step_motor(STEPS_CAT_3_5, CW)
+    if category not in CATEGORY_POSITIONS:
+        raise ValueError(f"Unknown category {category}")
+    if CAROUSEL.category == category:
+        print(f"Already at Cat {category}.")
     else:
-        print("Error: Unknown category.")
+        with phase('stepper_travel', category=category, backend=MOTION.name) as sp:
+            sp['steps'] = CAROUSEL.go_to(category)
 
 
-def return_to_initial(category):
+def return_to_initial(category=None):
     """
-    Returns the motor to the initial position.
+    Returns the motor to the initial position (Cat 1) from wherever it is.
+    `category` is accepted for older callers and ignored.
     """
-    print(f"Returning from Category {category}...")
+    print("Returning to Cat 1 (Initial)...")
 
-    if category == 1:
+    if CAROUSEL.category == CAROUSEL.home:
         print("Already at Cat 1 (Initial).")
-    elif category == 2:
-        step_motor(STEPS_CAT_2_4, CW)
-    elif category == 3:
-        step_motor(STEPS_CAT_3_5, CW)
-    elif category == 4:
-        step_motor(STEPS_CAT_2_4, ACW)
-    elif category == 5:
-        step_motor(STEPS_CAT_3_5, ACW)
     else:
-        print("Error: Unknown category.")
+        with phase('stepper_return', backend=MOTION.name) as sp:
+            sp['steps'] = CAROUSEL.go_home()
+
+
+# Every move goes through the carousel so it always knows where it is;
+# it assumes the carousel is at home when the driver starts.
+CAROUSEL = Carousel(step_motor, CATEGORY_POSITIONS, STEPPER_STEPS_PER_REV)
 
 
 def cleanup():
@@ -92,6 +101,7 @@ def cleanup():
     Safely disables the driver and closes pins.
     """
     print("Cleaning up stepper pins.")
+    MOTION.close()
     ENA.on()  # Disable driver (HIGH = disable)
     if 'ENA' in globals():
         ENA.close()
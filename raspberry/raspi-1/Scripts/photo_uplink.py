@@ -0,0 +1,39 @@
+"""Photo payloads for `iot-photo`.
+
+Frames used to go out as base64 strings inside JSON, which is a third larger
+than the JPEG and costs an encode on the Pi. Backends that can take binary
+frames say so with `binary_frames: true` in `register_success`.
+
+For those, `photo_payload()` puts the JPEG bytes in `image`, and
+python-socketio sends them as a binary attachment next to the JSON
+metadata. The metadata says what the attachment is, so the receiver needs
+no sniffing: `mime`, `bytes`, `encoding: 'binary'` and, when known, `width`
+and `height`. Other backends still get `image_b64` (`encoding: 'base64'`).
+`IMAGE_TRANSPORT=binary|base64` forces a format (default `auto`).
+"""
+import base64
+import os
+
+IMAGE_TRANSPORT = os.environ.get('IMAGE_TRANSPORT', 'auto').lower()
+
+
+def use_binary(server_info=None):
+    """Whether to send frames as bytes, given the backend's `register_success` payload."""
+    if IMAGE_TRANSPORT in ('binary', 'base64'):
+        return IMAGE_TRANSPORT == 'binary'
+    return bool((server_info or {}).get('binary_frames'))
+
+
+def photo_payload(jpeg, binary, mime='image/jpeg', width=None, height=None, **fields):
+    """`iot-photo` body for the encoded image `jpeg`; `fields` are requestId, device, ..."""
+    payload = dict(fields, mime=mime, bytes=len(jpeg))
+    if width and height:
+        payload['width'], payload['height'] = int(width), int(height)
+    if binary:
+        payload['image'] = bytes(jpeg)
+        payload['encoding'] = 'binary'
+    else:
+        payload['image_b64'] = base64.b64encode(jpeg).decode('ascii')
+        payload['encoding'] = 'base64'
+    return payload
+
@@ -0,0 +1,25 @@
+"""Shared gpiozero pin factory setup for the sorter scripts.
+
+Every hardware module used to create its own `PiGPIOFactory()` at import
+time, so importing `main.py` opened two pigpio connections and a long-lived
+process could never reuse an initialised factory. Call `ensure_pin_factory()`
+instead: it creates the pigpio factory once and returns the existing one on
+later calls.
+
+If `GPIOZERO_PIN_FACTORY` is set (e.g. `mock` for off-device runs) gpiozero's
+own selection is used instead of forcing pigpio.
+"""
+import os
+
+from gpiozero import Device
+
+
+def ensure_pin_factory():
+    """Return the process-wide pin factory, creating a PiGPIOFactory if none is set."""
+    if Device.pin_factory is None:
+        if os.environ.get('GPIOZERO_PIN_FACTORY'):
+            Device.pin_factory = Device._default_pin_factory()
+        else:
+            from gpiozero.pins.pigpio import PiGPIOFactory
+            Device.pin_factory = PiGPIOFactory()
+    return Device.pin_factory
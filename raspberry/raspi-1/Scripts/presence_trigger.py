@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""Object-presence trigger: classify only when an item has been placed.
+
+Runs on the persistent camera stream (`capture_image.CameraService`). Each
+analysed frame is shrunk to a small blurred grayscale image and compared
+- with the previous frame (motion: something is moving), and
+- with a learned background of the empty chute (presence: something is there).
+
+When presence appears the detector waits until there has been no motion for
+`settle_s`, then fires once with the full-resolution frame. It re-arms only
+after the chute is empty again, so one item gives one trigger. Analysis runs
+at `analysis_fps` (default 8) on ~160 px wide frames to keep CPU low; the
+cost per frame and the trigger latency are tracked in `stats()`.
+
+Standalone (detect -> classify -> actuate):
+
+    python3 Scripts/presence_trigger.py --actuate --min-confidence 0.6
+
+pi_client.py starts the same loop when `PRESENCE_TRIGGER=1`.
+"""
+import argparse
+import os
+import statistics
+import threading
+import time
+from collections import deque
+
+PRESENCE_ANALYSIS_FPS = float(os.environ.get('PRESENCE_ANALYSIS_FPS', '8'))
+PRESENCE_WIDTH = int(os.environ.get('PRESENCE_WIDTH', '160'))
+PRESENCE_PIXEL_THRESHOLD = int(os.environ.get('PRESENCE_PIXEL_THRESHOLD', '25'))
+PRESENCE_FRACTION = float(os.environ.get('PRESENCE_FRACTION', '0.04'))
+PRESENCE_MOTION_FRACTION = float(os.environ.get('PRESENCE_MOTION_FRACTION', '0.01'))
+PRESENCE_SETTLE_SEC = float(os.environ.get('PRESENCE_SETTLE_SEC', '0.6'))
+
+EMPTY, ARRIVING, OCCUPIED = 'empty', 'arriving', 'occupied'
+
+
+class PresenceDetector:
+    """Frame-differencing state machine: empty -> arriving -> occupied (fires) -> empty."""
+
+    def __init__(self, width=PRESENCE_WIDTH, pixel_threshold=PRESENCE_PIXEL_THRESHOLD,
+                 presence_fraction=PRESENCE_FRACTION, motion_fraction=PRESENCE_MOTION_FRACTION,
+                 settle_s=PRESENCE_SETTLE_SEC, clear_s=1.0, background_rate=0.05, max_occupied_s=60.0):
+        self.width = width
+        self.pixel_threshold = pixel_threshold
+        self.presence_fraction = presence_fraction
+        self.motion_fraction = motion_fraction
+        self.settle_s = settle_s
+        self.clear_s = clear_s
+        self.background_rate = background_rate
+        self.max_occupied_s = max_occupied_s
+        self.state = EMPTY
+        self._bg = None
+        self._prev = None
+        self._arrived_at = None
+        self._last_motion = None
+        self._last_present = None
+        self._occupied_at = None
+        self.last_presence = 0.0
+        self.last_motion = 0.0
+
+    def _small_gray(self, frame):
+        import cv2
+        h, w = frame.shape[:2]
+        scale = self.width / float(w)
+        small = cv2.resize(frame, (self.width, max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+        return cv2.GaussianBlur(gray, (5, 5), 0)
+
+    def _changed_fraction(self, a, b):
+        import cv2
+        diff = cv2.absdiff(a, b)
+        return cv2.countNonZero(cv2.threshold(diff, self.pixel_threshold, 255, cv2.THRESH_BINARY)[1]) / diff.size
+
+    def reset_background(self, frame):
+        self._bg = self._small_gray(frame).astype('float32')
+        self._prev = None
+        self.state = EMPTY
+
+    def update(self, frame, ts=None):
+        """Feed one BGR frame. Returns a trigger event dict when an item has settled, else None."""
+        import cv2
+        ts = time.monotonic() if ts is None else ts
+        gray = self._small_gray(frame)
+        if self._bg is None:
+            # first frame is assumed to show the empty chute
+            self._bg = gray.astype('float32')
+            self._prev = gray
+            return None
+        motion = self._changed_fraction(gray, self._prev) if self._prev is not None else 0.0
+        presence = self._changed_fraction(gray, cv2.convertScaleAbs(self._bg))
+        self._prev = gray
+        self.last_motion, self.last_presence = motion, presence
+        moving = motion >= self.motion_fraction
+        present = presence >= self.presence_fraction
+        if moving:
+            self._last_motion = ts
+        if present:
+            self._last_present = ts
+
+        if self.state == EMPTY:
+            if present:
+                self.state = ARRIVING
+                self._arrived_at = ts
+                self._last_motion = ts
+            else:
+                # slowly follow lighting changes while nothing is there
+                cv2.accumulateWeighted(gray, self._bg, self.background_rate)
+        elif self.state == ARRIVING:
+            if not present and ts - self._last_present >= self.clear_s:
+                self.state = EMPTY  # passed through (hand, shadow) without staying
+            elif present and ts - self._last_motion >= self.settle_s:
+                self.state = OCCUPIED
+                self._occupied_at = ts
+                return {
+                    'arrived_ts': self._arrived_at,
+                    'settled_ts': self._last_motion,
+                    'fired_ts': ts,
+                    'arrival_to_trigger_ms': round((ts - self._arrived_at) * 1000.0, 1),
+                    'settle_to_trigger_ms': round((ts - self._last_motion) * 1000.0, 1),
+                    'presence': round(presence, 4),
+                }
+        elif self.state == OCCUPIED:
+            if not present and ts - self._last_present >= self.clear_s:
+                self.state = EMPTY
+            elif not moving and ts - self._occupied_at >= self.max_occupied_s:
+                # nothing left for a long time: the "item" is a lasting scene change
+                self._bg = gray.astype('float32')
+                self.state = EMPTY
+        return None
+
+
+class PresenceTrigger:
+    """Pulls frames from the camera service, runs the detector and calls
+    `on_item(frame, event)` on its own thread when an item has settled."""
+
+    def __init__(self, on_item, camera=None, detector=None, analysis_fps=PRESENCE_ANALYSIS_FPS):
+        self.on_item = on_item
+        self.camera = camera
+        self.detector = detector or PresenceDetector()
+        self.interval = 1.0 / analysis_fps if analysis_fps > 0 else 0.0
+        self._thread = None
+        self._stop = threading.Event()
+        self._cpu_ms = deque(maxlen=500)
+        self._trigger_ms = deque(maxlen=100)
+        self._started = None
+        self._cpu_total = 0.0
+        self.frames = 0
+        self.triggers = 0
+
+    def start(self):
+        if self._thread is None:
+            if self.camera is None:
+                from capture_image import get_camera
+                self.camera = get_camera()
+                if self.camera is None:
+                    raise RuntimeError('presence trigger needs OpenCV and a camera')
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='presence-trigger', daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        self._started = time.monotonic()
+        last_ts = None
+        while not self._stop.is_set():
+            f = self.camera.latest(timeout=1.0, newer_than=last_ts)
+            if f is None:
+                continue
+            last_ts = f.ts
+            cpu = time.thread_time()
+            event = self.detector.update(f.image, f.ts)
+            cpu_ms = (time.thread_time() - cpu) * 1000.0
+            self._cpu_ms.append(cpu_ms)
+            self._cpu_total += cpu_ms
+            self.frames += 1
+            if event is not None:
+                self.triggers += 1
+                # frame timestamp -> detector decision, on top of the settle window
+                event['detect_ms'] = round((time.monotonic() - f.ts) * 1000.0, 1)
+                self._trigger_ms.append(event['arrival_to_trigger_ms'])
+                print(f'[presence] item settled: {event}')
+                try:
+                    self.on_item(f.image, event)
+                except Exception as e:
+                    print('[presence] handler failed:', e)
+            if self.interval:
+                # analyse at most `analysis_fps` frames per second
+                self._stop.wait(max(0.0, f.ts + self.interval - time.monotonic()))
+
+    def stats(self):
+        cpu = list(self._cpu_ms)
+        wall_s = time.monotonic() - self._started if self._started else 0.0
+        return {
+            'state': self.detector.state,
+            'frames': self.frames,
+            'triggers': self.triggers,
+            'presence': round(self.detector.last_presence, 4),
+            'motion': round(self.detector.last_motion, 4),
+            'cpu_ms_per_frame_p50': round(statistics.median(cpu), 3) if cpu else None,
+            'cpu_ms_per_frame_max': round(max(cpu), 3) if cpu else None,
+            # share of one core spent in the detector since start
+            'cpu_percent': round(self._cpu_total / (wall_s * 1000.0) * 100.0, 2) if wall_s else None,
+            'arrival_to_trigger_ms_p50': round(statistics.median(self._trigger_ms), 1) if self._trigger_ms else None,
+        }
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Classify (and optionally sort) items as they are placed')
+    parser.add_argument('--actuate', action='store_true', help='send each result to the actuation service')
+    parser.add_argument('--min-confidence', type=float, default=0.0, help='skip actuation below this confidence')
+    parser.add_argument('--stats-every', type=float, default=30.0, help='seconds between detector stats lines')
+    args = parser.parse_args()
+
+    from classify_image import run_inference_from_frame
+    from trace_log import RequestTrace
+
+    service = None
+    if args.actuate:
+        from actuation_service import ActuationService
+        service = ActuationService().start()
+
+    def on_item(frame, event):
+        trace = RequestTrace(f'presence-{int(time.time() * 1000)}', kind='presence')
+        trace.add('settle', event['arrival_to_trigger_ms'])
+        timings = {}
+        result = run_inference_from_frame(frame, timings=timings)
+        trace.add('preprocess', timings.get('preprocess_ms'))
+        trace.add('inference', timings.get('inference_ms'))
+        print(f"[presence] {result.get('label')} ({result.get('confidence', 0.0):.2f})")
+        if service is not None and result.get('label') != 'error':
+            if result.get('confidence', 0.0) < args.min_confidence:
+                print('[presence] confidence below --min-confidence; not sorting')
+            else:
+                with trace.span('actuation') as sp:
+                    sp.update(service.submit(label=result['label'], request_id=trace.request_id).result(timeout=120))
+        trace.finish(label=result.get('label'), confidence=result.get('confidence'), trigger=event)
+
+    trigger = PresenceTrigger(on_item).start()
+    print('[presence] watching for items (Ctrl+C to stop)')
+    try:
+        while True:
+            time.sleep(args.stats_every)
+            print('[presence] stats:', trigger.stats())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        trigger.stop()
+        if service is not None:
+            service.close()
+
+
+if __name__ == '__main__':
+    main()
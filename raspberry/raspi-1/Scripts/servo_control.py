@@ -1,12 +1,26 @@
 import gpiozero
+import json
+import os
+import threading
 import time
+from collections import namedtuple
+from concurrent.futures import Future
+
+from trace_log import current_trace
 
 # --- 1. CONFIGURATION ---
 SERVO_PIN_1 = 17  # GPIO 17
 SERVO_PIN_2 = 18  # GPIO 18
 
-# How long (in seconds) the servos stay in the 'open' position
-OPEN_TIME_SEC = 3.0
+# How long (in seconds) the servos stay in the 'open' position.
+# Tune it down to the shortest time an item reliably needs to fall.
+OPEN_TIME_SEC = float(os.environ.get('SERVO_DWELL_SEC', '3.0'))
+# Time for the horns to reach 'closed' before the gate counts as closed again
+CLOSE_TRAVEL_SEC = float(os.environ.get('SERVO_CLOSE_TRAVEL_SEC', '0.3'))
+# Time after the close command before the servos are detached
+CLOSE_SETTLE_SEC = float(os.environ.get('SERVO_CLOSE_SETTLE_SEC', '1.0'))
+# How long cleanup() waits for a running cycle before closing the servos anyway
+CLEANUP_TIMEOUT_SEC = float(os.environ.get('SERVO_CLEANUP_TIMEOUT_SEC', '10.0'))
 
 # Pulse widths for calibration.
 # These values (0.5ms to 2.5ms) work for most servos (e.g., MG996R, SG90)
@@ -14,6 +28,56 @@ OPEN_TIME_SEC = 3.0
 MIN_PULSE = 0.5/1000
 MAX_PULSE = 2.5/1000
 
+# Motion profile per servo (the defaults reproduce the original fixed sequence) (values are gpiozero Servo values, -1..1; with the
+# pulse widths above 1.0 is 90 degrees):
+#   closed / open  - positions
+#   delay_s        - when it starts opening, relative to the cycle start
+#   dwell_s        - how long it stays open
+#   close_speed    - value units per second while closing (0 = jump straight)
+# Override with JSON, e.g. SERVO_PROFILES='{"1": {"open": 0.2, "dwell_s": 1.2, "close_speed": 4}}'
+ServoProfile = namedtuple('ServoProfile', ['closed', 'open', 'delay_s', 'dwell_s', 'close_speed'])
+
+PROFILES = {
+    1: ServoProfile(closed=0.9, open=0.1, delay_s=0.0, dwell_s=OPEN_TIME_SEC + 0.1, close_speed=0.0),
+    2: ServoProfile(closed=-0.4, open=0.9, delay_s=0.1, dwell_s=OPEN_TIME_SEC + 0.1, close_speed=0.0),
+}
+
+
+def _apply_profile_overrides(raw):
+    """Apply SERVO_PROFILES on top of PROFILES; bad entries are reported and skipped."""
+    try:
+        overrides = json.loads(raw or '{}')
+    except ValueError as e:
+        print(f'SERVO_PROFILES ignored, not valid JSON: {e}')
+        return
+    if not isinstance(overrides, dict):
+        print('SERVO_PROFILES ignored, expected an object keyed by servo number')
+        return
+    for key, fields in overrides.items():
+        try:
+            servo = int(key)
+        except ValueError:
+            servo = None
+        if servo not in PROFILES or not isinstance(fields, dict):
+            print(f'SERVO_PROFILES: skipping {key!r}; servos are {sorted(PROFILES)} with an object of fields')
+            continue
+        values = {}
+        for field, value in fields.items():
+            if field not in ServoProfile._fields:
+                print(f'SERVO_PROFILES: servo {servo}: unknown field {field!r} skipped '
+                      f'(fields are {", ".join(ServoProfile._fields)})')
+                continue
+            try:
+                values[field] = float(value)
+            except (TypeError, ValueError):
+                print(f'SERVO_PROFILES: servo {servo}: {field}={value!r} is not a number; skipped')
+        PROFILES[servo] = PROFILES[servo]._replace(**values)
+
+
+_apply_profile_overrides(os.environ.get('SERVO_PROFILES'))
+
+RAMP_TICK_SEC = 0.02
+
 # --- 2. GLOBAL DEVICES ---
 servo_1 = None
 servo_2 = None
@@ -41,7 +105,133 @@ servo_1.value = None  # Detach to stop jitter
 servo_2.value = None  # Detach to stop jitter
 
 
-# --- 4. PUBLIC FUNCTION ---
+# --- 4. PUBLIC FUNCTIONS ---
+class GateCycle:
+    """Handle for one open/close cycle running in the background.
+
+    `closed` is set once every servo is back at 'closed' (the item has
+    dropped, the carousel may move); `future` resolves with the cycle timings
+    after the servos are detached.
+    """
+
+    def __init__(self):
+        self.opened = threading.Event()
+        self.closed = threading.Event()
+        self.future = Future()
+        self.requested = time.monotonic()
+
+    def wait_closed(self, timeout=None):
+        return self.closed.wait(timeout)
+
+    def result(self, timeout=None):
+        return self.future.result(timeout)
+
+    def done(self):
+        return self.future.done()
+
+
+# One cycle at a time: a new cycle starts after the previous one has detached
+_gate_lock = threading.Lock()
+
+
+def _position(profile, t):
+    """Where a servo should be `t` seconds into the cycle."""
+    if t < profile.delay_s:
+        return profile.closed
+    closing_for = t - profile.delay_s - profile.dwell_s
+    if closing_for < 0:
+        return profile.open
+    if profile.close_speed <= 0:
+        return profile.closed
+    travelled = profile.close_speed * closing_for
+    if travelled >= abs(profile.closed - profile.open):
+        return profile.closed
+    return profile.open + travelled * (1 if profile.closed > profile.open else -1)
+
+
+def _next_change(profile, t):
+    """Seconds until this servo's commanded position next changes (None if finished)."""
+    open_at = profile.delay_s
+    close_at = profile.delay_s + profile.dwell_s
+    if t < open_at:
+        return open_at - t
+    if t < close_at:
+        return close_at - t
+    if _position(profile, t) != profile.closed:
+        return RAMP_TICK_SEC
+    return None
+
+
+def _record_phases(trace, marks):
+    """Add consecutive (name, start, end) monotonic intervals to `trace`."""
+    if trace is None:
+        return
+    for name, start, end in marks:
+        if start is not None and end is not None:
+            trace.add(name, (end - start) * 1000.0, end=end)
+
+
+def _run_cycle(cycle, servos, profiles, trace=None):
+    with _gate_lock:
+        requested = cycle.requested
+        opened = close_cmd = closed = None
+        try:
+            start = time.monotonic()
+            last = {n: None for n in servos}
+            closed_at = None
+            print("Opening servos...")
+            while True:
+                t = time.monotonic() - start
+                for n, servo in servos.items():
+                    value = _position(profiles[n], t)
+                    if value != last[n]:
+                        servo.value = value
+                        last[n] = value
+                if not cycle.opened.is_set() and all(last[n] == profiles[n].open for n in servos):
+                    opened = time.monotonic()
+                    cycle.opened.set()
+                    print("Servos opened.")
+                waits = [w for w in (_next_change(profiles[n], t) for n in servos) if w is not None]
+                if not waits:
+                    break
+                time.sleep(min(waits))
+            close_cmd = time.monotonic()
+            closed_at = close_cmd - start
+            print("Servos closed.")
+
+            time.sleep(CLOSE_TRAVEL_SEC)  # Give them time to move
+            closed = time.monotonic()
+            _record_phases(trace, [('servo_wait', requested, start), ('servo_open', start, opened),
+                                   ('servo_dwell', opened, close_cmd), ('servo_close', close_cmd, closed)])
+            cycle.closed.set()
+            time.sleep(max(0.0, CLOSE_SETTLE_SEC - CLOSE_TRAVEL_SEC))
+
+            # Detaching to stop jitter
+            for servo in servos.values():
+                servo.value = None
+            # runs in the background; only lands in traces that are still open
+            _record_phases(trace, [('servo_settle', closed, time.monotonic())])
+            cycle.future.set_result({
+                'close_command_ms': round(closed_at * 1000.0, 1),
+                'total_ms': round((time.monotonic() - start) * 1000.0, 1),
+            })
+        except Exception as e:
+            cycle.closed.set()
+            cycle.future.set_exception(e)
+
+
+def open_gate(profiles=None):
+    """
+    Starts one "open and close" cycle on both servos in the background and
+    returns its GateCycle handle immediately.
+    """
+    cycle = GateCycle()
+    # phases land in the caller's trace even though the cycle runs on its own thread
+    threading.Thread(target=_run_cycle, args=(cycle, {1: servo_1, 2: servo_2}, profiles or PROFILES, current_trace()),
+                     name='servo-gate', daemon=True).start()
+    return cycle
+
+
 def run_servo():
     """
     Runs one full "open and close" cycle on both servos.
@@ -49,29 +239,7 @@ def run_servo():
     Open = min() equivalent
     Close = max() equivalent
     """
-
-    # Moving to open position
-    print("Opening servos...")
-    servo_1.value = 0.1   # servo1 min
-    time.sleep(0.1)
-    servo_2.value = 0.9    # servo2 min
-    print("Servos opened.")
-     # Give them time to move
-    time.sleep(OPEN_TIME_SEC)
-
-
-    # Moving to closed position
-    print("Closing servos...")
-    servo_1.value = 0.9    # servo1 max
-    time.sleep(0.1)
-    servo_2.value = -0.4   # servo2 max
-    print("Servos closed.")
-
-    time.sleep(1)  # Give them time to move
-
-    # Detaching to stop jitter
-    servo_1.value = None
-    servo_2.value = None
+    open_gate().result()
 
 
 # --- 5. CLEANUP FUNCTION ---
@@ -81,6 +249,11 @@ def cleanup():
     (Leaves the factory alone, as main.py handles it)
     """
     
+    # let a running cycle finish first, but never hang shutdown on a stuck one
+    if _gate_lock.acquire(timeout=CLEANUP_TIMEOUT_SEC):
+        _gate_lock.release()
+    else:
+        print(f"Servo cycle still running after {CLEANUP_TIMEOUT_SEC:g}s; closing servos anyway.")
     if servo_1:
         servo_1.close()
     if servo_2:
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""Cycle-time and throughput benchmark on simulated hardware (see sim_hardware.py).
+
+Default mode runs in-process. Items from a replay folder are placed one at a
+time, captured through `CameraService`, classified (model, or the oracle
+without one) and sorted by `ActuationService`. Sorting uses the real
+`new_stepper_code` / `servo_control` on simulated pins, scheduled by
+`PipelineScheduler` (`--serial` for the one-at-a-time loop). It reports
+items/min, vision and actuation time, and the per-phase breakdown of the
+sort-cycle traces.
+
+`--pi-client` runs `pi_client.py` end to end in a subprocess against a local
+socket.io server standing in for the backend. For each item the server sends
+`run_model` with `run_main` and waits until the item is sorted. It reports
+the run_model round trip, items/min and the client's trace phases.
+
+Without `--camera-folder` a few synthetic items are generated. Shorten the
+pauses with the usual env vars (ACTUATION_SETTLE_SEC, SERVO_DWELL_SEC, ...).
+
+    python3 Scripts/sim_bench.py --items 6
+    python3 Scripts/sim_bench.py --items 4 --pi-client --camera-folder Testing/val_images
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(SCRIPT_DIR))
+
+SYNTHETIC_LABELS = ['Battery', 'Mobile', 'Headphones', 'PCBs', 'Mouse', 'Cables']
+
+
+def make_synthetic_items(folder):
+    """One coloured block per class folder; enough for the oracle classifier and presence detection."""
+    import cv2
+    import numpy as np
+    for i, label in enumerate(SYNTHETIC_LABELS):
+        img = np.full((480, 640, 3), 30, dtype=np.uint8)
+        color = tuple(int(c) for c in np.random.RandomState(i).randint(80, 255, 3))
+        cv2.rectangle(img, (180 + 10 * i, 120), (460, 360 - 10 * i), color, -1)
+        (Path(folder) / label).mkdir(parents=True, exist_ok=True)
+        cv2.imwrite(str(Path(folder) / label / f'{i:03d}.jpg'), img)
+    return folder
+
+
+def _percentiles(values):
+    values = sorted(values)
+    if not values:
+        return None
+    return {'p50': round(statistics.median(values), 1), 'p90': round(values[int(round(0.9 * (len(values) - 1)))], 1),
+            'max': round(values[-1], 1)}
+
+
+def _temp_path(prefix, suffix):
+    """A fresh empty file for a subprocess or logger to write to; the path is kept for the report."""
+    fd, path = tempfile.mkstemp(prefix=prefix, suffix=suffix)
+    os.close(fd)
+    return path
+
+
+def bench_cycles(folder, items, pipelined):
+    os.environ['SIM_CAMERA_HOLD_SEC'] = '0'  # manual replay: the benchmark places each item
+    import sim_hardware
+    sim_hardware.install(camera_folder=folder)
+
+    import trace_log
+    from trace_stats import aggregate, read_records
+    trace_path = _temp_path('ew-sim-trace-', '.jsonl')
+    trace_log.TRACE_LOG_PATH = trace_path
+
+    import classify_image
+    import new_stepper_code
+    import servo_control
+    from actuation_service import ActuationService
+    from capture_image import get_camera
+    from pipeline_scheduler import PipelineScheduler
+
+    camera = get_camera()
+    camera.start(wait=True)
+    replay = sim_hardware.active_replay
+    placed = [0]
+    skipped = []
+
+    def acquire():
+        while placed[0] < items:
+            placed[0] += 1
+            replay.advance()
+            t = time.monotonic()
+            f = camera.latest(newer_than=t, timeout=5.0)
+            if f is None:
+                print(f'[sim] item {placed[0]}: no frame within 5s; skipped')
+                skipped.append(placed[0])
+                continue
+            result = classify_image.run_inference_from_frame(f.image)
+            if result.get('label') in (None, 'error'):
+                print('[sim] no usable label:', result)
+                continue
+            result['requestId'] = f'sim-{placed[0]}'
+            return result
+        return None
+
+    service = ActuationService(stepper=new_stepper_code, servo=servo_control).start()
+    try:
+        report = PipelineScheduler(acquire, service, pipelined=pipelined).run()
+    finally:
+        service.close()
+        camera.stop()
+    report['skipped'] = skipped
+    records = list(read_records([trace_path], 'sort_cycle'))
+    report['cycle_ms'] = _percentiles([r['total_ms'] for r in records])
+    report['phases'] = aggregate(records)
+    return report
+
+
+def bench_pi_client(folder, items, port, timeout_s=120.0):
+    import queue
+    from socketserver import ThreadingMixIn
+    from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+    import socketio
+    from trace_stats import aggregate, read_records
+
+    class _Server(ThreadingMixIn, WSGIServer):
+        daemon_threads = True
+
+    class _QuietHandler(WSGIRequestHandler):
+        def log_message(self, *args):
+            pass
+
+    # wsgiref cannot hand over the socket for websocket upgrades; long-polling is enough here
+    sio = socketio.Server(async_mode='threading', transports=['polling'])
+    device = {}
+    registered = threading.Event()
+    results = queue.Queue()
+
+    @sio.on('register_device')
+    def on_register(sid, data):
+        device['sid'] = sid
+        sio.emit('register_success', {'name': data.get('name')}, to=sid)
+        registered.set()
+
+    @sio.on('iot-model-result')
+    def on_result(sid, data):
+        results.put((time.monotonic(), data))
+
+    httpd = make_server('127.0.0.1', port, socketio.WSGIApp(sio), server_class=_Server, handler_class=_QuietHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+
+    log_path = _temp_path('ew-sim-pi-client-', '.log')
+    # each item stays in view long enough for one cycle; no empty frames in between
+    env = dict(os.environ, PYTHONUNBUFFERED='1', SIM_CAMERA_GAP_SEC='0', CAMERA_WARMUP_SEC='0')
+    env.setdefault('SIM_CAMERA_HOLD_SEC', '2')
+    with open(log_path, 'w') as log:
+        proc = subprocess.Popen([sys.executable, str(SCRIPT_DIR / 'sim_run.py'), '--camera-folder', str(folder), '--',
+                                 str(SCRIPT_DIR.parent / 'pi_client.py'), '--server', f'http://127.0.0.1:{port}'],
+                                stdout=log, stderr=subprocess.STDOUT, env=env)
+    try:
+        if not registered.wait(timeout_s):
+            raise SystemExit(f'pi_client did not register; see {log_path}')
+        round_trips = []
+        t_start = time.monotonic()
+        for i in range(items):
+            request_id = f'sim-{i}'
+            t = time.monotonic()
+            sio.emit('run_model', {'requestId': request_id, 'params': {'run_main': True}}, to=device['sid'])
+            t_result, data = results.get(timeout=timeout_s)
+            round_trips.append((t_result - t) * 1000.0)
+            print(f"[sim] {request_id}: {data.get('label')} in {round_trips[-1]:.0f} ms")
+            # wait until the item has been sorted before placing the next one
+            deadline = time.monotonic() + timeout_s
+            while not any(r.get('requestId') == request_id for r in read_records([log_path], 'sort_cycle')):
+                if time.monotonic() > deadline or proc.poll() is not None:
+                    raise SystemExit(f'{request_id} was not sorted; see {log_path}')
+                time.sleep(0.2)
+        elapsed = time.monotonic() - t_start
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+        httpd.shutdown()
+    records = list(read_records([log_path], 'sort_cycle'))
+    return {
+        'mode': 'pi_client',
+        'items': items,
+        'elapsed_s': round(elapsed, 2),
+        'items_per_min': round(items / elapsed * 60.0, 2),
+        'run_model_round_trip_ms': _percentiles(round_trips),
+        'run_model_phases': aggregate(read_records([log_path], 'run_model')),
+        'cycle_ms': _percentiles([r['total_ms'] for r in records]),
+        'phases': aggregate(records),
+        'log': log_path,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--items', type=int, default=6)
+    parser.add_argument('--camera-folder', help='images to replay (class-named subfolders); default: synthetic')
+    parser.add_argument('--serial', action='store_true', help='one item at a time instead of pipelined')
+    parser.add_argument('--pi-client', action='store_true', help='end to end through pi_client.py and socket.io')
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--out', help='also write the JSON report here')
+    args = parser.parse_args()
+
+    folder = args.camera_folder or make_synthetic_items(tempfile.mkdtemp(prefix='ew-sim-items-'))
+    if args.pi_client:
+        report = bench_pi_client(folder, args.items, args.port)
+    else:
+        report = bench_cycles(folder, args.items, pipelined=not args.serial)
+    print(json.dumps(report, indent=2))
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
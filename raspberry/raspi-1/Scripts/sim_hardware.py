@@ -0,0 +1,264 @@
+"""Simulated sorter hardware for running the Pi code on a plain Linux box.
+
+`install()` swaps in, before any hardware module is imported:
+
+- `SimFactory`, gpiozero's mock pin factory with PWM-capable pins (servos),
+  and echo-timed trigger pins for every ultrasonic sensor in
+  `SIM_ULTRASONIC_PINS`. A `DistanceSensor` measures a real echo pulse
+  whose length comes from `SimBins` (bins filling at `SIM_FILL_CM_PER_MIN`,
+  plus noise).
+- The stepper runs on the waveform backend against `MockWavePi`, as on the
+  Pi; servo dwell and the sort-cycle pauses sleep for real.
+- A replay camera: with `CAMERA_SOURCE` set to a folder of images,
+  `CameraService` reads from `FolderCapture` instead of `cv2.VideoCapture`.
+  Each image is shown for `SIM_CAMERA_HOLD_SEC` followed by
+  `SIM_CAMERA_GAP_SEC` of empty chute. A hold of 0 switches to manual mode,
+  where `advance()` places the next item.
+- Without a model file, an oracle classifier takes the label from the shown
+  image's folder name (`Battery/001.jpg` -> Battery) after
+  `SIM_INFERENCE_MS` of simulated inference.
+
+Use `sim_run.py` to run any script (main.py, pi_client.py, the monitors) on
+it, and `sim_bench.py` for cycle-time / throughput numbers.
+"""
+import os
+import random
+import threading
+import time
+from pathlib import Path
+
+from gpiozero.pins.mock import MockFactory, MockPWMPin, MockTriggerPin
+
+# trigger:echo pairs (BCM) of every ultrasonic config in the repo
+SIM_ULTRASONIC_PINS = os.environ.get('SIM_ULTRASONIC_PINS', '23:24,27:22,8:7,6:13,19:26')
+SIM_BIN_START_CM = float(os.environ.get('SIM_BIN_START_CM', '45'))
+SIM_BIN_MIN_CM = float(os.environ.get('SIM_BIN_MIN_CM', '8'))
+SIM_FILL_CM_PER_MIN = float(os.environ.get('SIM_FILL_CM_PER_MIN', '1.0'))
+SIM_DISTANCE_NOISE_CM = float(os.environ.get('SIM_DISTANCE_NOISE_CM', '0.3'))
+SIM_CAMERA_FPS = float(os.environ.get('SIM_CAMERA_FPS', '15'))
+SIM_CAMERA_HOLD_SEC = float(os.environ.get('SIM_CAMERA_HOLD_SEC', '3'))
+SIM_CAMERA_GAP_SEC = float(os.environ.get('SIM_CAMERA_GAP_SEC', '1'))
+SIM_INFERENCE_MS = float(os.environ.get('SIM_INFERENCE_MS', '120'))
+
+IMAGE_EXTS = ('.jpg', '.jpeg', '.png', '.bmp')
+SPEED_OF_SOUND_CM_S = 34326.0  # same constant gpiozero uses
+
+# The most recently opened replay; sim_bench drives it in manual mode
+active_replay = None
+
+
+def parse_pin_pairs(spec):
+    pairs = {}
+    for item in spec.split(','):
+        if item.strip():
+            trigger, echo = item.split(':')
+            pairs[int(trigger)] = int(echo)
+    return pairs
+
+
+class SimBins:
+    """Distances seen by the simulated ultrasonic sensors, keyed by trigger pin."""
+
+    def __init__(self, start_cm=SIM_BIN_START_CM, min_cm=SIM_BIN_MIN_CM, fill_cm_per_min=SIM_FILL_CM_PER_MIN,
+                 noise_cm=SIM_DISTANCE_NOISE_CM, seed=0):
+        self.start_cm = start_cm
+        self.min_cm = min_cm
+        self.fill_cm_per_min = fill_cm_per_min
+        self.noise_cm = noise_cm
+        self._rng = random.Random(seed)
+        self._t0 = time.monotonic()
+        self._fixed = {}
+        self._lock = threading.Lock()
+
+    def set_distance(self, trigger, cm):
+        """Pin a bin to a distance (None returns it to the filling model)."""
+        with self._lock:
+            if cm is None:
+                self._fixed.pop(trigger, None)
+            else:
+                self._fixed[trigger] = cm
+
+    def distance_cm(self, trigger):
+        with self._lock:
+            cm = self._fixed.get(trigger)
+            noise = self._rng.gauss(0.0, self.noise_cm) if self.noise_cm else 0.0
+        if cm is None:
+            # every bin fills at the same rate, offset a little per pin so they differ
+            minutes = (time.monotonic() - self._t0) / 60.0
+            cm = self.start_cm - (trigger % 5) * 3.0 - self.fill_cm_per_min * minutes
+        return max(self.min_cm, cm) + noise
+
+
+class SimUltrasonicPin(MockTriggerPin):
+    """Trigger pin whose echo length matches the bin's simulated distance."""
+
+    def __init__(self, factory, info, echo_pin=None, bins=None, trigger=None):
+        super().__init__(factory, info, echo_pin=echo_pin)
+        self.bins = bins
+        self.trigger = trigger
+
+    def _echo(self):
+        self.echo_time = 2.0 * self.bins.distance_cm(self.trigger) / SPEED_OF_SOUND_CM_S
+        super()._echo()
+
+
+class SimFactory(MockFactory):
+    """MockFactory with PWM pins (servos) and simulated HC-SR04 sensors."""
+
+    def __init__(self, ultrasonic_pins=None, bins=None):
+        super().__init__(pin_class=MockPWMPin)
+        self.ultrasonic_pins = parse_pin_pairs(SIM_ULTRASONIC_PINS) if ultrasonic_pins is None else ultrasonic_pins
+        self.bins = bins or SimBins()
+
+    def _gpio_number(self, name):
+        for _header, info in self.board_info.find_pin(name):
+            if info.name.startswith('GPIO'):
+                return int(info.name[4:])
+        return None
+
+    def pin(self, name, pin_class=None, **kwargs):
+        num = self._gpio_number(name)
+        if pin_class is None and num in self.ultrasonic_pins:
+            echo = super().pin(self.ultrasonic_pins[num])
+            return super().pin(name, pin_class=SimUltrasonicPin, echo_pin=echo, bins=self.bins, trigger=num)
+        return super().pin(name, pin_class, **kwargs)
+
+
+class FolderCapture:
+    """`cv2.VideoCapture` look-alike that plays a folder of images at camera pace."""
+
+    def __init__(self, folder, fps=SIM_CAMERA_FPS, hold_s=SIM_CAMERA_HOLD_SEC, gap_s=SIM_CAMERA_GAP_SEC):
+        global active_replay
+        self.folder = Path(folder)
+        self.paths = sorted(p for p in self.folder.rglob('*') if p.suffix.lower() in IMAGE_EXTS)
+        self.fps = fps
+        self.hold_s = hold_s
+        self.gap_s = gap_s
+        self.showing = hold_s > 0  # manual mode starts on an empty chute
+        self.index = 0 if self.showing else -1
+        self._t0 = time.monotonic()
+        self._next_read = self._t0
+        self._cache = {}
+        self._blank = None
+        active_replay = self
+
+    def isOpened(self):
+        return bool(self.paths)
+
+    def set(self, prop, value):
+        return True
+
+    def get(self, prop):
+        return 0.0
+
+    def release(self):
+        pass
+
+    def _image(self, path):
+        img = self._cache.get(path)
+        if img is None:
+            import cv2
+            img = self._cache[path] = cv2.imread(str(path))
+        return img
+
+    @property
+    def current_path(self):
+        return self.paths[self.index] if self.paths and self.showing else None
+
+    @property
+    def current_label(self):
+        path = self.current_path
+        return path.parent.name if path is not None else None
+
+    def advance(self):
+        """Manual mode: place the next item in front of the camera."""
+        self.index = (self.index + 1) % len(self.paths)
+        self.showing = True
+
+    def clear(self):
+        """Manual mode: take the item away (empty chute)."""
+        self.showing = False
+
+    def read(self):
+        now = time.monotonic()
+        if now < self._next_read:
+            time.sleep(self._next_read - now)
+        self._next_read = max(now, self._next_read) + 1.0 / self.fps
+        if self.hold_s > 0:
+            slot = self.hold_s + self.gap_s
+            elapsed = time.monotonic() - self._t0
+            self.index = int(elapsed // slot) % len(self.paths)
+            self.showing = elapsed % slot < self.hold_s
+        img = self._image(self.paths[self.index])
+        if img is None:
+            return False, None
+        if not self.showing:
+            if self._blank is None:
+                import numpy as np
+                self._blank = np.zeros_like(img)
+            return True, self._blank.copy()
+        return True, img.copy()
+
+
+def _oracle_result():
+    time.sleep(SIM_INFERENCE_MS / 1000.0)
+    label = active_replay.current_label if active_replay is not None else None
+    return label
+
+
+def install_oracle_classifier():
+    """Replace model inference with the replay's ground-truth label (no model file needed)."""
+    import classify_image
+
+    def run_inference_from_frame(frame, model_path=None, timings=None):
+        t = time.monotonic()
+        label = _oracle_result()
+        if timings is not None:
+            timings['preprocess_ms'] = 0.0
+            timings['inference_ms'] = (time.monotonic() - t) * 1000.0
+        if label not in classify_image.CLASSES:
+            return {'label': 'error', 'confidence': 0.0, 'error': f'no item in view ({label!r})'}
+        return {'label': label, 'confidence': 1.0}
+
+    def classify_batch(frames, model_path=None, timings=None):
+        import torch
+        t = time.monotonic()
+        label = _oracle_result()
+        probs = torch.zeros(len(frames), len(classify_image.CLASSES))
+        if label in classify_image.CLASSES:
+            probs[:, classify_image.CLASSES.index(label)] = 1.0
+        if timings is not None:
+            timings['preprocess_ms'] = 0.0
+            timings['inference_ms'] = (time.monotonic() - t) * 1000.0
+        return probs
+
+    classify_image.run_inference_from_frame = run_inference_from_frame
+    classify_image.classify_batch = classify_batch
+
+
+def install(camera_folder=None, oracle=None):
+    """Install the simulated hardware for this process; call before importing the sorter modules.
+
+    `oracle=None` uses the oracle classifier when replaying a camera folder
+    and the model file is missing.
+    """
+    from gpiozero import Device
+
+    os.environ.setdefault('STEPPER_BACKEND', 'wave')  # what the Pi runs (pigpio)
+    if camera_folder:
+        os.environ['CAMERA_SOURCE'] = str(Path(camera_folder).resolve())
+        os.environ.setdefault('CAMERA_WARMUP_SEC', '0')
+    factory = SimFactory()
+    Device.pin_factory = factory
+    if oracle is None and camera_folder:
+        try:
+            import classify_image
+            oracle = not classify_image._resolve_model_path().exists()
+        except Exception:
+            oracle = False  # no torch: callers fall back to their own stubs
+    if oracle:
+        install_oracle_classifier()
+        print(f'[sim] oracle classifier (labels from image folders, {SIM_INFERENCE_MS:.0f} ms)')
+    print(f'[sim] mock GPIO with {len(factory.ultrasonic_pins)} ultrasonic sensors; camera '
+          f'{os.environ.get("CAMERA_SOURCE", "0")}; stepper backend {os.environ["STEPPER_BACKEND"]}')
+    return factory
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""Run a sorter script unchanged on simulated hardware (see sim_hardware.py).
+
+    python3 Scripts/sim_run.py --camera-folder Testing/sim_items -- Scripts/main.py
+    python3 Scripts/sim_run.py --camera-folder Testing/sim_items -- pi_client.py --server http://127.0.0.1:5055
+    python3 Scripts/sim_run.py -- ultrasonic_monitor.py
+    python3 Scripts/sim_run.py -- Scripts/ultrasonic.py
+
+Everything after `--` is the script and its arguments.
+"""
+import argparse
+import os
+import runpy
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def main():
+    argv = sys.argv[1:]
+    if '--' not in argv:
+        raise SystemExit('usage: sim_run.py [--camera-folder DIR] [--oracle|--no-oracle] -- SCRIPT [ARGS...]')
+    split = argv.index('--')
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--camera-folder', help='images to replay as the camera (class-named subfolders)')
+    parser.add_argument('--oracle', dest='oracle', action='store_true', default=None,
+                        help='label items from their folder names instead of the model')
+    parser.add_argument('--no-oracle', dest='oracle', action='store_false')
+    args = parser.parse_args(argv[:split])
+    script = os.path.abspath(argv[split + 1])
+
+    import sim_hardware
+    sim_hardware.install(camera_folder=args.camera_folder, oracle=args.oracle)
+
+    sys.argv = [script] + argv[split + 2:]
+    sys.path.insert(0, os.path.dirname(script))
+    runpy.run_path(script, run_name='__main__')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,272 @@
+"""Pulse generation for the carousel stepper (used by new_stepper_code).
+
+Two backends drive the PUL pin:
+
+- `WaveBackend` builds the pulse train as pigpio waveforms, which pigpiod
+  clocks out by DMA, so step timing has no scheduler jitter. Moves follow a
+  trapezoidal profile: they start at `STEPPER_START_HZ`, accelerate at
+  `STEPPER_ACCEL` steps/s^2 up to `STEPPER_MAX_HZ`, cruise, then decelerate
+  symmetrically. The acceleration and deceleration ramps are one waveform each,
+  and the cruise is a single step repeated by a wave-chain loop, so every move
+  needs only three waveforms. While the chain runs, the calling thread only
+  sleeps (or returns at once with `wait=False`).
+- `SleepLoopBackend` is the original constant-speed loop that toggles PUL
+  with `time.sleep(PULSE_WIDTH_SEC)`.
+
+`STEPPER_BACKEND=auto` (default) uses waveforms when gpiozero runs on the
+pigpio factory and the sleep loop otherwise; `wave` / `sleep` force one.
+Off the Pi, `GPIOZERO_PIN_FACTORY=mock` with `STEPPER_BACKEND=wave` runs
+`WaveBackend` against `MockWavePi`, which records the pulses and simulates
+the transmit time:
+
+    GPIOZERO_PIN_FACTORY=mock STEPPER_BACKEND=wave python3 Scripts/stepper_motion.py
+"""
+import math
+import os
+import time
+from collections import namedtuple
+
+STEPPER_BACKEND = os.environ.get('STEPPER_BACKEND', 'auto').lower()
+# 0 -> derive from PULSE_WIDTH_SEC, the speed the carousel is known to run at
+STEPPER_START_HZ = float(os.environ.get('STEPPER_START_HZ', '0'))
+STEPPER_MAX_HZ = float(os.environ.get('STEPPER_MAX_HZ', '250'))
+STEPPER_ACCEL = float(os.environ.get('STEPPER_ACCEL', '500'))  # steps/s^2
+
+MAX_RAMP_STEPS = 2000  # keeps each ramp waveform well inside pigpiod's pulse limit
+CHAIN_LOOP_MAX = 0xFFFF
+
+# Same fields as pigpio.pulse, so it can be passed to wave_add_generic.
+Pulse = namedtuple('Pulse', ['gpio_on', 'gpio_off', 'delay'])
+
+
+def plan_move(steps, start_hz, max_hz, accel):
+    """Trapezoidal profile for `steps` steps.
+
+    Returns `(ramp_us, cruise_us, cruise_steps)`: the per-step periods of the
+    acceleration ramp in microseconds (deceleration is the same list reversed),
+    and the cruise period and step count. Short moves never reach `max_hz` and
+    give a triangle profile.
+    """
+    if steps <= 0:
+        return [], 0, 0
+    max_hz = max(max_hz, start_hz)
+    ramp_hz = []
+    v = start_hz
+    if accel > 0:
+        while v < max_hz and len(ramp_hz) < min(steps // 2, MAX_RAMP_STEPS):
+            ramp_hz.append(v)
+            v = math.sqrt(v * v + 2.0 * accel)  # speed after one more step at constant acceleration
+    cruise_hz = min(v, max_hz)
+    ramp_us = [int(round(1e6 / hz)) for hz in ramp_hz]
+    return ramp_us, int(round(1e6 / cruise_hz)), steps - 2 * len(ramp_us)
+
+
+def plan_duration_s(plan):
+    ramp_us, cruise_us, cruise_steps = plan
+    return (2 * sum(ramp_us) + cruise_us * cruise_steps) / 1e6
+
+
+class SleepLoopBackend:
+    """The original loop: constant speed, timed with time.sleep on the calling thread."""
+
+    name = 'sleep'
+
+    def __init__(self, pul, dir_device, dir_inverted, pulse_width_s):
+        self.pul = pul
+        self.dir = dir_device
+        self.dir_inverted = dir_inverted
+        self.pulse_width_s = pulse_width_s
+
+    def move(self, steps, direction, wait=True):
+        """Step `steps` times; always blocks. Returns the move duration in seconds."""
+        t = time.monotonic()
+        self.dir.value = int(direction) ^ int(self.dir_inverted)
+        for _ in range(steps):
+            self.pul.on()
+            time.sleep(self.pulse_width_s)
+            self.pul.off()
+            time.sleep(self.pulse_width_s)
+        return time.monotonic() - t
+
+    def wait(self):
+        pass
+
+    def busy(self):
+        return False
+
+    def close(self):
+        pass
+
+
+class WaveBackend:
+    """Hardware-timed moves with trapezoidal ramps, sent to pigpiod as a wave chain."""
+
+    name = 'wave'
+
+    def __init__(self, pi, pul_gpio, dir_device, dir_inverted, start_hz, max_hz=STEPPER_MAX_HZ,
+                 accel=STEPPER_ACCEL):
+        self.pi = pi
+        self.mask = 1 << int(pul_gpio)
+        self.dir = dir_device
+        self.dir_inverted = dir_inverted
+        self.start_hz = start_hz
+        self.max_hz = max_hz
+        self.accel = accel
+        self._expected_end = 0.0
+
+    def _pulses(self, periods_us):
+        pulses = []
+        for period in periods_us:
+            high = period // 2
+            pulses.append(Pulse(self.mask, 0, high))
+            pulses.append(Pulse(0, self.mask, period - high))
+        return pulses
+
+    def _create_wave(self, periods_us):
+        self.pi.wave_add_generic(self._pulses(periods_us))
+        wid = self.pi.wave_create()
+        if wid < 0:
+            raise RuntimeError(f'pigpio wave_create failed ({wid})')
+        return wid
+
+    def move(self, steps, direction, wait=True):
+        """Start a move; with `wait` block until pigpiod has sent it. Returns the planned duration in seconds."""
+        self.wait()  # never change DIR or rebuild waves under a running chain
+        plan = plan_move(steps, self.start_hz, self.max_hz, self.accel)
+        ramp_us, cruise_us, cruise_steps = plan
+        if not ramp_us and not cruise_steps:
+            return 0.0
+        self.dir.value = int(direction) ^ int(self.dir_inverted)
+        self.pi.wave_clear()
+        chain = []
+        if ramp_us:
+            chain.append(self._create_wave(ramp_us))
+        if cruise_steps:
+            cruise = self._create_wave([cruise_us])
+            remaining = cruise_steps
+            while remaining:
+                n = min(remaining, CHAIN_LOOP_MAX)
+                chain += [255, 0, cruise, 255, 1, n & 0xFF, n >> 8]
+                remaining -= n
+        if ramp_us:
+            chain.append(self._create_wave(ramp_us[::-1]))
+        duration = plan_duration_s(plan)
+        self.pi.wave_chain(chain)
+        self._expected_end = time.monotonic() + duration
+        if wait:
+            self.wait()
+        return duration
+
+    def busy(self):
+        return bool(self.pi.wave_tx_busy())
+
+    def wait(self):
+        """Sleep until the current chain has been sent."""
+        remaining = self._expected_end - time.monotonic()
+        if remaining > 0:
+            time.sleep(remaining)
+        while self.busy():
+            time.sleep(0.005)
+
+    def close(self):
+        self.pi.wave_tx_stop()
+        self.pi.wave_clear()
+
+
+class MockWavePi:
+    """Stand-in for the waveform calls of `pigpio.pi` when gpiozero uses the mock factory.
+
+    Records every chain and marks the transmitter busy for as long as the
+    real pulses would take, so code paths and timing can be checked off-device.
+    """
+
+    def __init__(self):
+        self._pending = []
+        self._waves = {}
+        self._busy_until = 0.0
+        self.chains = []  # (steps, duration_us) per wave_chain call
+
+    def wave_clear(self):
+        self._pending = []
+        self._waves = {}
+
+    def wave_add_generic(self, pulses):
+        self._pending.extend(pulses)
+        return len(self._pending)
+
+    def wave_create(self):
+        wid = len(self._waves)
+        self._waves[wid] = self._pending
+        self._pending = []
+        return wid
+
+    def _wave_cost(self, wid):
+        pulses = self._waves[wid]
+        return sum(p.delay for p in pulses), sum(1 for p in pulses if p.gpio_on)
+
+    def wave_chain(self, chain):
+        total_us = steps = 0
+        loops = []
+        i = 0
+        while i < len(chain):
+            if chain[i] == 255 and chain[i + 1] == 0:
+                loops.append((total_us, steps))
+                i += 2
+            elif chain[i] == 255 and chain[i + 1] == 1:
+                count = chain[i + 2] + 256 * chain[i + 3]
+                start_us, start_steps = loops.pop()
+                total_us += (total_us - start_us) * (count - 1)
+                steps += (steps - start_steps) * (count - 1)
+                i += 4
+            elif chain[i] == 255 and chain[i + 1] == 2:
+                total_us += chain[i + 2] + 256 * chain[i + 3]
+                i += 4
+            else:
+                us, n = self._wave_cost(chain[i])
+                total_us += us
+                steps += n
+                i += 1
+        self.chains.append((steps, total_us))
+        self._busy_until = time.monotonic() + total_us / 1e6
+        return 0
+
+    def wave_tx_busy(self):
+        return int(time.monotonic() < self._busy_until)
+
+    def wave_tx_stop(self):
+        self._busy_until = 0.0
+        return 0
+
+
+def make_backend(pul, pul_gpio, dir_device, dir_inverted, pulse_width_s, mode=STEPPER_BACKEND):
+    """Pick the motion backend for the active gpiozero pin factory."""
+    from gpiozero import Device
+    from gpiozero.pins.mock import MockFactory
+
+    factory = Device.pin_factory
+    pi = getattr(factory, 'connection', None)  # pigpio.pi when gpiozero runs on PiGPIOFactory
+    if mode == 'wave' or (mode == 'auto' and pi is not None):
+        if pi is None:
+            if not isinstance(factory, MockFactory):
+                raise RuntimeError('STEPPER_BACKEND=wave needs the pigpio pin factory')
+            pi = MockWavePi()
+        start_hz = STEPPER_START_HZ or 1.0 / (2.0 * pulse_width_s)
+        return WaveBackend(pi, pul_gpio, dir_device, dir_inverted, start_hz)
+    return SleepLoopBackend(pul, dir_device, dir_inverted, pulse_width_s)
+
+
+if __name__ == '__main__':
+    import new_stepper_code as stepper
+
+    motion = stepper.MOTION
+    print(f'backend: {motion.name}')
+    for steps in (stepper.STEPS_CAT_2_4, stepper.STEPS_CAT_3_5):
+        sleep_s = steps * 2 * stepper.PULSE_WIDTH_SEC
+        if motion.name == 'wave':
+            ramp_us, cruise_us, cruise_steps = plan = plan_move(steps, motion.start_hz, motion.max_hz, motion.accel)
+            print(f'{steps} steps: ramp {len(ramp_us)} steps x2, cruise {cruise_steps} steps at '
+                  f'{1e6 / cruise_us:.0f} Hz -> {plan_duration_s(plan):.2f}s (sleep loop {sleep_s:.2f}s)')
+        t = time.monotonic()
+        motion.move(steps, stepper.ACW)
+        print(f'  measured {time.monotonic() - t:.2f}s')
+    stepper.cleanup()
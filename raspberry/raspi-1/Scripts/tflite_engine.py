@@ -0,0 +1,122 @@
+"""TFLite (XNNPACK) inference for models produced by `convert_to_tflite.py`.
+
+Needs only numpy, Pillow and a TFLite interpreter: `tflite-runtime` or
+`ai-edge-litert` on the Pi, or full `tensorflow` on a dev machine. Class
+names and quantization parameters come from the `<model>.labels.json`
+manifest written by the converter.
+
+    clf = TFLiteClassifier('Model/resnet50_ewaste_int8.tflite', num_threads=4)
+    clf.classify(pil_image)  # {'label': 'Battery', 'confidence': 0.93}
+"""
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+IMAGE_SIZE = 224
+# Same normalisation as classify_image.preprocess
+MEAN = [0.485, 0.456, 0.406]
+STD = [0.229, 0.224, 0.225]
+
+
+def _interpreter_class():
+    try:
+        from tflite_runtime.interpreter import Interpreter
+    except Exception:
+        try:
+            from ai_edge_litert.interpreter import Interpreter
+        except Exception:
+            from tensorflow.lite.python.interpreter import Interpreter
+    return Interpreter
+
+
+def manifest_path_for(model_path) -> Path:
+    p = Path(model_path)
+    return p.with_name(p.stem + '.labels.json')
+
+
+def load_manifest(model_path):
+    """Return the converter's manifest, or None if there is none next to the model."""
+    path = manifest_path_for(model_path)
+    if not path.exists():
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def preprocess_nhwc(img, size=IMAGE_SIZE, mean=MEAN, std=STD):
+    """PIL image -> normalised float32 HWC array (matches the torchvision pipeline)."""
+    img = img.convert('RGB').resize((size, size), Image.BILINEAR)
+    arr = np.asarray(img, dtype=np.float32) / 255.0
+    return (arr - np.asarray(mean, dtype=np.float32)) / np.asarray(std, dtype=np.float32)
+
+
+def softmax(x):
+    e = np.exp(x - x.max(axis=-1, keepdims=True))
+    return e / e.sum(axis=-1, keepdims=True)
+
+
+class TFLiteClassifier:
+    """Holds one interpreter (created once) and classifies PIL images."""
+
+    def __init__(self, model_path, num_threads=None, labels=None):
+        self.model_path = str(model_path)
+        self.manifest = load_manifest(model_path) or {}
+        self.labels = labels or self.manifest.get('labels')
+        self.num_threads = num_threads or int(os.environ.get('TFLITE_THREADS', '0')) or os.cpu_count() or 1
+        t = time.perf_counter()
+        self.interpreter = _interpreter_class()(model_path=self.model_path, num_threads=self.num_threads)
+        self.interpreter.allocate_tensors()
+        self.load_s = time.perf_counter() - t
+        self._inp = self.interpreter.get_input_details()[0]
+        self._out = self.interpreter.get_output_details()[0]
+        self.size = int(self._inp['shape'][1])
+        cfg = self.manifest.get('input', {})
+        self.mean = cfg.get('mean', MEAN)
+        self.std = cfg.get('std', STD)
+
+    def _quantize(self, arr):
+        if self._inp['dtype'] == np.float32:
+            return arr.astype(np.float32)
+        scale, zero_point = self._inp['quantization']
+        info = np.iinfo(self._inp['dtype'])
+        return np.clip(np.round(arr / scale + zero_point), info.min, info.max).astype(self._inp['dtype'])
+
+    def _dequantize(self, out):
+        if out.dtype == np.float32:
+            return out
+        scale, zero_point = self._out['quantization']
+        return (out.astype(np.float32) - zero_point) * scale
+
+    def invoke(self, tensor):
+        """Run one already-quantized NHWC input; returns float logits for that image."""
+        self.interpreter.set_tensor(self._inp['index'], tensor)
+        self.interpreter.invoke()
+        return self._dequantize(self.interpreter.get_tensor(self._out['index']))[0]
+
+    def prepare(self, img):
+        return self._quantize(preprocess_nhwc(img, self.size, self.mean, self.std))[None, ...]
+
+    def label_for(self, idx):
+        if self.labels and idx < len(self.labels):
+            return self.labels[idx]
+        return f'class_{idx}'
+
+    def classify(self, img, timings=None):
+        """Classify a PIL image or image path. Returns {'label', 'confidence'}."""
+        if not isinstance(img, Image.Image):
+            img = Image.open(img)
+        t = time.monotonic()
+        tensor = self.prepare(img)
+        t_pre = time.monotonic()
+        scores = self.invoke(tensor)
+        if timings is not None:
+            timings['preprocess_ms'] = (t_pre - t) * 1000.0
+            timings['inference_ms'] = (time.monotonic() - t_pre) * 1000.0
+        if self.manifest.get('output', {}).get('kind', 'logits') == 'logits':
+            scores = softmax(scores)
+        top = int(scores.argmax())
+        return {'label': self.label_for(top), 'confidence': float(scores[top])}
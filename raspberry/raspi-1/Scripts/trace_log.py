@@ -0,0 +1,136 @@
+"""Per-request span log for the Pi client.
+
+A `RequestTrace` records named spans (capture, preprocess, inference, emit,
+actuation, ...) against `time.monotonic()` and writes one compact JSON line
+per request, so a slow sort can be broken down after the fact and matched
+against the backend / model service logs by `requestId`.
+
+Lines are always printed with a `[trace]` prefix; set `TRACE_LOG_PATH` to
+also append them to a JSONL file. `t0_mono` is the trace's start on the
+`time.monotonic()` clock and span `start_ms` values are offsets from it.
+
+Code that does not own the trace (stepper, servo) records phases with
+`phase(name)`, which lands in the trace made current on that thread with
+`activate(trace)` and does nothing when there is none. `trace_stats.py`
+aggregates the log into per-phase percentiles.
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+TRACE_LOG_PATH = os.environ.get('TRACE_LOG_PATH', '')
+
+_write_lock = threading.Lock()
+_current = threading.local()
+
+
+def write_record(record, path=None):
+    """Print a trace record and append it to `path` / TRACE_LOG_PATH if set."""
+    line = json.dumps(record, separators=(',', ':'), default=str)
+    print('[trace]', line)
+    path = path or TRACE_LOG_PATH
+    if not path:
+        return
+    try:
+        with _write_lock:
+            with open(path, 'a') as f:
+                f.write(line + '\n')
+    except Exception as e:
+        print('[trace] failed to write trace log:', e)
+
+
+class RequestTrace:
+    """Collects spans for one request. Safe to add spans from several threads."""
+
+    def __init__(self, request_id=None, kind='run_model', **fields):
+        self.request_id = request_id
+        self.kind = kind
+        self.fields = dict(fields)
+        self.t0 = time.monotonic()
+        self.wall_ts = time.time()
+        self.spans = []
+        self._lock = threading.Lock()
+        self._finished = False
+
+    def _offset_ms(self, t):
+        return round((t - self.t0) * 1000.0, 2)
+
+    @contextmanager
+    def span(self, name, **attrs):
+        """Time the enclosed block. Yields a dict that callers may annotate."""
+        start = time.monotonic()
+        rec = {'name': name, 'start_ms': self._offset_ms(start)}
+        rec.update(attrs)
+        try:
+            yield rec
+        except Exception as e:
+            rec['error'] = str(e)
+            raise
+        finally:
+            rec['dur_ms'] = round((time.monotonic() - start) * 1000.0, 2)
+            with self._lock:
+                self.spans.append(rec)
+
+    def add(self, name, dur_ms, end=None, **attrs):
+        """Record a span measured elsewhere (e.g. inside the classifier) that ended
+        at monotonic time `end` (default: just now)."""
+        if dur_ms is None:
+            return
+        end = time.monotonic() if end is None else end
+        rec = {'name': name, 'start_ms': round(self._offset_ms(end) - float(dur_ms), 2), 'dur_ms': round(float(dur_ms), 2)}
+        rec.update(attrs)
+        with self._lock:
+            self.spans.append(rec)
+
+    def headers(self):
+        """HTTP headers that propagate this trace to downstream services."""
+        return {'X-Request-Id': str(self.request_id)} if self.request_id else {}
+
+    def finish(self, **fields):
+        """Write the record once; later calls are ignored."""
+        with self._lock:
+            if self._finished:
+                return None
+            self._finished = True
+            spans = sorted(self.spans, key=lambda s: s.get('start_ms', 0))
+        record = {
+            'requestId': self.request_id,
+            'kind': self.kind,
+            'ts': self.wall_ts,
+            't0_mono': round(self.t0, 4),
+            'total_ms': self._offset_ms(time.monotonic()),
+            'spans': spans,
+        }
+        record.update(self.fields)
+        record.update(fields)
+        write_record(record)
+        return record
+
+
+def current_trace():
+    """The trace activated on this thread, or None."""
+    return getattr(_current, 'trace', None)
+
+
+@contextmanager
+def activate(trace):
+    """Make `trace` the current trace of this thread for the enclosed block."""
+    prev = current_trace()
+    _current.trace = trace
+    try:
+        yield trace
+    finally:
+        _current.trace = prev
+
+
+@contextmanager
+def phase(name, **attrs):
+    """Span in the current trace; a no-op (yielding a throwaway dict) without one."""
+    trace = current_trace()
+    if trace is None:
+        yield dict(attrs)
+    else:
+        with trace.span(name, **attrs) as rec:
+            yield rec
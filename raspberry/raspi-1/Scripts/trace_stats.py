@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""Aggregate trace records into per-phase latency percentiles.
+
+Reads JSONL written with `TRACE_LOG_PATH` (or console logs; `[trace] `
+prefixes and other lines are skipped) and prints, per phase, the count, the
+p50/p90/p99/max duration and the phase's share of the summed record totals.
+Phases are the span names: capture, preprocess, inference, stepper_travel,
+settle_at_category, gate, servo_open, servo_dwell, servo_close,
+settle_after_drop, stepper_return, ...
+
+    python3 Scripts/trace_stats.py /home/pi/ew-trace.jsonl --kind sort_cycle
+    python3 Scripts/trace_stats.py trace-*.jsonl --json
+"""
+import argparse
+import json
+import statistics
+from collections import defaultdict
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+
+def read_records(paths, kind=None):
+    for path in paths:
+        with open(path) as f:
+            for line in f:
+                line = line.strip()
+                if line.startswith('[trace] '):
+                    line = line[len('[trace] '):]
+                if not line.startswith('{'):
+                    continue
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue
+                if 'spans' in rec and (kind is None or rec.get('kind') == kind):
+                    yield rec
+
+
+def aggregate(records):
+    """Per-phase stats; a phase occurring several times in one record is summed."""
+    per_phase = defaultdict(list)
+    totals = []
+    for rec in records:
+        totals.append(rec.get('total_ms', 0.0))
+        summed = defaultdict(float)
+        for span in rec['spans']:
+            summed[span['name']] += span.get('dur_ms', 0.0)
+        for name, ms in summed.items():
+            per_phase[name].append(ms)
+    grand_total = sum(totals) or 1.0
+    phases = {}
+    for name, values in per_phase.items():
+        phases[name] = {
+            'count': len(values),
+            'p50_ms': round(statistics.median(values), 1),
+            'p90_ms': round(_percentile(values, 0.9), 1),
+            'p99_ms': round(_percentile(values, 0.99), 1),
+            'max_ms': round(max(values), 1),
+            'share': round(sum(values) / grand_total, 4),
+        }
+    summary = {'records': len(totals)}
+    if totals:
+        summary['total_ms'] = {'p50': round(statistics.median(totals), 1), 'p90': round(_percentile(totals, 0.9), 1),
+                               'p99': round(_percentile(totals, 0.99), 1), 'max': round(max(totals), 1)}
+    # largest share first: that is where the cycle time goes
+    summary['phases'] = dict(sorted(phases.items(), key=lambda kv: -kv[1]['share']))
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('paths', nargs='+', help='trace JSONL files or console logs')
+    parser.add_argument('--kind', help='only records of this kind (sort_cycle, run_model, presence, ...)')
+    parser.add_argument('--json', action='store_true', help='print the summary as JSON')
+    args = parser.parse_args()
+
+    summary = aggregate(read_records(args.paths, args.kind))
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return
+    if not summary['records']:
+        raise SystemExit('no trace records found')
+    t = summary['total_ms']
+    print(f"{summary['records']} records; total p50 {t['p50']} ms, p90 {t['p90']} ms, p99 {t['p99']} ms")
+    print(f"{'phase':<22}{'count':>7}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}{'share':>8}")
+    for name, p in summary['phases'].items():
+        print(f"{name:<22}{p['count']:>7}{p['p50_ms']:>10}{p['p90_ms']:>10}{p['p99_ms']:>10}{p['max_ms']:>10}"
+              f"{p['share']:>8.1%}")
+
+
+if __name__ == '__main__':
+    main()
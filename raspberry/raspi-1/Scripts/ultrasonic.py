@@ -7,15 +7,25 @@ Configuration:
 - Set `BIN_UPDATE_URL` env var to the backend endpoint (e.g. https://.../api/bin/update)
 - Or set `BACKEND_URL` to the backend base and this script will append `/api/bin/update`.
 
-This script reads multiple gpiozero DistanceSensor devices and POSTs JSON updates.
+This script reads the bin sensors and POSTs one JSON batch per cycle with the bins whose
+fill level changed, plus a periodic heartbeat (see bin_telemetry.py).
+
+By default all sensors are pinged by one `UltrasonicSampler` (interleaved, median-filtered;
+see ultrasonic_sampler.py); `ULTRASONIC_SAMPLER=0` goes back to one gpiozero DistanceSensor
+per bin.
+
+With `ADAPTIVE_POLLING` (default) the wait between cycles follows the bins' fill rates
+instead of the fixed `UPDATE_INTERVAL` (see adaptive_polling.py).
 """
 from __future__ import annotations
 
 import os
 import time
-import requests
 from gpiozero import DistanceSensor
 
+from adaptive_polling import ADAPTIVE_POLLING, AdaptivePoller
+from bin_telemetry import TelemetryUplink, make_reading, open_outbox
+
 # ================== CONFIGURATION ==================
 
 # Backend endpoint where data will be sent. Prefer setting as env var.
@@ -27,6 +37,7 @@ if BIN_UPDATE_URL and BIN_UPDATE_URL.count('/') <= 3:
     BIN_UPDATE_URL = BIN_UPDATE_URL + '/api/bin/update'
 
 UPDATE_INTERVAL = float(os.environ.get('UPDATE_INTERVAL', '2.0'))
+ULTRASONIC_SAMPLER = os.environ.get('ULTRASONIC_SAMPLER', '1') not in ('0', 'false', 'False')
 
 # Ultrasonic sensor config
 # Use BCM pin numbers. Customize these entries for your hardware.
@@ -80,6 +91,17 @@ def create_sensors():
     return sensors
 
 
+def create_sampler():
+    from ultrasonic_sampler import UltrasonicSampler
+    return UltrasonicSampler([(cfg['bin_id'], cfg['trigger_pin'], cfg['echo_pin']) for cfg in BINS_CONFIG])
+
+
+def read_sensor_cm(sensor):
+    # gpiozero DistanceSensor.distance -> meters
+    distance_m = sensor.distance
+    return distance_m * 100.0 if distance_m is not None else None
+
+
 def distance_to_percentage(current_cm, empty_cm, full_cm):
     if empty_cm == full_cm:
         return 0.0
@@ -88,45 +110,35 @@ def distance_to_percentage(current_cm, empty_cm, full_cm):
     return ratio * 100.0
 
 
-def send_update(bin_id, percent_full, distance_cm):
-    payload = {
-        'bin_id': bin_id,
-        'percent_full': round(percent_full, 2) if percent_full is not None else None,
-        'distance_cm': round(distance_cm, 2) if distance_cm is not None else None,
-        'timestamp': time.time(),
-    }
-
-    if not BIN_UPDATE_URL:
-        print('[ultrasonic] BIN_UPDATE_URL not set; payload:', payload)
-        return
-
-    try:
-        resp = requests.post(BIN_UPDATE_URL, json=payload, timeout=3)
-        resp.raise_for_status()
-        print(f"[ultrasonic] Sent update for {bin_id}: {payload}")
-    except requests.RequestException as e:
-        print(f"[ultrasonic] Failed to send update for {bin_id}: {e}")
-
-
 def main():
     print('Initializing ultrasonic sensors...')
-    sensors = create_sensors()
+    sampler = create_sampler() if ULTRASONIC_SAMPLER else None
+    if sampler is not None:
+        # the sampler answers for every configured bin; failed sensors just read None
+        sensors = [(cfg, None) for cfg in BINS_CONFIG]
+        print(f"[ultrasonic] sampler: slots {sampler.slots}, full sweep <= {sampler.sweep_bound_s * 1000:.0f} ms")
+    else:
+        sensors = create_sensors()
     if not sensors:
         print('[ultrasonic] no sensors initialized; exiting')
         return
+    uplink = TelemetryUplink(BIN_UPDATE_URL, device=os.environ.get('DEVICE_NAME'),
+                             outbox=open_outbox('ultrasonic') if BIN_UPDATE_URL else None)
+    poller = AdaptivePoller(UPDATE_INTERVAL) if ADAPTIVE_POLLING else None
     print('Started bin monitoring loop. Press Ctrl+C to exit.')
 
     try:
         while True:
+            # one median window of interleaved sweeps for all bins at once
+            distances = sampler.read_all() if sampler is not None else {}
+            batch = []
             for cfg, sensor in sensors:
                 bin_id = cfg['bin_id']
                 empty_cm = cfg['empty_distance_cm']
                 full_cm = cfg['full_distance_cm']
 
-                # gpiozero DistanceSensor.distance -> meters
                 try:
-                    distance_m = sensor.distance
-                    distance_cm = distance_m * 100.0 if distance_m is not None else None
+                    distance_cm = distances.get(bin_id) if sampler is not None else read_sensor_cm(sensor)
                 except Exception as e:
                     print(f"[ultrasonic] read error for {bin_id}: {e}")
                     distance_cm = None
@@ -136,15 +148,26 @@ def main():
                     percent_full = distance_to_percentage(distance_cm, empty_cm, full_cm)
 
                 print(f"{bin_id}: {distance_cm} cm -> {percent_full}% full")
-                send_update(bin_id, percent_full, distance_cm)
+                batch.append(make_reading(bin_id, distance_cm, percent_full))
 
-            time.sleep(UPDATE_INTERVAL)
+            uplink.publish(batch)
+            interval = poller.update(batch) if poller is not None else UPDATE_INTERVAL
+            if poller is not None:
+                ttf = [(r['bin_id'], poller.status(r['bin_id']).get('time_to_full_s')) for r in batch]
+                ttf = ', '.join(f'{b} full in {sec}s' for b, sec in ttf if sec is not None)
+                print(f"[ultrasonic] next cycle in {interval:.1f}s" + (f" ({ttf})" if ttf else ''))
+            time.sleep(interval)
 
     except KeyboardInterrupt:
         print('\nExiting... cleaning up sensors.')
+        print('[ultrasonic] uplink:', uplink.stats)
+        uplink.close()
         try:
+            if sampler is not None:
+                sampler.close()
             for _, s in sensors:
-                s.close()
+                if s is not None:
+                    s.close()
         except Exception:
             pass
 
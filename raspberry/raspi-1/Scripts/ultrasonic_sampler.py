@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""All HC-SR04 bin sensors driven from one scheduler.
+
+One `gpiozero.DistanceSensor` per bin starts one polling thread per sensor.
+The sensors ping independently, so a burst from one bin can be heard by the
+next bin's echo pin (crosstalk), and the monitors then read them one after
+another anyway. `UltrasonicSampler` replaces that:
+
+- Echo timing uses edge callbacks on the raw gpiozero pins. On the pigpio
+  factory these are pigpiod callbacks with microsecond ticks, so no thread
+  has to poll the echo pins. The trigger pulse is `gpio_trigger` (10 us).
+- Pings are sent in time slots of `ULTRASONIC_SLOT_SEC` (60 ms, the HC-SR04
+  measurement cycle). Only sensors at least `ULTRASONIC_MIN_GAP` positions
+  apart in the bin list share a slot (2 = never two adjacent bins; 0 = one
+  sensor per slot). Five bins therefore need two slots, and a full sweep
+  takes at most `slots * ULTRASONIC_SLOT_SEC`. With `ULTRASONIC_RING=1` the
+  first and last bins count as adjacent too.
+- Every bin keeps its last `ULTRASONIC_MEDIAN_WINDOW` good echoes, and a
+  reading is their median. A missing echo (nothing within
+  `ULTRASONIC_MAX_DISTANCE_M`) is counted but never averaged in. Echoes
+  older than one window of sweeps are ignored, so a sensor that stops
+  answering reads None instead of its last median.
+
+`read_all()` runs one window of sweeps on the calling thread and returns the
+medians; that is all the periodic monitors need. `start()` keeps sweeping
+on a single background thread for callers that want a fresh value at any
+time.
+
+    python3 Scripts/ultrasonic_sampler.py --sweeps 20      # on the Pi
+    python3 Scripts/sim_run.py -- Scripts/ultrasonic_sampler.py
+"""
+import argparse
+import os
+import statistics
+import threading
+import time
+from collections import deque
+
+from pin_factory import ensure_pin_factory
+
+ULTRASONIC_SLOT_SEC = float(os.environ.get('ULTRASONIC_SLOT_SEC', '0.06'))
+ULTRASONIC_MIN_GAP = int(os.environ.get('ULTRASONIC_MIN_GAP', '2'))
+ULTRASONIC_RING = os.environ.get('ULTRASONIC_RING', '0') in ('1', 'true', 'True')
+ULTRASONIC_MEDIAN_WINDOW = int(os.environ.get('ULTRASONIC_MEDIAN_WINDOW', '5'))
+ULTRASONIC_MAX_DISTANCE_M = float(os.environ.get('ULTRASONIC_MAX_DISTANCE_M', '2.0'))
+
+SPEED_OF_SOUND_M_S = 343.26  # same constant gpiozero's DistanceSensor uses
+TRIGGER_PULSE_US = 10
+
+
+def plan_slots(count, min_gap=ULTRASONIC_MIN_GAP, ring=ULTRASONIC_RING):
+    """Group sensor indexes into ping slots; sensors closer than `min_gap` never share one."""
+    if min_gap <= 0:
+        return [[i] for i in range(count)]
+
+    def distance(a, b):
+        d = abs(a - b)
+        return min(d, count - d) if ring else d
+
+    slots = []
+    for i in range(count):
+        for slot in slots:
+            if all(distance(i, j) >= min_gap for j in slot):
+                slot.append(i)
+                break
+        else:
+            slots.append([i])
+    return slots
+
+
+class _Channel:
+    """One trigger/echo pair: edge-timed echo and the median window."""
+
+    def __init__(self, factory, bin_id, trigger, echo, window):
+        self.bin_id = bin_id
+        self.factory = factory
+        self.trigger = factory.pin(trigger)
+        self.echo = factory.pin(echo)
+        self.trigger.function = 'output'
+        self.trigger.state = False
+        self.echo.function = 'input'
+        self.echo.pull = 'down'
+        self.samples = deque(maxlen=window)  # (monotonic time, cm)
+        self.misses = 0
+        self.last_ts = None
+        self._gpio = int(trigger)
+        self._rise = None
+        self._echo_s = None
+        self._done = None
+        self.echo.edges = 'both'
+        self.echo.when_changed = self._on_edge
+
+    def _on_edge(self, ticks, state):
+        if state:
+            self._rise = ticks
+        elif self._rise is not None and self._echo_s is None:
+            self._echo_s = self.factory.ticks_diff(ticks, self._rise)
+            if self._done is not None:
+                self._done()
+
+    def fire(self, done):
+        self._rise = None
+        self._echo_s = None
+        self._done = done
+        pi = getattr(self.factory, 'connection', None)
+        if pi is not None:
+            pi.gpio_trigger(self._gpio, TRIGGER_PULSE_US, 1)
+        else:
+            self.trigger.state = True
+            time.sleep(TRIGGER_PULSE_US / 1e6)
+            self.trigger.state = False
+
+    def collect(self, max_distance_m):
+        """Store the echo of the last ping; returns the distance in cm or None."""
+        echo_s, self._done = self._echo_s, None
+        if echo_s is None or echo_s * SPEED_OF_SOUND_M_S / 2.0 > max_distance_m:
+            self.misses += 1
+            return None
+        cm = echo_s * SPEED_OF_SOUND_M_S / 2.0 * 100.0
+        self.samples.append((time.monotonic(), cm))
+        self.last_ts = time.time()
+        return cm
+
+    def median_cm(self, since=None):
+        """Median of the window, only counting echoes from `since` (monotonic) on."""
+        cms = [cm for t, cm in self.samples if since is None or t >= since]
+        return statistics.median(cms) if cms else None
+
+    def close(self):
+        self.echo.when_changed = None
+        for pin in (self.echo, self.trigger):
+            try:
+                pin.close()
+            except Exception:
+                pass
+
+
+class UltrasonicSampler:
+    """Pings every bin sensor from one scheduler and keeps a median per bin.
+
+    `bins` is a list of `(bin_id, trigger_bcm, echo_bcm)` in physical order
+    (neighbours in the list are neighbours on the sorter).
+    """
+
+    def __init__(self, bins, window=ULTRASONIC_MEDIAN_WINDOW, slot_s=ULTRASONIC_SLOT_SEC,
+                 min_gap=ULTRASONIC_MIN_GAP, ring=ULTRASONIC_RING, max_distance_m=ULTRASONIC_MAX_DISTANCE_M):
+        self.factory = ensure_pin_factory()
+        self.window = window
+        self.slot_s = slot_s
+        self.max_distance_m = max_distance_m
+        self.channels = []
+        for bin_id, trigger, echo in bins:
+            try:
+                self.channels.append(_Channel(self.factory, bin_id, trigger, echo, window))
+            except Exception as e:
+                print(f'[ultrasonic] failed to init sensor {bin_id}: {e}')
+        self.slots = plan_slots(len(self.channels), min_gap, ring)
+        # an echo can't take longer than the round trip to max range (plus the HC-SR04's burst delay)
+        self.echo_timeout_s = min(slot_s, 2.0 * max_distance_m / SPEED_OF_SOUND_M_S + 0.005)
+        self.sweeps = 0
+        self.last_sweep_ms = None
+        self._interval_s = 0.0
+        self._lock = threading.Lock()  # one sweep at a time
+        self._swept = threading.Condition()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def sweep_bound_s(self):
+        """Longest a full sweep can take."""
+        return len(self.slots) * self.slot_s
+
+    @property
+    def window_s(self):
+        """How long one median window of sweeps takes; older echoes are stale."""
+        return self.window * max(self.sweep_bound_s, self._interval_s)
+
+    def _ping_slot(self, slot):
+        channels = [self.channels[i] for i in slot]
+        pending = [len(channels)]
+        all_in = threading.Event()
+        count_lock = threading.Lock()
+
+        def done():
+            with count_lock:
+                pending[0] -= 1
+                if pending[0] == 0:
+                    all_in.set()
+
+        t = time.monotonic()
+        for ch in channels:
+            ch.fire(done)
+        all_in.wait(self.echo_timeout_s)
+        for ch in channels:
+            ch.collect(self.max_distance_m)
+        # let the bursts die down before the next slot fires
+        remaining = self.slot_s - (time.monotonic() - t)
+        if remaining > 0:
+            time.sleep(remaining)
+
+    def sweep(self):
+        """Ping every sensor once, slot by slot."""
+        with self._lock:
+            t = time.monotonic()
+            for slot in self.slots:
+                self._ping_slot(slot)
+            self.last_sweep_ms = (time.monotonic() - t) * 1000.0
+        with self._swept:
+            self.sweeps += 1
+            self._swept.notify_all()
+
+    def _since(self, since):
+        return time.monotonic() - self.window_s if since is None else since
+
+    def readings(self, since=None):
+        """Median distance (cm) per bin id; None for bins without a good echo in the window.
+
+        Only echoes from `since` (monotonic) on count; by default the last `window_s`.
+        """
+        since = self._since(since)
+        return {ch.bin_id: ch.median_cm(since) for ch in self.channels}
+
+    def distance_cm(self, bin_id, since=None):
+        for ch in self.channels:
+            if ch.bin_id == bin_id:
+                return ch.median_cm(self._since(since))
+        return None
+
+    def read_all(self, sweeps=None):
+        """Run a full median window of sweeps now and return the readings from those sweeps only."""
+        t = time.monotonic()
+        for _ in range(self.window if sweeps is None else sweeps):
+            self.sweep()
+        return self.readings(since=t)
+
+    def wait_for_sweep(self, timeout=None):
+        """Block until the background thread finishes its next sweep."""
+        with self._swept:
+            n = self.sweeps
+            return self._swept.wait_for(lambda: self.sweeps > n, timeout)
+
+    def start(self, interval_s=0.0):
+        """Keep sweeping on one background thread, a sweep every `interval_s` (0 = back to back)."""
+        if self._thread is None:
+            self._interval_s = interval_s
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, args=(interval_s,), name='ultrasonic-sampler',
+                                            daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self, interval_s):
+        while not self._stop.is_set():
+            t = time.monotonic()
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f'[ultrasonic] sweep failed: {e}')
+            self._stop.wait(max(0.0, interval_s - (time.monotonic() - t)))
+
+    def status(self):
+        return {
+            'sensors': len(self.channels),
+            'slots': self.slots,
+            'sweep_bound_ms': round(self.sweep_bound_s * 1000.0, 1),
+            'last_sweep_ms': round(self.last_sweep_ms, 1) if self.last_sweep_ms is not None else None,
+            'sweeps': self.sweeps,
+            'misses': {ch.bin_id: ch.misses for ch in self.channels},
+        }
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.sweep_bound_s + 1.0)
+            self._thread = None
+        for ch in self.channels:
+            ch.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sweeps', type=int, default=10)
+    args = parser.parse_args()
+
+    from ultrasonic import BINS_CONFIG
+    bins = [(c['bin_id'], c['trigger_pin'], c['echo_pin']) for c in BINS_CONFIG]
+    sampler = UltrasonicSampler(bins)
+    try:
+        t = time.monotonic()
+        cpu = time.process_time()
+        for _ in range(args.sweeps):
+            sampler.sweep()
+        elapsed = time.monotonic() - t
+        print('readings (cm):', {k: round(v, 1) if v is not None else None for k, v in sampler.readings().items()})
+        print('status:', sampler.status())
+        print(f'{args.sweeps} sweeps in {elapsed:.2f}s, {(time.process_time() - cpu) / elapsed * 100:.1f}% CPU, '
+              f'{threading.active_count()} threads')
+    finally:
+        sampler.close()
+
+
+if __name__ == '__main__':
+    main()
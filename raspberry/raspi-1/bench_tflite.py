@@ -0,0 +1,123 @@
+"""Compare the int8 TFLite model with TorchScript on the same images.
+
+Run this on the Pi (ARM) to get the numbers that matter. For every image it
+measures preprocess and inference time for both engines and reports:
+- p50 / p90 / mean latency per engine (inference only and end-to-end),
+- top-1 accuracy when images sit in folders named after the class
+  (e.g. `val/Battery/001.jpg`), otherwise accuracy is omitted,
+- top-1 agreement between the two engines,
+- model file sizes and load times.
+
+Usage:
+    python3 bench_tflite.py --images Testing/val_images \
+        --tflite Model/resnet50_ewaste_int8.tflite --threads 4 --out bench_tflite.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / 'Scripts'))
+from tflite_engine import TFLiteClassifier  # noqa: E402
+
+from convert_to_tflite import OUT_PATH, list_images  # noqa: E402
+from convert_to_torchscript import OUT_PATH as TORCHSCRIPT_PATH  # noqa: E402
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+
+def _summary(lat):
+    return {'p50': round(statistics.median(lat), 2), 'p90': round(_percentile(lat, 0.9), 2),
+            'mean': round(statistics.fmean(lat), 2)}
+
+
+def _ground_truth(path: Path, labels):
+    return path.parent.name if path.parent.name in labels else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--images', required=True, help='image folder (class-named subfolders enable accuracy)')
+    parser.add_argument('--tflite', default=str(OUT_PATH))
+    parser.add_argument('--torchscript', default=str(TORCHSCRIPT_PATH))
+    parser.add_argument('--threads', type=int, default=os.cpu_count(), help='threads for both engines')
+    parser.add_argument('--limit', type=int, default=0, help='max images (0 = all)')
+    parser.add_argument('--warmup', type=int, default=3)
+    parser.add_argument('--out', help='write the JSON report here as well')
+    args = parser.parse_args()
+
+    import torch
+    torch.set_num_threads(args.threads)
+    os.environ['MODEL_PATH'] = args.torchscript
+    import classify_image
+
+    paths = list_images(Path(args.images), args.limit)
+    if not paths:
+        raise SystemExit(f'No images found in {args.images}')
+
+    t = time.perf_counter()
+    tfl = TFLiteClassifier(args.tflite, num_threads=args.threads)
+    tflite_load_s = time.perf_counter() - t
+    t = time.perf_counter()
+    classify_image._load_model()
+    torch_load_s = time.perf_counter() - t
+
+    warm = Image.open(paths[0])
+    for _ in range(args.warmup):
+        tfl.classify(warm)
+        classify_image.run_inference_from_pil(warm)
+
+    rows = {'torchscript': [], 'tflite': []}
+    truth = []
+    for p in paths:
+        img = Image.open(p).convert('RGB')
+        truth.append(_ground_truth(p, classify_image.CLASSES))
+        for name, fn in (('torchscript', classify_image.run_inference_from_pil), ('tflite', tfl.classify)):
+            timings = {}
+            res = fn(img, timings=timings)
+            rows[name].append({'label': res['label'], 'confidence': res['confidence'], **timings})
+
+    labelled = [i for i, g in enumerate(truth) if g]
+    report = {
+        'machine': platform.machine(),
+        'threads': args.threads,
+        'images': len(paths),
+        'labelled_images': len(labelled),
+        'engines': {},
+        'top1_agreement': round(sum(a['label'] == b['label'] for a, b in zip(rows['torchscript'], rows['tflite']))
+                                / len(paths), 4),
+    }
+    for name, path, load_s in (('torchscript', args.torchscript, torch_load_s), ('tflite', args.tflite, tflite_load_s)):
+        r = rows[name]
+        entry = {
+            'model': path,
+            'size_mb': round(Path(path).stat().st_size / 1e6, 2),
+            'load_s': round(load_s, 3),
+            'inference_ms': _summary([x['inference_ms'] for x in r]),
+            'end_to_end_ms': _summary([x['preprocess_ms'] + x['inference_ms'] for x in r]),
+        }
+        if labelled:
+            entry['top1_accuracy'] = round(sum(r[i]['label'] == truth[i] for i in labelled) / len(labelled), 4)
+        report['engines'][name] = entry
+        print(f'{name}: {json.dumps(entry)}')
+
+    ts = report['engines']['torchscript']['inference_ms']['p50']
+    tl = report['engines']['tflite']['inference_ms']['p50']
+    print(f'p50 inference: torchscript {ts} ms, tflite {tl} ms (x{ts / tl:.2f}); '
+          f'top-1 agreement {report["top1_agreement"]:.2%}')
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
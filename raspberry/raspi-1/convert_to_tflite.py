@@ -0,0 +1,185 @@
+"""Convert the PyTorch checkpoint (.pth) to a full-integer (int8) TFLite model.
+
+Pipeline: checkpoint -> ONNX (torch.onnx.export) -> TensorFlow SavedModel
+(onnx2tf, NHWC layout) -> TFLite with post-training quantization calibrated on
+a folder of sample images. Weights and activations are int8, which is what
+XNNPACK runs fastest on the Pi's Cortex-A cores.
+
+Next to the `.tflite` file it writes a labels manifest
+(`<model>.labels.json`) with the class names in output order plus the input
+preprocessing and quantization parameters, so the Pi clients report real class
+names instead of `class_<n>`.
+
+Run it on your development machine (not on the Pi):
+
+    pip install tensorflow onnx onnx2tf onnx_graphsurgeon sng4onnx tf_keras
+    python convert_to_tflite.py --calib-dir Testing/calib_images
+
+Then compare it with TorchScript on the Pi using `bench_tflite.py`.
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import torch
+from PIL import Image
+
+from convert_to_torchscript import NUM_CLASSES, PTH_PATH, build_model, load_state_dict
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / 'Scripts'))
+from classify_image import CLASSES  # noqa: E402
+from tflite_engine import IMAGE_SIZE, MEAN, STD, manifest_path_for, preprocess_nhwc  # noqa: E402
+
+# --- CONFIGURE ---
+OUT_PATH = Path(__file__).resolve().parent / 'Model' / 'resnet50_ewaste_int8.tflite'
+IMAGE_EXTS = ('.jpg', '.jpeg', '.png', '.bmp')
+# -----------------
+
+
+def list_images(folder: Path, limit: int = 0, seed: int = 0):
+    """All images below `folder` (recursively), shuffled so class folders mix."""
+    paths = sorted(p for p in Path(folder).rglob('*') if p.suffix.lower() in IMAGE_EXTS)
+    random.Random(seed).shuffle(paths)
+    return paths[:limit] if limit else paths
+
+
+def make_quantization_friendly(model):
+    """Replace the stem's padded MaxPool with explicit zero padding + MaxPool.
+
+    ONNX/onnx2tf lower MaxPool padding to a PADV2 filled with -inf; the
+    quantizer then folds -inf into the ReLU output range and ends up with a
+    ~1e36 scale (garbage accuracy, and XNNPACK refuses the graph). The pool
+    input is post-ReLU (>= 0), so padding with zeros gives identical results.
+    """
+    pool = model.maxpool
+    model.maxpool = torch.nn.Sequential(torch.nn.ZeroPad2d(pool.padding),
+                                        torch.nn.MaxPool2d(pool.kernel_size, pool.stride))
+    return model
+
+
+def export_onnx(model, onnx_path: Path):
+    example = torch.randn(1, 3, IMAGE_SIZE, IMAGE_SIZE)
+    torch.onnx.export(model, example, str(onnx_path), input_names=['input'], output_names=['logits'],
+                      opset_version=17, dynamo=False)
+
+
+def _write_onnx2tf_sample_data(calib_paths, work: Path):
+    """onnx2tf checks its NHWC conversion on 20 sample images that it otherwise
+    downloads from GitHub; give it ours so conversion also works offline."""
+    imgs = [np.asarray(Image.open(p).convert('RGB').resize((128, 128)), dtype=np.float32) / 255.0
+            for p in (calib_paths * 20)[:20]]
+    np.save(work / 'calibration_image_sample_data_20x128x128x3_float32.npy', np.stack(imgs))
+
+
+def to_saved_model(onnx_path: Path, out_dir: Path, calib_paths):
+    import onnx2tf
+    work = onnx_path.parent
+    _write_onnx2tf_sample_data(calib_paths, work)
+    cwd = os.getcwd()
+    os.chdir(work)  # onnx2tf looks for the sample data in the working directory
+    try:
+        # onnx2tf transposes the graph to NHWC, TFLite's native layout
+        onnx2tf.convert(input_onnx_file_path=str(onnx_path), output_folder_path=str(out_dir), non_verbose=True)
+    finally:
+        os.chdir(cwd)
+
+
+def quantize(saved_model_dir: Path, calib_paths, io_type: str = 'int8'):
+    import tensorflow as tf
+
+    def representative_dataset():
+        for p in calib_paths:
+            yield [preprocess_nhwc(Image.open(p))[None, ...]]
+
+    converter = tf.lite.TFLiteConverter.from_saved_model(str(saved_model_dir))
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.representative_dataset = representative_dataset
+    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    if io_type == 'int8':
+        converter.inference_input_type = tf.int8
+        converter.inference_output_type = tf.int8
+    return converter.convert()
+
+
+def _tensor_info(detail):
+    scale, zero_point = detail.get('quantization', (0.0, 0))
+    return {'dtype': np.dtype(detail['dtype']).name, 'shape': [int(d) for d in detail['shape']],
+            'scale': float(scale), 'zero_point': int(zero_point)}
+
+
+def write_manifest(tflite_path: Path, calib_paths, calib_dir, source):
+    import tensorflow as tf
+    interp = tf.lite.Interpreter(model_path=str(tflite_path))
+    inp = interp.get_input_details()[0]
+    out = interp.get_output_details()[0]
+    manifest = {
+        'model': tflite_path.name,
+        'labels': list(CLASSES),
+        'num_classes': len(CLASSES),
+        'input': dict(_tensor_info(inp), layout='NHWC', size=[IMAGE_SIZE, IMAGE_SIZE], mean=MEAN, std=STD),
+        'output': dict(_tensor_info(out), kind='logits'),
+        'quantization': {'type': 'int8_ptq', 'calibration_images': len(calib_paths), 'calib_dir': str(calib_dir)},
+        'source_checkpoint': str(source),
+        'created_at': time.time(),
+    }
+    path = manifest_path_for(tflite_path)
+    with open(path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--checkpoint', default=str(PTH_PATH))
+    parser.add_argument('--calib-dir', required=True, help='folder of representative images (searched recursively)')
+    parser.add_argument('--num-calib', type=int, default=200, help='max calibration images (0 = all)')
+    parser.add_argument('--out', default=str(OUT_PATH))
+    parser.add_argument('--io-type', choices=['int8', 'float32'], default='int8',
+                        help='model input/output dtype; int8 internals either way')
+    parser.add_argument('--keep-intermediate', help='keep the ONNX / SavedModel files in this folder')
+    args = parser.parse_args()
+
+    ckpt = Path(args.checkpoint)
+    if not ckpt.exists():
+        raise SystemExit(f'Checkpoint not found at: {ckpt}')
+    calib_paths = list_images(Path(args.calib_dir), args.num_calib)
+    if not calib_paths:
+        raise SystemExit(f'No calibration images found in {args.calib_dir}')
+    if len(CLASSES) != NUM_CLASSES:
+        raise SystemExit(f'classify_image.CLASSES has {len(CLASSES)} entries, checkpoint expects {NUM_CLASSES}')
+
+    model = build_model(NUM_CLASSES)
+    model.load_state_dict(load_state_dict(ckpt))
+    model = make_quantization_friendly(model).eval()
+
+    work = Path(args.keep_intermediate or tempfile.mkdtemp(prefix='ew-tflite-')).resolve()
+    work.mkdir(parents=True, exist_ok=True)
+    try:
+        t = time.perf_counter()
+        print('Exporting ONNX...')
+        export_onnx(model, work / 'model.onnx')
+        print('Converting to TensorFlow SavedModel (NHWC)...')
+        to_saved_model(work / 'model.onnx', work / 'saved_model', calib_paths)
+        print(f'Quantizing with {len(calib_paths)} calibration images...')
+        tflite = quantize(work / 'saved_model', calib_paths, args.io_type)
+    finally:
+        if not args.keep_intermediate:
+            shutil.rmtree(work, ignore_errors=True)
+
+    out = Path(args.out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_bytes(tflite)
+    manifest = write_manifest(out, calib_paths, args.calib_dir, ckpt)
+    print(f'Wrote TFLite model to: {out} ({len(tflite) / 1e6:.1f} MB) in {time.perf_counter() - t:.1f}s')
+    print('Wrote labels manifest to:', manifest)
+
+
+if __name__ == '__main__':
+    main()
@@ -17,11 +17,8 @@ import json
 import os
 import sys
 import time
-import tempfile
 import threading
-from datetime import datetime
 
-import requests
 import subprocess
 
 try:
@@ -36,15 +33,43 @@ if SCRIPT_DIR not in sys.path:
     sys.path.insert(0, SCRIPT_DIR)
 
 try:
-    from classify_image import run_inference_from_path, run_inference_from_pil
+    from classify_image import (run_inference_from_path, run_inference_from_pil, run_inference_from_frame,
+                                run_burst_inference)
 except Exception:
     # provide fallback stub
-    def run_inference_from_path(path, model_path=None):
+    def run_inference_from_path(path, model_path=None, timings=None):
         return {'label': 'unknown', 'confidence': 0.5}
 
-    def run_inference_from_pil(pil_image, model_path=None):
+    def run_inference_from_pil(pil_image, model_path=None, timings=None):
         return {'label': 'unknown', 'confidence': 0.5}
 
+    def run_inference_from_frame(frame, model_path=None, timings=None):
+        return {'label': 'unknown', 'confidence': 0.5}
+
+    def run_burst_inference(frames=None, k=None, interval_s=None, model_path=None, timings=None):
+        return {'label': 'unknown', 'confidence': 0.5}
+
+from adaptive_polling import ADAPTIVE_POLLING, AdaptivePoller
+from bin_telemetry import TelemetryUplink, make_reading, open_outbox
+from frame_encoder import get_encoder
+from live_view import LIVE_VIEW, LiveViewStreamer
+from photo_uplink import photo_payload, use_binary
+from trace_log import RequestTrace
+
+try:
+    from capture_image import (ARCHIVE_CAPTURES, CAMERA_PERSISTENT, archive_frame, capture_frame, get_camera,
+                               new_camera)
+except Exception:
+    ARCHIVE_CAPTURES = False
+    CAMERA_PERSISTENT = False
+    capture_frame = None
+
+    def get_camera():
+        return None
+
+    def new_camera():
+        return None
+
 
 sio = socketio.Client(reconnection=True, reconnection_attempts=5)
 
@@ -63,6 +88,7 @@ if BIN_UPDATE_URL and BIN_UPDATE_URL.count('/') <= 3:
     BIN_UPDATE_URL = BIN_UPDATE_URL + '/api/bin/update'
 
 UPDATE_INTERVAL = float(os.environ.get('UPDATE_INTERVAL', '10'))
+ULTRASONIC_SAMPLER = os.environ.get('ULTRASONIC_SAMPLER', '1') not in ('0', 'false', 'False')
 
 # Default bin definitions (override by setting env var BIN_CONFIG_JSON to a JSON list)
 DEFAULT_BINS = [
@@ -81,21 +107,29 @@ def load_bins_config():
     return DEFAULT_BINS
 
 
+def _bin_id(cfg):
+    return cfg.get('id') or cfg.get('bin_id') or cfg.get('name')
+
+
 class SensorWrapper:
-    def __init__(self, cfg):
-        self.id = cfg.get('id')
+    def __init__(self, cfg, sampler=None):
+        self.id = _bin_id(cfg)
         self.trigger = cfg.get('trigger')
         self.echo = cfg.get('echo')
         self.empty_cm = float(cfg.get('empty_distance_cm', 80.0))
         self.full_cm = float(cfg.get('full_distance_cm', 10.0))
+        self._sampler = sampler
         self._sensor = None
-        if DistanceSensor is not None and self.trigger is not None and self.echo is not None:
+        if sampler is None and DistanceSensor is not None and self.trigger is not None and self.echo is not None:
             try:
                 self._sensor = DistanceSensor(echo=self.echo, trigger=self.trigger)
             except Exception as e:
                 print(f'[sensor {self.id}] DistanceSensor init failed: {e}')
 
     def read_distance_cm(self):
+        if self._sampler is not None:
+            # median of the sampler's latest sweep window
+            return self._sampler.distance_cm(self.id)
         if self._sensor is None:
             return None
         try:
@@ -121,10 +155,85 @@ class SensorWrapper:
         return max(0.0, min(100.0, filled))
 
 
+# Shared bin uplink: keep-alive session, batched delta-only updates (Scripts/bin_telemetry.py)
+telemetry = TelemetryUplink(BIN_UPDATE_URL, outbox=open_outbox('pi_client') if BIN_UPDATE_URL else None)
+
+
+class BinRegistry:
+    """Owns the bin sensors and caches the latest reading of every bin.
+
+    The monitor thread refreshes it every `next_interval` seconds and
+    `check_fill` answers from the cache, so nothing else opens the sensor
+    pins. With ADAPTIVE_POLLING the interval follows the bins' fill rates
+    (starting from UPDATE_INTERVAL) and the cache carries every bin's fill
+    rate and predicted time to full. All sensors are pinged by one
+    UltrasonicSampler (ULTRASONIC_SAMPLER=0: one DistanceSensor per bin).
+    `refresh()` is one coordinated sweep; callers that arrive while a sweep
+    is running wait for it and share its result.
+    """
+
+    def __init__(self, bins_cfg):
+        self.sampler = None
+        if ULTRASONIC_SAMPLER and DistanceSensor is not None:
+            try:
+                from ultrasonic_sampler import UltrasonicSampler
+                self.sampler = UltrasonicSampler([(_bin_id(c), c.get('trigger'), c.get('echo')) for c in bins_cfg
+                                                  if c.get('trigger') is not None and c.get('echo') is not None])
+            except Exception as e:
+                print(f'[ultrasonic] sampler unavailable ({e}); using one DistanceSensor per bin')
+        self.sensors = [SensorWrapper(cfg, self.sampler) for cfg in bins_cfg]
+        self._latest = {}  # bin_id -> (reading, monotonic time)
+        self._lock = threading.Lock()
+        self._sweep_lock = threading.Lock()
+        self._sweeps = 0
+        self.poller = AdaptivePoller(UPDATE_INTERVAL) if ADAPTIVE_POLLING else None
+        self.next_interval = UPDATE_INTERVAL
+
+    def refresh(self):
+        """Read every sensor once (or join the sweep in progress) and return the readings."""
+        seen = self._sweeps
+        with self._sweep_lock:
+            if self._sweeps == seen:
+                if self.sampler is not None:
+                    self.sampler.read_all()
+                now = time.monotonic()
+                readings = []
+                for s in self.sensors:
+                    d = s.read_distance_cm()
+                    readings.append(make_reading(s.id, d, s.compute_fill(d)))
+                with self._lock:
+                    for r in readings:
+                        self._latest[r['bin_id']] = (r, now)
+                    if self.poller is not None:
+                        self.next_interval = self.poller.update(readings, now)
+                self._sweeps += 1
+        with self._lock:
+            return [r for r, _ in self._latest.values()]
+
+    def latest(self):
+        """Cached readings with their age (and fill rate); bins not read yet are missing."""
+        now = time.monotonic()
+        with self._lock:
+            return [dict(r, age_s=round(now - t, 1), **(self.poller.status(r['bin_id']) if self.poller else {}))
+                    for r, t in self._latest.values()]
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = BinRegistry(load_bins_config())
+        return _registry
+
+
 def sensor_monitor_thread():
-    bins_cfg = load_bins_config()
-    sensors = [SensorWrapper(cfg) for cfg in bins_cfg]
-    print(f'[ultrasonic] starting monitor for {len(sensors)} sensors; interval={UPDATE_INTERVAL}s; POST->{BIN_UPDATE_URL}')
+    registry = get_registry()
+    print(f'[ultrasonic] starting monitor for {len(registry.sensors)} sensors; interval={UPDATE_INTERVAL}s'
+          f"{' (adaptive)' if registry.poller is not None else ''}; POST->{BIN_UPDATE_URL}")
     stop = False
 
     def _handle_stop(signum=None, frame=None):
@@ -134,30 +243,55 @@ def sensor_monitor_thread():
     # thread-local signal handling not reliable; thread respects main process exit
 
     while not stop:
-        for s in sensors:
-            d = s.read_distance_cm()
-            p = s.compute_fill(d)
-            payload = {
-                'bin_id': s.id,
-                'distance_cm': d,
-                'fill_percent': p,
-                'ts': datetime.utcnow().isoformat() + 'Z',
-            }
-            if BIN_UPDATE_URL:
-                try:
-                    resp = requests.post(BIN_UPDATE_URL, json=payload, timeout=5)
-                    print(f'[ultrasonic] posted {s.id} status={resp.status_code}')
-                except Exception as e:
-                    print(f'[ultrasonic] failed POST for {s.id}: {e}')
-            else:
-                print('[ultrasonic] BIN_UPDATE_URL not set; payload:', payload)
+        readings = registry.refresh()
+        # one request per cycle, only for bins that changed (plus heartbeats)
+        telemetry.publish(readings)
+        interval = registry.next_interval
+        if registry.poller is not None:
+            ttf = {r['bin_id']: r.get('time_to_full_s') for r in registry.latest() if r.get('time_to_full_s') is not None}
+            print(f'[ultrasonic] next sweep in {interval:.1f}s; time to full: {ttf}')
         # sleep with small increments to be responsive to shutdown
         slept = 0.0
-        while slept < UPDATE_INTERVAL:
+        while slept < interval:
             time.sleep(0.5)
             slept += 0.5
 
 
+# How `run_main` actuation is performed:
+# - service (default): in-process ActuationService; GPIO/servos stay initialised between items
+# - socket: send the sort to a running `Scripts/actuation_service.py --socket` daemon
+# - subprocess: legacy, spawn Scripts/main.py --label <label> per item
+ACTUATION_MODE = os.environ.get('ACTUATION_MODE', 'service').lower()
+ACTUATION_SOCKET = os.environ.get('ACTUATION_SOCKET', '/tmp/ew-actuation.sock')
+# Burst mode: classify K frames in one batch and vote (1 = single frame)
+BURST_FRAMES = int(os.environ.get('BURST_FRAMES', '1'))
+# Skip actuation when the (voted) confidence is below this value
+MIN_ACTUATION_CONFIDENCE = float(os.environ.get('MIN_ACTUATION_CONFIDENCE', '0'))
+# Classify + sort automatically whenever an item settles in front of the camera
+PRESENCE_TRIGGER = os.environ.get('PRESENCE_TRIGGER', '0') in ('1', 'true', 'True')
+
+
+def run_actuation(label, request_id=None):
+    """Sort one item according to ACTUATION_MODE; returns timing info when available."""
+    if ACTUATION_MODE == 'subprocess' or not label:
+        main_py = os.path.join(os.path.dirname(__file__), 'Scripts', 'main.py')
+        cmd = [sys.executable, main_py]
+        # If we have a label from the inference, pass it so main.py can actuate directly
+        if label:
+            cmd += ['--label', str(label)]
+        print('Running local main.py for full actuation:', ' '.join(cmd))
+        subprocess.run(cmd, check=True)
+        return None
+    if ACTUATION_MODE == 'socket':
+        from actuation_service import send_command
+        reply = send_command({'cmd': 'sort', 'label': label, 'requestId': request_id}, path=ACTUATION_SOCKET)
+        if not reply.get('ok'):
+            raise RuntimeError(reply.get('error'))
+        return reply.get('result')
+    from actuation_service import get_service
+    return get_service().submit(label=label, request_id=request_id).result(timeout=120)
+
+
 args = None
 model_path_default = os.path.join(os.path.dirname(__file__), 'Model', 'new_layer4_resnet50_ewaste_traced.pt')
 
@@ -173,9 +307,15 @@ def connect():
     sio.emit('register_device', reg)
 
 
+# What the backend announced in register_success (e.g. binary_frames)
+server_info = {}
+
+
 @sio.on('register_success')
 def on_register_success(data):
     print('Register success:', data)
+    server_info.clear()
+    server_info.update(data if isinstance(data, dict) else {})
 
 
 @sio.on('register_error')
@@ -183,11 +323,23 @@ def on_register_error(data):
     print('Register error:', data)
 
 
+def _add_inference_spans(trace, timings):
+    # the stages ran back to back and inference just finished: lay them out backwards
+    end = time.monotonic()
+    for name in ('inference', 'preprocess', 'decode'):
+        dur = timings.get(name + '_ms')
+        if dur is not None:
+            trace.add(name, dur, end=end)
+            end -= dur / 1000.0
+
+
 @sio.on('run_model')
 def on_run_model(payload):
     print('run_model event received:', payload)
     requestId = payload.get('requestId')
     params = payload.get('params') or {}
+    trace = RequestTrace(requestId, kind='run_model', device=args.name)
+    timings = {}
     # If params contain an image (image_b64) use it, else capture from camera or use test image
     image_b64 = params.get('image_b64') if params else None
     result = None
@@ -195,64 +347,75 @@ def on_run_model(payload):
         if image_b64:
             from PIL import Image
             from io import BytesIO
-            data = base64.b64decode(image_b64)
-            img = Image.open(BytesIO(data)).convert('RGB')
-            result = run_inference_from_pil(img, model_path=args.model)
+            with trace.span('decode'):
+                data = base64.b64decode(image_b64)
+                img = Image.open(BytesIO(data)).convert('RGB')
+            result = run_inference_from_pil(img, model_path=args.model, timings=timings)
         else:
             # Prefer capturing from attached camera using OpenCV if available
-            try:
-                import cv2
-                cap = cv2.VideoCapture(0)
-                ret, frame = cap.read()
-                cap.release()
-                if ret:
-                    # convert BGR to RGB and use PIL
-                    from PIL import Image
-                    import numpy as np
-                    img = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
-                    result = run_inference_from_pil(img, model_path=args.model)
-                else:
-                    print('Camera capture failed, falling back to sample image')
-            except Exception as e:
-                print('OpenCV not available or camera error:', e)
+            burst_k = int(params.get('burst_frames') or BURST_FRAMES)
+            if burst_k > 1:
+                result = run_burst_inference(k=burst_k, model_path=args.model, timings=timings)
+                trace.add('capture', timings.pop('capture_ms', None), source='burst', frames=burst_k)
+                if result.get('label') == 'error':
+                    print('Burst inference failed, falling back to single frame:', result.get('error'))
+                    result = None
+        if result is None and not image_b64 and capture_frame is not None:
+            with trace.span('capture', source='camera_service' if CAMERA_PERSISTENT else 'cv2') as sp:
+                frame = capture_frame()
+                sp['ok'] = frame is not None
+            if frame is not None:
+                # numpy frame straight into preprocessing; no JPEG written or re-read
+                result = run_inference_from_frame(frame, model_path=args.model, timings=timings)
+                if ARCHIVE_CAPTURES:
+                    archive_frame(frame)
+            else:
+                print('Camera capture failed, falling back to sample image')
 
         if result is None:
             # fallback to running inference on a test image if present
             sample = os.path.join(os.path.dirname(__file__), 'sample.jpg')
             if os.path.exists(sample):
-                result = run_inference_from_path(sample, model_path=args.model)
+                result = run_inference_from_path(sample, model_path=args.model, timings=timings)
             else:
                 result = {'label': 'unknown', 'confidence': 0.5}
 
     except Exception as e:
         print('Inference error:', e)
         result = {'label': 'error', 'confidence': 0.0, 'error': str(e)}
+    _add_inference_spans(trace, timings)
 
     payload_out = {'requestId': requestId, 'device': args.name, 'label': result.get('label'), 'confidence': float(result.get('confidence', 0.0))}
+    if 'frames' in result:
+        payload_out.update(frames=result['frames'], agreement=result.get('agreement'))
     try:
-        sio.emit('iot-model-result', payload_out)
+        with trace.span('emit'):
+            sio.emit('iot-model-result', payload_out)
         print('Emitted iot-model-result', payload_out)
     except Exception as e:
         print('Failed to emit model result:', e)
+    trace.fields.update(label=payload_out['label'], confidence=payload_out['confidence'])
     # Optionally run the full machinery on-device (capture -> classify -> actuate)
     try:
         if params.get('run_main'):
             def _run_main_async(label_for_main=None):
                 try:
-                    main_py = os.path.join(os.path.dirname(__file__), 'Scripts', 'main.py')
-                    cmd = [sys.executable, main_py]
-                    # If we have a label from the inference, pass it so main.py can actuate directly
-                    if label_for_main:
-                        cmd += ['--label', str(label_for_main)]
                     # Respect environment override to disable actuation during testing
                     if os.environ.get('ENABLE_ACTUATION', '1') in ('0', 'false', 'False'):
-                        print('ENABLE_ACTUATION is false; skipping running main.py')
+                        print('ENABLE_ACTUATION is false; skipping actuation')
                         return
-                    print('Running local main.py for full actuation:', ' '.join(cmd))
-                    subprocess.run(cmd, check=True)
-                    print('Local main.py completed')
+                    if payload_out['confidence'] < MIN_ACTUATION_CONFIDENCE:
+                        print(f"Confidence {payload_out['confidence']:.2f} below MIN_ACTUATION_CONFIDENCE="
+                              f"{MIN_ACTUATION_CONFIDENCE}; skipping actuation")
+                        trace.fields['actuation_skipped'] = 'low_confidence'
+                        return
+                    with trace.span('actuation', mode=ACTUATION_MODE) as sp:
+                        sp.update(run_actuation(label_for_main, requestId) or {})
+                    print('Actuation completed')
                 except Exception as ex:
-                    print('Failed to run main.py:', ex)
+                    print('Actuation failed:', ex)
+                finally:
+                    trace.finish()
             # pass the predicted label if available to avoid double-capture
             predicted_label = None
             try:
@@ -261,97 +424,111 @@ def on_run_model(payload):
                 predicted_label = None
             t = threading.Thread(target=_run_main_async, args=(predicted_label,), daemon=True)
             t.start()
+            return
     except Exception as e:
         print('Error scheduling main.py run:', e)
+    trace.finish()
+
+
+def _capture_frame_from_file():
+    """Fallback when OpenCV is unavailable: capture() to a file (libcamera-still) and
+    load it with Pillow as a BGR array for the encoder. Returns (frame, None), or
+    (None, original file bytes) if Pillow/numpy can't load it, or (None, None)."""
+    try:
+        from capture_image import capture as capture_fn
+        image_path = capture_fn()
+        print('capture_image returned path:', image_path)
+    except Exception as e:
+        print('Capture fallback failed:', e)
+        return None, None
+    if not image_path or not os.path.exists(image_path):
+        return None, None
+    try:
+        import numpy as np
+        from PIL import Image
+        return np.asarray(Image.open(image_path).convert('RGB'))[:, :, ::-1], None
+    except Exception:
+        # Pillow not available or processing failed — send original file
+        with open(image_path, 'rb') as f:
+            return None, f.read()
+
+
+def on_presence_item(frame, event):
+    """Presence trigger handler: classify the settled frame, report it and sort it."""
+    requestId = f'presence-{int(time.time() * 1000)}'
+    trace = RequestTrace(requestId, kind='presence', device=args.name)
+    trace.add('settle', event.get('arrival_to_trigger_ms'))
+    timings = {}
+    result = run_inference_from_frame(frame, model_path=args.model, timings=timings)
+    _add_inference_spans(trace, timings)
+    payload_out = {'requestId': requestId, 'device': args.name, 'label': result.get('label'),
+                   'confidence': float(result.get('confidence', 0.0)), 'source': 'presence'}
+    try:
+        with trace.span('emit'):
+            sio.emit('iot-model-result', payload_out)
+    except Exception as e:
+        print('Failed to emit model result:', e)
+    try:
+        if result.get('label') in (None, 'error', 'unknown'):
+            print('No usable label; skipping actuation')
+        elif os.environ.get('ENABLE_ACTUATION', '1') in ('0', 'false', 'False'):
+            print('ENABLE_ACTUATION is false; skipping actuation')
+        elif payload_out['confidence'] < MIN_ACTUATION_CONFIDENCE:
+            print(f"Confidence {payload_out['confidence']:.2f} below MIN_ACTUATION_CONFIDENCE; skipping actuation")
+        else:
+            with trace.span('actuation', mode=ACTUATION_MODE) as sp:
+                sp.update(run_actuation(payload_out['label'], requestId) or {})
+    except Exception as e:
+        print('Actuation failed:', e)
+    finally:
+        trace.finish(label=payload_out['label'], confidence=payload_out['confidence'], trigger=event)
 
 
 @sio.on('capture')
 def on_capture(payload):
     """Handle 'capture' events from the server: capture an image and emit it as `iot-photo`.
-    Expects payload { requestId, metadata? } and emits { requestId, image_b64, device }.
+    Expects payload { requestId, metadata? } and emits { requestId, device, mime, bytes, encoding,
+    image (binary attachment) or image_b64 } (see Scripts/photo_uplink.py).
     """
     try:
         print('capture event received:', payload)
         requestId = payload.get('requestId') if isinstance(payload, dict) else None
-        # Try to use the helper capture script if present
-        image_path = None
-        try:
-            from capture_image import capture as capture_fn
-            # capture() should return a filesystem path or raise on failure
-            image_path = capture_fn()
-            print('capture_image returned path:', image_path)
-        except Exception as e:
-            # Fallback: try OpenCV quick capture
-            try:
-                import cv2
-                tmp_path = os.path.join(os.path.dirname(__file__), f'capture_{int(time.time())}.jpg')
-                cap = cv2.VideoCapture(0)
-                ret, frame = cap.read()
-                cap.release()
-                if ret:
-                    cv2.imwrite(tmp_path, frame)
-                    image_path = tmp_path
-                    print('OpenCV captured image to', tmp_path)
-                else:
-                    print('OpenCV capture failed')
-            except Exception as e2:
-                print('Capture fallback failed:', e, e2)
 
-        if not image_path or not os.path.exists(image_path):
-            print('No image captured; emitting error response')
+        # Preferred path: frame stays in memory and is JPEG-encoded once, to the
+        # IMAGE_BYTE_BUDGET (Scripts/frame_encoder.py)
+        frame = None
+        if capture_frame is not None:
             try:
-                sio.emit('iot-photo', {'requestId': requestId, 'error': 'capture_failed', 'device': args.name})
-            except Exception:
-                pass
-            return
-
-        # Read file and compress with OpenCV (preferred), then base64-encode
+                frame = capture_frame()
+            except Exception as e:
+                print('In-memory capture failed:', e)
         try:
-            b64 = None
-            try:
-                import cv2
-                # read, resize to 320x240, encode as jpeg with quality 50
-                img_cv = cv2.imread(image_path)
-                if img_cv is not None:
-                    resized = cv2.resize(img_cv, (320, 240))
-                    ret, buf = cv2.imencode('.jpg', resized, [int(cv2.IMWRITE_JPEG_QUALITY), 50])
-                    if ret:
-                        b64 = base64.b64encode(buf.tobytes()).decode('ascii')
-                    else:
-                        raise Exception('cv2.imencode failed')
-                else:
-                    raise Exception('cv2.imread failed')
-            except Exception:
-                # OpenCV path failed — fallback to Pillow-based resize/compress
-                try:
-                    from PIL import Image
-                    # Configurable via env vars
-                    max_w = int(os.environ.get('IMAGE_MAX_WIDTH', '640'))
-                    max_h = int(os.environ.get('IMAGE_MAX_HEIGHT', '480'))
-                    quality = int(os.environ.get('IMAGE_JPEG_QUALITY', '75'))
-                    img = Image.open(image_path).convert('RGB')
-                    img.thumbnail((max_w, max_h), Image.LANCZOS)
-                    tmpf = tempfile.NamedTemporaryFile(suffix='.jpg', delete=False)
-                    tmpf_name = tmpf.name
-                    tmpf.close()
-                    img.save(tmpf_name, format='JPEG', quality=quality)
-                    with open(tmpf_name, 'rb') as f:
-                        b64 = base64.b64encode(f.read()).decode('ascii')
+            jpeg = None
+            info = {}
+            if frame is not None:
+                if ARCHIVE_CAPTURES:
+                    archive_frame(frame)
+            else:
+                frame, jpeg = _capture_frame_from_file()
+                if frame is None and jpeg is None:
+                    print('No image captured; emitting error response')
                     try:
-                        os.remove(tmpf_name)
+                        sio.emit('iot-photo', {'requestId': requestId, 'error': 'capture_failed', 'device': args.name})
                     except Exception:
                         pass
-                except Exception:
-                    # Pillow not available or processing failed — send original file
-                    with open(image_path, 'rb') as f:
-                        b64 = base64.b64encode(f.read()).decode('ascii')
+                    return
 
-            if not b64:
-                raise Exception('Failed to produce base64 image payload')
+            if frame is not None:
+                jpeg, info = get_encoder().encode(frame)
+            if not jpeg:
+                raise Exception('Failed to produce image payload')
 
-            payload_out = {'requestId': requestId, 'image_b64': b64, 'device': args.name}
+            payload_out = photo_payload(jpeg, use_binary(server_info), width=info.get('width'), height=info.get('height'),
+                                        requestId=requestId, device=args.name, quality=info.get('quality'),
+                                        encode_ms=info.get('encode_ms'))
             sio.emit('iot-photo', payload_out)
-            print('Emitted iot-photo', {'requestId': requestId, 'len_image_b64': len(b64)})
+            print('Emitted iot-photo', dict(info or {'bytes': len(jpeg)}, requestId=requestId,
+                                            encoding=payload_out['encoding']))
         except Exception as e:
             print('Failed to emit iot-photo:', e)
     except Exception as e:
@@ -360,53 +537,87 @@ def on_capture(payload):
 
 @sio.on('check_fill')
 def on_check_fill(payload):
-    """Handle a one-off ultrasonic sensor read triggered by server/UI.
-    Emits `iot-bin-status` with an array of readings: [{ bin_id, distance_cm, fill_percent, ts }, ...]
-    Also POSTs to `BIN_UPDATE_URL` if configured (same behavior as the background monitor).
+    """Handle a bin level request from the server/UI.
+
+    Emits `iot-bin-status` with an array of readings: [{ bin_id, distance_cm, fill_percent, ts, age_s }, ...]
+    straight from the registry's cache. With `{"fresh": true}` (or before the first sweep) the
+    sensors are swept once first, off the socket.io thread. Fresh readings are also sent to
+    `BIN_UPDATE_URL` if configured.
     """
     try:
         print('check_fill event received:', payload)
-        bins_cfg = load_bins_config()
-        readings = []
-        for cfg in bins_cfg:
+        registry = get_registry()
+        fresh = bool((payload or {}).get('fresh')) if isinstance(payload, dict) else False
+        readings = registry.latest()
+        if readings and not fresh:
+            _emit_bin_status(readings, cached=True)
+            return
+
+        def _sweep():
             try:
-                s = SensorWrapper(cfg)
-                d = s.read_distance_cm()
-                p = s.compute_fill(d)
+                swept = registry.refresh()
+                _emit_bin_status(registry.latest(), cached=False)
+                telemetry.publish(swept, force=True)
             except Exception as e:
-                d = None
-                p = None
-            rec = {'bin_id': cfg.get('id') or cfg.get('bin_id') or cfg.get('name'), 'distance_cm': d, 'fill_percent': p}
-            readings.append(rec)
-
-        # Emit via socket so backend/UI receives immediate result
-        try:
-            sio.emit('iot-bin-status', {'device': args.name, 'readings': readings})
-            print('Emitted iot-bin-status', {'device': args.name, 'count': len(readings)})
-        except Exception as e:
-            print('Failed to emit iot-bin-status:', e)
-
-        # Also POST to BIN_UPDATE_URL for each bin if configured
-        if BIN_UPDATE_URL:
-            for r in readings:
-                payload_out = {
-                    'bin_id': r.get('bin_id'),
-                    'distance_cm': r.get('distance_cm'),
-                    'fill_percent': r.get('fill_percent')
-                }
-                try:
-                    resp = requests.post(BIN_UPDATE_URL, json=payload_out, timeout=5)
-                    print(f'[ultrasonic] posted {payload_out.get("bin_id")}: {resp.status_code}')
-                except Exception as e:
-                    print(f'[ultrasonic] failed POST for {payload_out.get("bin_id")}: {e}')
+                print('check_fill sweep error:', e)
 
+        threading.Thread(target=_sweep, name='check-fill', daemon=True).start()
     except Exception as e:
         print('check_fill handler error:', e)
 
 
+def _emit_bin_status(readings, cached):
+    # Emit via socket so backend/UI receives immediate result
+    try:
+        sio.emit('iot-bin-status', {'device': args.name, 'readings': readings, 'cached': cached})
+        print('Emitted iot-bin-status', {'device': args.name, 'count': len(readings), 'cached': cached})
+    except Exception as e:
+        print('Failed to emit iot-bin-status:', e)
+
+
+# Live view (Scripts/live_view.py): streams the persistent camera while the backend reports viewers
+live_view = None
+_live_view_lock = threading.Lock()
+
+
+def get_live_view():
+    global live_view
+    with _live_view_lock:
+        if live_view is None:
+            # CAMERA_PERSISTENT=0: the stream opens a camera of its own and releases it when it pauses
+            camera = get_camera() if CAMERA_PERSISTENT else new_camera()
+            if camera is None:
+                return None
+            live_view = LiveViewStreamer(camera, lambda payload, ack: sio.emit('iot-live-frame', payload, callback=ack),
+                                         device=args.name, release_camera=not CAMERA_PERSISTENT).start()
+        return live_view
+
+
+@sio.on('live_view')
+def on_live_view(payload):
+    """Viewer count for this device's live view, { viewers }; 0 pauses streaming."""
+    viewers = payload.get('viewers', 0) if isinstance(payload, dict) else 0
+    if not LIVE_VIEW:
+        if viewers:
+            print('live_view requested but LIVE_VIEW=0')
+        return
+    streamer = get_live_view() if viewers else live_view
+    if streamer is None:
+        if viewers:
+            print('live_view requested but no camera is available')
+        return
+    streamer.binary = use_binary(server_info)
+    streamer.set_viewers(viewers)
+    if not viewers:
+        print('[live]', streamer.status())
+
+
 @sio.on('disconnect')
 def on_disconnect():
     print('Disconnected from server')
+    if live_view is not None:
+        # the backend re-sends the viewer count after we register again
+        live_view.set_viewers(0)
 
 
 def main():
@@ -417,8 +628,20 @@ def main():
     parser.add_argument('--token', default=os.environ.get('DEVICE_TOKEN', ''))
     parser.add_argument('--model', default=os.environ.get('MODEL_PATH', model_path_default))
     args = parser.parse_args()
+    telemetry.device = args.name
 
     print('Starting Pi client, connecting to', args.server)
+    if CAMERA_PERSISTENT:
+        # open + warm up the camera now so the first capture is already instant
+        if get_camera() is None:
+            print('OpenCV not available; persistent camera disabled')
+    if PRESENCE_TRIGGER:
+        try:
+            from presence_trigger import PresenceTrigger
+            PresenceTrigger(on_presence_item).start()
+            print('Presence trigger enabled')
+        except Exception as e:
+            print('Failed to start presence trigger:', e)
     # Start sensor monitor in background (if gpiozero present or configured)
     try:
         t = threading.Thread(target=sensor_monitor_thread, name='ultrasonic-monitor', daemon=True)
@@ -3,11 +3,16 @@
 Ultrasonic sensor monitor for Raspberry Pi.
 
 Reads one or more ultrasonic DistanceSensor devices (gpiozero) and
-periodically POSTs JSON updates to the backend `BIN_UPDATE_URL`.
+periodically POSTs JSON updates to the backend `BIN_UPDATE_URL`: one batch
+per cycle with only the bins whose fill level changed by TELEMETRY_DELTA_PCT,
+plus a heartbeat every TELEMETRY_HEARTBEAT_SEC (Scripts/bin_telemetry.py).
 
 Configurable via environment variables:
 - BIN_UPDATE_URL: full URL to POST updates to (example: https://.../api/bin/update)
-- UPDATE_INTERVAL: seconds between readings (default: 10)
+- UPDATE_INTERVAL: seconds between readings (default: 10); with ADAPTIVE_POLLING
+  (default on) this is only the starting interval, and the loop polls faster
+  while bins fill and backs off up to POLL_MAX_SEC while they are static
+  (Scripts/adaptive_polling.py)
 
 Each bin must be listed in `BINS_CONFIG` with keys:
 - id: backend bin id
@@ -18,6 +23,10 @@ Each bin must be listed in `BINS_CONFIG` with keys:
 
 The script gracefully handles missing gpiozero by falling back to a stub
 that returns None distances (useful for development on non-RPi machines).
+
+All sensors are pinged by one `UltrasonicSampler` (Scripts/ultrasonic_sampler.py:
+interleaved pings, median filter per bin). Set ULTRASONIC_SAMPLER=0 to use one
+gpiozero DistanceSensor per bin instead.
 """
 from __future__ import annotations
 
@@ -26,7 +35,6 @@ import time
 import json
 import signal
 import sys
-from datetime import datetime
 from typing import Dict, Any, List
 
 try:
@@ -34,7 +42,12 @@ try:
 except Exception:
     DistanceSensor = None
 
-import requests
+SCRIPT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Scripts")
+if SCRIPT_DIR not in sys.path:
+    sys.path.insert(0, SCRIPT_DIR)
+
+from adaptive_polling import ADAPTIVE_POLLING, AdaptivePoller
+from bin_telemetry import TelemetryUplink, make_reading, open_outbox
 
 # --- Configuration ---
 BIN_UPDATE_URL = os.environ.get("BIN_UPDATE_URL") or os.environ.get("BACKEND_BIN_UPDATE_URL") or os.environ.get("BACKEND_URL")
@@ -48,6 +61,7 @@ if BIN_UPDATE_URL and not BIN_UPDATE_URL.endswith(DEFAULT_BIN_UPDATE_PATH):
         BIN_UPDATE_URL = BIN_UPDATE_URL + DEFAULT_BIN_UPDATE_PATH
 
 UPDATE_INTERVAL = float(os.environ.get("UPDATE_INTERVAL", "10"))
+ULTRASONIC_SAMPLER = os.environ.get("ULTRASONIC_SAMPLER", "1") not in ("0", "false", "False")
 
 # Example BINS_CONFIG: update pins and distances to match your hardware/setup
 # Distances in centimeters. Adjust empty_distance_cm and full_distance_cm for calibration.
@@ -69,16 +83,30 @@ BINS_CONFIG: List[Dict[str, Any]] = [
 ]
 
 
+def create_sampler(bins_cfg: List[Dict[str, Any]]):
+    """One UltrasonicSampler for all configured bins, or None to fall back to DistanceSensor."""
+    if not ULTRASONIC_SAMPLER or DistanceSensor is None:
+        return None
+    try:
+        from ultrasonic_sampler import UltrasonicSampler
+        return UltrasonicSampler([(c["id"], c["trigger"], c["echo"]) for c in bins_cfg
+                                  if c.get("trigger") is not None and c.get("echo") is not None])
+    except Exception as e:
+        print(f"[ultrasonic] sampler unavailable ({e}); using one DistanceSensor per bin")
+        return None
+
+
 class SensorWrapper:
-    def __init__(self, cfg: Dict[str, Any]):
+    def __init__(self, cfg: Dict[str, Any], sampler=None):
         self.id = cfg["id"]
         self.trigger = cfg.get("trigger")
         self.echo = cfg.get("echo")
         self.empty_cm = float(cfg.get("empty_distance_cm", 80.0))
         self.full_cm = float(cfg.get("full_distance_cm", 10.0))
 
+        self._sampler = sampler
         self._sensor = None
-        if DistanceSensor is not None and self.trigger is not None and self.echo is not None:
+        if sampler is None and DistanceSensor is not None and self.trigger is not None and self.echo is not None:
             try:
                 # gpiozero DistanceSensor expects the trigger and echo pin numbers
                 self._sensor = DistanceSensor(echo=self.echo, trigger=self.trigger)
@@ -88,6 +116,9 @@ class SensorWrapper:
 
     def read_distance_cm(self) -> float | None:
         """Return measured distance in centimeters or None if not available."""
+        if self._sampler is not None:
+            # median of the sampler's latest sweeps
+            return self._sampler.distance_cm(self.id)
         if self._sensor is None:
             return None
         try:
@@ -115,27 +146,14 @@ class SensorWrapper:
         return max(0.0, min(100.0, filled))
 
 
-def send_update(bin_id: str, distance_cm: float | None, fill_percent: float | None) -> None:
-    if not BIN_UPDATE_URL:
-        print("[ultrasonic] BIN_UPDATE_URL not set; skipping POST")
-        return
-
-    payload = {
-        "bin_id": bin_id,
-        "distance_cm": distance_cm,
-        "fill_percent": fill_percent,
-        "ts": datetime.utcnow().isoformat() + "Z",
-    }
-    try:
-        resp = requests.post(BIN_UPDATE_URL, json=payload, timeout=5)
-        print(f"[ultrasonic] posted {bin_id}: status={resp.status_code}")
-    except Exception as e:
-        print(f"[ultrasonic] failed to POST for {bin_id}: {e}")
-
-
 def main_loop():
-    sensors = [SensorWrapper(cfg) for cfg in BINS_CONFIG]
-    print(f"[ultrasonic] monitoring {len(sensors)} bins; interval={UPDATE_INTERVAL}s; target={BIN_UPDATE_URL}")
+    sampler = create_sampler(BINS_CONFIG)
+    sensors = [SensorWrapper(cfg, sampler) for cfg in BINS_CONFIG]
+    uplink = TelemetryUplink(BIN_UPDATE_URL, device=os.environ.get("DEVICE_NAME"),
+                             outbox=open_outbox("ultrasonic_monitor") if BIN_UPDATE_URL else None)
+    poller = AdaptivePoller(UPDATE_INTERVAL) if ADAPTIVE_POLLING else None
+    print(f"[ultrasonic] monitoring {len(sensors)} bins; interval={UPDATE_INTERVAL}s"
+          f"{' (adaptive)' if poller is not None else ''}; target={BIN_UPDATE_URL}")
 
     stop = False
 
@@ -148,16 +166,30 @@ def main_loop():
     signal.signal(signal.SIGTERM, _handle_sig)
 
     while not stop:
+        if sampler is not None:
+            sampler.read_all()
+        batch = []
         for s in sensors:
             d = s.read_distance_cm()
             p = s.compute_fill_percent(d)
             print(f"[ultrasonic] {s.id} distance_cm={d} fill%={p}")
-            send_update(s.id, d, p)
+            batch.append(make_reading(s.id, d, p))
+        uplink.publish(batch)
+        interval = UPDATE_INTERVAL
+        if poller is not None:
+            interval = poller.update(batch)
+            ttf = {r["bin_id"]: poller.status(r["bin_id"]).get("time_to_full_s") for r in batch}
+            print(f"[ultrasonic] next reading in {interval:.1f}s; time to full: "
+                  f"{ {k: v for k, v in ttf.items() if v is not None} }")
         # sleep with early exit checks
         slept = 0.0
-        while slept < UPDATE_INTERVAL and not stop:
+        while slept < interval and not stop:
             time.sleep(0.5)
             slept += 0.5
+    print(f"[ultrasonic] uplink: {uplink.stats}")
+    uplink.close()
+    if sampler is not None:
+        sampler.close()
 
 
 if __name__ == "__main__":